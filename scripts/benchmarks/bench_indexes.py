@@ -0,0 +1,155 @@
+"""Планы EXPLAIN ANALYZE и время запросов чтения до и после миграции покрывающих индексов
+
+Использует базу PostgreSQL из настроек DB_* и переключает только индексы project_summaries явным DDL:
+покрывающие индексы заменяются обычными, замер, индексы из миграции 9a4b2c7e1f05 восстанавливаются (в том
+числе при ошибке), повторный замер. Ревизия схемы и данные не меняются. Планы сохраняются в JSON.
+
+Запуск: PYTHONPATH=. python scripts/benchmarks/bench_indexes.py --output /tmp/index_plans.json
+"""
+
+import argparse
+import json
+import statistics
+from datetime import date, timedelta
+
+from sqlalchemy import inspect, text
+
+from wakatime_tracker.database.manager import DatabaseManager
+
+# Индексы до миграции 9a4b2c7e1f05; уникальный индекс заменяется до удаления старого, как в самой миграции
+PLAIN_INDEXES_DDL = [
+    "DROP INDEX idx_project_date",
+    "DROP INDEX idx_date_brin",
+    "CREATE UNIQUE INDEX idx_date_project_plain ON project_summaries (date, project_name)",
+    "DROP INDEX idx_date_project",
+    "ALTER INDEX idx_date_project_plain RENAME TO idx_date_project",
+    "CREATE INDEX idx_date ON project_summaries (date)",
+    "CREATE INDEX idx_project ON project_summaries (project_name)",
+]
+COVERING_INDEXES_DDL = [
+    "DROP INDEX IF EXISTS idx_date",
+    "DROP INDEX IF EXISTS idx_project",
+    "DROP INDEX IF EXISTS idx_date_project_plain",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_date_project_covering ON project_summaries (date, project_name) "
+    "INCLUDE (total_seconds, percent)",
+    "DROP INDEX IF EXISTS idx_date_project",
+    "ALTER INDEX idx_date_project_covering RENAME TO idx_date_project",
+    "CREATE INDEX IF NOT EXISTS idx_date_brin ON project_summaries USING brin (date)",
+    "CREATE INDEX IF NOT EXISTS idx_project_date ON project_summaries (project_name, date) INCLUDE (total_seconds)",
+]
+
+QUERIES = {
+    "daily_totals": (
+        "SELECT date, SUM(total_seconds) FROM project_summaries "
+        "WHERE date >= :start AND date <= :end GROUP BY date ORDER BY date"
+    ),
+    "project_totals": (
+        "SELECT project_name, SUM(total_seconds) FROM project_summaries "
+        "WHERE date >= :start AND date <= :end GROUP BY project_name ORDER BY SUM(total_seconds) DESC"
+    ),
+    "dashboard_rows": (
+        "SELECT date, project_name, total_seconds, percent FROM project_summaries "
+        "WHERE date >= :start AND date <= :end ORDER BY date"
+    ),
+    "project_history": (
+        "SELECT date, total_seconds FROM project_summaries "
+        "WHERE project_name = :project AND date >= :start AND date <= :end ORDER BY date"
+    ),
+}
+
+
+def walk_plan(node: dict) -> list[dict]:
+    nodes = [node]
+    for child in node.get("Plans", []):
+        nodes.extend(walk_plan(child))
+    return nodes
+
+
+def summarize_plan(explain: dict) -> dict:
+    """Узлы сканирования, обращения к страницам таблицы и буферы из JSON-плана"""
+
+    nodes = walk_plan(explain["Plan"])
+    # Index Only Scan считает обращения к таблице в Heap Fetches, Bitmap Heap Scan — в Heap Blocks
+    heap_blocks = sum(
+        node.get("Heap Fetches", 0) + node.get("Exact Heap Blocks", 0) + node.get("Lossy Heap Blocks", 0)
+        for node in nodes
+    )
+    scans = sorted({f"{node['Node Type']}:{node.get('Index Name', node.get('Relation Name', ''))}" for node in nodes})
+    return {
+        "execution_ms": explain["Execution Time"],
+        "scans": [scan for scan in scans if "Scan" in scan],
+        "heap_blocks": heap_blocks,
+        "shared_hit_blocks": explain["Plan"].get("Shared Hit Blocks", 0),
+        "shared_read_blocks": explain["Plan"].get("Shared Read Blocks", 0),
+    }
+
+
+def execute_ddl(db: DatabaseManager, statements: list[str]) -> None:
+    # Одна транзакция: при ошибке набор индексов не остаётся промежуточным
+    with db.engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+
+
+def measure(db: DatabaseManager, params: dict, repeats: int) -> dict:
+    # Актуальная карта видимости нужна для index-only scan
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE project_summaries"))
+
+    results = {}
+    with db.engine.connect() as connection:
+        for name, sql in QUERIES.items():
+            samples, plan = [], None
+            for _ in range(repeats):
+                plan = connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()
+                samples.append(plan[0]["Execution Time"])
+            summary = summarize_plan(plan[0])
+            summary["median_ms"] = statistics.median(samples)
+            summary["plan"] = plan[0]["Plan"]
+            results[name] = summary
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", default="index_plans.json")
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    if db.engine.dialect.name != "postgresql":
+        raise SystemExit("EXPLAIN ANALYZE benchmark requires the PostgreSQL backend")
+    indexes = {index["name"] for index in inspect(db.engine).get_indexes("project_summaries")}
+    if not {"idx_date_brin", "idx_project_date"} <= indexes:
+        raise SystemExit("Covering indexes are missing: upgrade the database to head first")
+
+    end = date.today()
+    start = (end - timedelta(days=args.days)).strftime("%Y-%m-%d")
+    end = end.strftime("%Y-%m-%d")
+    projects = db.get_recent_projects(1)
+    project = projects[0] if projects else ""
+    params = {"start": start, "end": end, "project": project}
+
+    execute_ddl(db, PLAIN_INDEXES_DDL)
+    try:
+        results = {"before": measure(db, params, args.repeats)}
+    finally:
+        execute_ddl(db, COVERING_INDEXES_DDL)
+    results["after"] = measure(db, params, args.repeats)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"params": params, "results": results}, f, indent=2)
+
+    print(f"{'query':<18}{'before ms':>12}{'after ms':>12}{'heap before':>13}{'heap after':>12}  scans after")
+    for name in QUERIES:
+        before, after = results["before"][name], results["after"][name]
+        print(
+            f"{name:<18}{before['median_ms']:>12.3f}{after['median_ms']:>12.3f}"
+            f"{before['heap_blocks']:>13}{after['heap_blocks']:>12}  {', '.join(after['scans'])}"
+        )
+    print(f"Plans written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
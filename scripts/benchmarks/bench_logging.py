@@ -0,0 +1,78 @@
+"""Накладные расходы логирования на одну сохранённую строку
+
+Сравнивает прежний конвейер (синхронный StreamHandler, callsite и f-строки на каждую запись)
+с очередью и фоновым потоком, ленивыми аргументами и callsite только для WARNING и выше.
+
+Запуск: PYTHONPATH=. python scripts/benchmarks/bench_logging.py --rows 50000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from wakatime_tracker.config import LoggingSettings
+from wakatime_tracker.logger import configure_logging, stop_logging
+
+logger = logging.getLogger("wakatime_tracker.database.manager")
+
+PROJECTS = [f"project-{i}" for i in range(20)]
+
+
+def ingest_eager(rows: int) -> None:
+    for i in range(rows):
+        project_data = {"name": PROJECTS[i % len(PROJECTS)], "total_seconds": i}
+        logger.debug(f"Saved new data for project {project_data['name']} on 2025-01-01")
+        if i % 100 == 0:
+            logger.info(f"Imported {i} rows")
+
+
+def ingest_lazy(rows: int) -> None:
+    for i in range(rows):
+        project_data = {"name": PROJECTS[i % len(PROJECTS)], "total_seconds": i}
+        logger.debug("Saved new data for project %s on %s", project_data["name"], "2025-01-01")
+        if i % 100 == 0:
+            logger.info("Imported %s rows", i)
+
+
+SCENARIOS = {
+    "before": (LoggingSettings(async_logging=False, callsite_level="DEBUG"), ingest_eager),
+    "after": (LoggingSettings(), ingest_lazy),
+}
+
+
+def run(name: str, level: str, rows: int) -> tuple[float, float]:
+    settings, ingest = SCENARIOS[name]
+    configure_logging(settings.model_copy(update={"level": level}))
+
+    started = time.perf_counter()
+    ingest(rows)
+    caller_time = time.perf_counter() - started
+
+    # Для асинхронного конвейера дожидаемся записи всех сообщений фоновым потоком
+    stop_logging()
+    total_time = time.perf_counter() - started
+    return caller_time, total_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    output = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+
+    print(f"{'pipeline':<8} {'level':<6} {'caller us/row':>14} {'total us/row':>13}", file=output)
+    for level in ("INFO", "DEBUG"):
+        for name in SCENARIOS:
+            caller_time, total_time = run(name, level, args.rows)
+            print(
+                f"{name:<8} {level:<6} {caller_time / args.rows * 1e6:>14.2f} {total_time / args.rows * 1e6:>13.2f}",
+                file=output,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Пропускная способность сессионизации heartbeat: NumPy против цикла на Python
+
+Генерирует упорядоченные по дню, проекту и времени heartbeat, проверяет совпадение результатов
+и печатает число обработанных heartbeat в секунду.
+
+Запуск: PYTHONPATH=. python scripts/benchmarks/bench_sessionize.py --heartbeats 5000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from wakatime_tracker.sessionize import sessionize
+
+DAY_SECONDS = 86400
+
+
+def generate(heartbeats: int, days: int, projects: int, seed: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    day = rng.integers(0, days, heartbeats)
+    project = rng.integers(0, projects, heartbeats)
+    # Внутри дня heartbeat распределены по рабочим часам: промежутки от секунд до пауз длиннее таймаута
+    times = day * DAY_SECONDS + rng.uniform(9 * 3600, 19 * 3600, heartbeats)
+    order = np.lexsort((times, project, day))
+    day, project, times = day[order], project[order], times[order]
+
+    dates = np.array([f"2026-{1 + d // 28:02d}-{1 + d % 28:02d}" for d in range(days)])[day]
+    names = np.array([f"project-{p}" for p in range(projects)])[project]
+    return dates, names, times
+
+
+def sessionize_loop(dates, projects, times, timeout: float) -> dict[tuple[str, str], float]:
+    """Прямолинейная реализация для сравнения"""
+
+    totals: dict[tuple[str, str], float] = {}
+    previous_key, previous_time = None, None
+    for date, project, timestamp in zip(dates.tolist(), projects.tolist(), times.tolist()):
+        key = (date, project)
+        totals.setdefault(key, 0.0)
+        if key == previous_key and timestamp - previous_time <= timeout:
+            totals[key] += timestamp - previous_time
+        previous_key, previous_time = key, timestamp
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--heartbeats", type=int, default=5_000_000)
+    parser.add_argument("--loop-heartbeats", type=int, default=500_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--projects", type=int, default=30)
+    parser.add_argument("--timeout", type=float, default=900.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    dates, names, times = generate(args.heartbeats, args.days, args.projects, seed=1)
+
+    samples = []
+    for _ in range(args.repeats):
+        started = time.perf_counter()
+        result = sessionize(dates, names, times, args.timeout)
+        samples.append(time.perf_counter() - started)
+    vectorized = min(samples)
+
+    loop_size = min(args.loop_heartbeats, args.heartbeats)
+    started = time.perf_counter()
+    expected = sessionize_loop(dates[:loop_size], names[:loop_size], times[:loop_size], args.timeout)
+    loop = time.perf_counter() - started
+
+    check = sessionize(dates[:loop_size], names[:loop_size], times[:loop_size], args.timeout)
+    actual = dict(zip(zip(check["date"], check["project_name"]), check["total_seconds"]))
+    assert actual.keys() == expected.keys()
+    assert all(abs(actual[key] - expected[key]) < 1e-6 for key in expected)
+
+    print(f"{'implementation':<12}{'heartbeats':>12}{'seconds':>10}{'heartbeats/s':>15}")
+    print(f"{'numpy':<12}{args.heartbeats:>12}{vectorized:>10.3f}{args.heartbeats / vectorized:>15,.0f}")
+    print(f"{'python loop':<12}{loop_size:>12}{loop:>10.3f}{loop_size / loop:>15,.0f}")
+    print(f"{len(result)} project days, results match the loop on {loop_size} heartbeats")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from wakatime_tracker.database.comparison import baseline_period, comparison_query, shape_comparison
+from wakatime_tracker.database.models import Base, ProjectSummary
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def compare(session: Session, start: date, end: date, baseline: str) -> dict:
+    previous = baseline_period(start, end, baseline)
+    query = comparison_query((str(start), str(end)), (str(previous[0]), str(previous[1])))
+    return shape_comparison(session.execute(query).all(), (start, end), previous, baseline)
+
+
+def test_year_baseline_counts_overlapping_days_in_both_periods(session):
+    # 400 дней против того же периода год назад: последние 35 дней базового периода входят в текущий
+    start = date(2025, 1, 1)
+    end = start + timedelta(days=399)
+    day = start - timedelta(days=400)
+    while day <= end:
+        session.add(ProjectSummary(date=str(day), project_name="alpha", total_seconds=3600.0, percent=100.0))
+        day += timedelta(days=1)
+    session.commit()
+
+    result = compare(session, start, end, "year")
+
+    # Базовый период включает 29 февраля 2024 года
+    assert result["previous"] == {"start": "2024-01-01", "end": "2025-02-04", "total_seconds": 401 * 3600.0}
+    assert result["current"]["total_seconds"] == 400 * 3600.0
+    assert result["projects"][0]["current_seconds"] == 400 * 3600.0
+    assert result["projects"][0]["previous_seconds"] == 401 * 3600.0
+    assert {row["previous_seconds"] for row in result["daily"]} == {3600.0}
+    assert {row["current_seconds"] for row in result["daily"]} == {3600.0}
@@ -0,0 +1,173 @@
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import orjson
+import pytest
+from sqlalchemy import func, select
+from tornado.testing import AsyncHTTPTestCase
+
+from wakatime_tracker.config import DatabaseSettings, IngestSettings, StatsSettings
+from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.database.models import Base, Heartbeat
+from wakatime_tracker.ingest import (
+    HeartbeatBuffer,
+    HeartbeatFlusher,
+    JOURNAL_PREFIX,
+    make_ingest_app,
+    normalize_heartbeat,
+)
+
+RECEIVED_AT = datetime(2024, 1, 1, 12, 0)
+
+
+def heartbeat(index: int) -> dict:
+    payload = {"entity": f"/src/file_{index}.py", "time": 1704100000.0 + index, "project": "alpha"}
+    return normalize_heartbeat(payload, "vscode-wakatime", RECEIVED_AT)
+
+
+def ingest_settings(directory, **overrides) -> IngestSettings:
+    return IngestSettings(journal_directory=str(directory), journal_fsync=False, batch_size=2, **overrides)
+
+
+def segments(directory) -> list[str]:
+    return sorted(path.name for path in directory.glob(f"{JOURNAL_PREFIX}*.jsonl"))
+
+
+class FailingDatabase:
+    """Заглушка базы: запись падает, как при недоступном сервере"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def save_heartbeats(self, heartbeats: list[dict]) -> int:
+        self.calls += 1
+        raise RuntimeError("database is unavailable")
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(
+        DatabaseSettings(driver="sqlite", sqlite_path=str(tmp_path / "ingest.db")), StatsSettings()
+    )
+    Base.metadata.create_all(manager.engine)
+    return manager
+
+
+def stored_count(db: DatabaseManager) -> int:
+    with db.get_session() as session:
+        return session.execute(select(func.count()).select_from(Heartbeat)).scalar()
+
+
+def test_journal_is_replayed_after_crash(tmp_path, db):
+    journal = tmp_path / "journal"
+    buffer = HeartbeatBuffer(ingest_settings(journal))
+    assert buffer.submit([heartbeat(0), heartbeat(1), heartbeat(2)])
+    # Падение процесса: буфер не сброшен, последняя строка записана наполовину
+    buffer.journal._file.write(b'{"entity": "/src/trunc')
+    buffer.journal._file.close()
+
+    restarted = HeartbeatBuffer(ingest_settings(journal))
+
+    assert len(restarted) == 3
+    assert HeartbeatFlusher(restarted, db, restarted.settings).flush() == 3
+    assert stored_count(db) == 3
+    assert len(segments(journal)) == 1  # только новый текущий сегмент
+
+
+def test_segments_are_removed_only_after_commit(tmp_path, db):
+    journal = tmp_path / "journal"
+    buffer = HeartbeatBuffer(ingest_settings(journal))
+    buffer.submit([heartbeat(0), heartbeat(1), heartbeat(2)])
+    written_segment = segments(journal)[0]
+
+    seen_during_save = []
+    save_heartbeats = db.save_heartbeats
+
+    def save_and_record(heartbeats: list[dict]) -> int:
+        seen_during_save.append(written_segment in segments(journal))
+        return save_heartbeats(heartbeats)
+
+    db.save_heartbeats = save_and_record
+    HeartbeatFlusher(buffer, db, buffer.settings).flush()
+
+    # Две пачки по batch_size: сегмент на диске во время обеих записей и удалён после
+    assert seen_during_save == [True, True]
+    assert written_segment not in segments(journal)
+    assert stored_count(db) == 3
+
+
+def test_failed_flush_restores_buffer_and_keeps_segments(tmp_path, db):
+    journal = tmp_path / "journal"
+    buffer = HeartbeatBuffer(ingest_settings(journal))
+    buffer.submit([heartbeat(0), heartbeat(1), heartbeat(2)])
+    written_segment = segments(journal)[0]
+
+    failing = FailingDatabase()
+    assert HeartbeatFlusher(buffer, failing, buffer.settings).flush() == 0
+
+    assert failing.calls == 1
+    assert len(buffer) == 3
+    assert written_segment in segments(journal)
+
+    # Повторная попытка с рабочей базой записывает всё и очищает журнал
+    assert HeartbeatFlusher(buffer, db, buffer.settings).flush() == 3
+    assert len(buffer) == 0
+    assert written_segment not in segments(journal)
+    assert stored_count(db) == 3
+
+
+def test_stop_waits_for_running_flush(tmp_path):
+    buffer = HeartbeatBuffer(ingest_settings(tmp_path / "journal"))
+    buffer.submit([heartbeat(0)])
+    active, overlaps = [], []
+
+    class SlowDatabase:
+        def save_heartbeats(self, heartbeats: list[dict]) -> int:
+            overlaps.append(bool(active))
+            active.append(True)
+            time.sleep(0.2)
+            active.pop()
+            if len(overlaps) == 1:
+                buffer.submit([heartbeat(1)])  # пришёл новый heartbeat, пока шла первая запись
+            return len(heartbeats)
+
+    flusher = HeartbeatFlusher(buffer, SlowDatabase(), buffer.settings)
+    background = threading.Thread(target=flusher.flush)
+    background.start()
+    time.sleep(0.05)
+    flusher.stop()
+    background.join()
+
+    # Последний сброс дождался фоновой записи и забрал пришедший за это время heartbeat
+    assert overlaps == [False, False]
+    assert len(buffer) == 0
+
+
+class BackpressureTest(AsyncHTTPTestCase):
+    def get_app(self):
+        self.journal = tempfile.TemporaryDirectory()
+        settings = ingest_settings(self.journal.name, max_buffer=3)
+        self.buffer = HeartbeatBuffer(settings)
+        return make_ingest_app(self.buffer, settings)
+
+    def tearDown(self):
+        super().tearDown()
+        self.buffer.journal._file.close()
+        self.journal.cleanup()
+
+    def post_bulk(self, count: int, start: int = 0):
+        body = [
+            {"entity": f"/src/file_{start + index}.py", "time": 1704100000.0 + start + index} for index in range(count)
+        ]
+        return self.fetch("/api/v1/users/current/heartbeats.bulk", method="POST", body=orjson.dumps(body))
+
+    def test_full_buffer_returns_429(self):
+        assert self.post_bulk(2).code == 201
+
+        response = self.post_bulk(2, start=2)
+
+        assert response.code == 429
+        assert response.headers["Retry-After"] == "5"
+        assert len(self.buffer) == 2
@@ -0,0 +1,75 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import Session
+
+from wakatime_tracker.config import StatsSettings
+from wakatime_tracker.database.models import Base, DailyTotal, ProjectMonthlySummary, ProjectSummary, RunningStats
+from wakatime_tracker.database.running_stats import rebuild_daily_totals, rebuild_running_stats, STATE_ID, update_day
+
+SETTINGS = StatsSettings(daily_goal_hours=1.0, active_day_min_minutes=10.0)
+STATE_COLUMNS = [column.name for column in RunningStats.__table__.columns if column.name not in ("id", "updated_at")]
+# Пороги: неактивный день, активный без цели, ровно цель, больше цели, одинаковые значения для ничьих
+TOTALS = [0.0, 300.0, 600.0, 1800.0, 3600.0, 5400.0, 7200.0]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def save_day(session: Session, day: str, seconds: float) -> None:
+    session.execute(delete(ProjectSummary).where(ProjectSummary.date == day))
+    session.add(ProjectSummary(date=day, project_name="alpha", total_seconds=seconds, percent=100.0))
+    session.flush()
+    update_day(session, day, SETTINGS)
+    session.commit()
+
+
+def state_values(session: Session) -> dict:
+    state = session.get(RunningStats, STATE_ID)
+    return {column: getattr(state, column) for column in STATE_COLUMNS}
+
+
+def rebuilt_values(session: Session) -> dict:
+    rebuild_running_stats(session, SETTINGS)
+    values = state_values(session)
+    session.rollback()
+    return values
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_updates_match_full_rebuild(session, seed):
+    rng = random.Random(seed)
+    first = date(2024, 1, 1)
+    for _ in range(200):
+        # Дни задним числом внутри и вокруг уже существующих серий
+        day = str(first + timedelta(days=rng.randrange(40)))
+        save_day(session, day, rng.choice(TOTALS))
+
+        incremental = state_values(session)
+        assert incremental == pytest.approx(rebuilt_values(session)), day
+
+
+def test_best_day_tie_keeps_earlier_date(session):
+    save_day(session, "2024-01-05", 3600.0)
+    save_day(session, "2024-01-03", 3600.0)
+
+    assert state_values(session)["best_day_date"] == "2024-01-03"
+
+
+def test_compacted_days_keep_their_totals(session):
+    session.add(DailyTotal(date="2023-06-01", total_seconds=7200.0, project_count=2))
+    session.add(ProjectMonthlySummary(month="2023-06", project_name="alpha", total_seconds=7200.0, days_active=1))
+    # Поздняя строка сжатого года в секции по умолчанию
+    session.add(ProjectSummary(date="2023-06-01", project_name="alpha", total_seconds=60.0, percent=100.0))
+    session.commit()
+
+    rebuild_daily_totals(session)
+
+    assert session.execute(select(DailyTotal.total_seconds).where(DailyTotal.date == "2023-06-01")).scalar() == 7200.0
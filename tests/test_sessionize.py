@@ -0,0 +1,65 @@
+import numpy as np
+
+from wakatime_tracker.sessionize import sessionize, to_project_records
+
+TIMEOUT = 900.0
+
+
+def run(rows: list[tuple]) -> list[tuple]:
+    dates, projects, times = zip(*rows)
+    result = sessionize(dates, projects, np.array(times), TIMEOUT)
+    return list(result.itertuples(index=False, name=None))
+
+
+def test_gap_equal_to_timeout_is_counted():
+    assert run([("2024-01-01", "alpha", 0.0), ("2024-01-01", "alpha", TIMEOUT)]) == [
+        ("2024-01-01", "alpha", TIMEOUT, 1)
+    ]
+
+
+def test_gap_longer_than_timeout_starts_new_session():
+    rows = [("2024-01-01", "alpha", 0.0), ("2024-01-01", "alpha", TIMEOUT + 1), ("2024-01-01", "alpha", TIMEOUT + 61)]
+
+    assert run(rows) == [("2024-01-01", "alpha", 60.0, 2)]
+
+
+def test_single_heartbeat_is_one_empty_session():
+    assert run([("2024-01-01", "alpha", 100.0)]) == [("2024-01-01", "alpha", 0.0, 1)]
+
+
+def test_gaps_are_not_counted_across_day_and_project_boundaries():
+    rows = [
+        ("2024-01-01", "alpha", 0.0),
+        ("2024-01-01", "alpha", 60.0),
+        # Следующий heartbeat через 10 секунд, но уже другого проекта
+        ("2024-01-01", "beta", 70.0),
+        ("2024-01-01", "beta", 100.0),
+        # Тот же проект в следующем дне
+        ("2024-01-02", "beta", 110.0),
+    ]
+
+    assert run(rows) == [
+        ("2024-01-01", "alpha", 60.0, 1),
+        ("2024-01-01", "beta", 30.0, 1),
+        ("2024-01-02", "beta", 0.0, 1),
+    ]
+
+
+def test_project_records_percent_of_day():
+    records = to_project_records(
+        sessionize(["2024-01-01"] * 4, ["alpha", "alpha", "beta", "beta"], np.array([0.0, 90.0, 200.0, 230.0]), TIMEOUT)
+    )
+
+    assert [(record["name"], record["total_seconds"], record["percent"]) for record in records] == [
+        ("alpha", 90.0, 75.0),
+        ("beta", 30.0, 25.0),
+    ]
+    assert records[0]["digital"] == "0:01"
+    assert records[0]["text"] == "1 min"
+
+
+def test_empty_input_gives_no_records():
+    durations = sessionize([], [], np.array([]), TIMEOUT)
+
+    assert durations.empty
+    assert to_project_records(durations) == []
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+import orjson
+from cachetools import LRUCache
+from tornado.ioloop import IOLoop
+from tornado.web import Application, HTTPError, RequestHandler, StaticFileHandler
+
+from wakatime_tracker.config import ApiSettings
+from wakatime_tracker.database.comparison import BASELINES
+from wakatime_tracker.database.manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RANGE_DAYS = 30
+
+
+class StatsState:
+    """Версия данных и кэш готовых ответов, общие для всех обработчиков"""
+
+    def __init__(self, db: DatabaseManager, settings: ApiSettings):
+        self.db = db
+        self.settings = settings
+        self.responses: LRUCache = LRUCache(maxsize=settings.response_cache_size)
+        self._version: str | None = None
+        self._version_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Сброс версии после записи новых данных сборщиком"""
+
+        with self._lock:
+            self._version = None
+
+    def get_version(self) -> str:
+        """Версия данных; база опрашивается не чаще одного раза за version_ttl секунд"""
+
+        with self._lock:
+            now = time.monotonic()
+            if self._version is None or now - self._version_checked_at > self.settings.version_ttl:
+                self._version = self.db.get_data_version()
+                self._version_checked_at = now
+            return self._version
+
+
+class StatsHandler(RequestHandler):
+    """Базовый обработчик: ETag из версии данных и запроса, 304 без обращения к базе"""
+
+    def initialize(self, state: StatsState):
+        self.state = state
+
+    def compute_etag(self) -> str | None:
+        # ETag выставляется в get() до выполнения запроса к базе
+        return None
+
+    def load(self) -> Any:
+        raise NotImplementedError
+
+    async def get(self, *args: str):
+        loop = IOLoop.current()
+        version = await loop.run_in_executor(None, self.state.get_version)
+        # Текущая дата входит в ETag: диапазон по умолчанию сдвигается каждый день
+        today = datetime.now().strftime("%Y-%m-%d")
+        etag = '"' + hashlib.sha1(f"{version}|{today}|{self.request.uri}".encode()).hexdigest() + '"'
+
+        self.set_header("ETag", etag)
+        self.set_header("Cache-Control", f"public, max-age={self.state.settings.cache_max_age}")
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+
+        body = self.state.responses.get(etag)
+        if body is None:
+            body = orjson.dumps(await loop.run_in_executor(None, self.load))
+            self.state.responses[etag] = body
+
+        self.set_header("Content-Type", "application/json")
+        self.write(body)
+
+    def get_date_range(self) -> tuple[str, str]:
+        end_day = self.parse_date(self.get_query_argument("end", None) or datetime.now().strftime("%Y-%m-%d"))
+        start = self.get_query_argument("start", None)
+        # Начало по умолчанию выводится из уже проверенного конца периода
+        start_day = self.parse_date(start) if start is not None else end_day - timedelta(days=DEFAULT_RANGE_DAYS)
+        if start_day > end_day:
+            raise HTTPError(400, "start must not be after end")
+
+        return start_day.strftime("%Y-%m-%d"), end_day.strftime("%Y-%m-%d")
+
+    @staticmethod
+    def parse_date(value: str) -> datetime:
+        try:
+            return datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPError(400, f"Invalid date: {value}, expected YYYY-MM-DD")
+
+
+class DailyTotalsHandler(StatsHandler):
+    def load(self) -> Any:
+        start, end = self.get_date_range()
+        return {"start": start, "end": end, "data": self.state.db.get_daily_totals(start, end)}
+
+
+class ProjectTotalsHandler(StatsHandler):
+    def load(self) -> Any:
+        start, end = self.get_date_range()
+        return {"start": start, "end": end, "data": self.state.db.get_project_totals(start, end)}
+
+
+class ProjectListHandler(StatsHandler):
+    def load(self) -> Any:
+        return {"data": sorted(self.state.db.get_unique_projects())}
+
+
+class RecentProjectsHandler(StatsHandler):
+    def load(self) -> Any:
+        try:
+            limit = int(self.get_query_argument("limit", "50"))
+        except ValueError:
+            raise HTTPError(400, "limit must be an integer")
+        return {"data": self.state.db.get_project_catalog(min(max(limit, 1), 500))}
+
+
+class ComparisonHandler(StatsHandler):
+    def load(self) -> Any:
+        start, end = self.get_date_range()
+        baseline = self.get_query_argument("baseline", "previous")
+        if baseline not in BASELINES:
+            raise HTTPError(400, f"baseline must be one of {', '.join(BASELINES)}")
+        return self.state.db.get_period_comparison(start, end, baseline)
+
+
+class DateRangeHandler(StatsHandler):
+    def load(self) -> Any:
+        return self.state.db.get_date_range()
+
+
+def make_app(state: StatsState, reports_directory: str | None = None) -> Application:
+    handler_kwargs = {"state": state}
+    routes = [
+        (r"/api/v1/daily", DailyTotalsHandler, handler_kwargs),
+        (r"/api/v1/projects/totals", ProjectTotalsHandler, handler_kwargs),
+        (r"/api/v1/projects/recent", RecentProjectsHandler, handler_kwargs),
+        (r"/api/v1/projects", ProjectListHandler, handler_kwargs),
+        (r"/api/v1/compare", ComparisonHandler, handler_kwargs),
+        (r"/api/v1/range", DateRangeHandler, handler_kwargs),
+    ]
+    if reports_directory is not None:
+        # Статические отчёты отдаются как есть, с ETag по содержимому файла
+        routes.append(
+            (r"/reports/(.*)", StaticFileHandler, {"path": reports_directory, "default_filename": "index.json"})
+        )
+    return Application(routes)
+
+
+def serve_in_thread(name: str, make: Callable[[], Application], host: str, port: int) -> threading.Thread:
+    """Запуск tornado-приложения в фоновом потоке со своим event loop"""
+
+    def run():
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        make().listen(port, address=host)
+        logger.info(f"{name} listening on {host}:{port}")
+        IOLoop.current().start()
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def start_api_server(db: DatabaseManager, settings: ApiSettings, reports_directory: str | None = None) -> StatsState:
+    """Запуск API статистики рядом со сборщиком; возвращает состояние для сброса версии после сбора"""
+
+    state = StatsState(db, settings)
+    serve_in_thread("stats-api", lambda: make_app(state, reports_directory), settings.host, settings.port)
+    return state
@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+DAYS_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+@dataclass
+class CalendarMatrix:
+    """Сетка день недели × неделя; ячейки вне диапазона равны NaN"""
+
+    values: np.ndarray  # shape (7, weeks)
+    week_starts: np.ndarray  # datetime64[D], понедельник каждой недели
+    start: np.datetime64
+    end: np.datetime64
+
+    @property
+    def year(self) -> int:
+        return int(self.start.astype("datetime64[Y]").astype(int) + 1970)
+
+    def week_labels(self) -> list[str]:
+        return [str(week_start) for week_start in self.week_starts]
+
+
+def weekday(days: np.ndarray | np.datetime64) -> np.ndarray | int:
+    """День недели (понедельник = 0) для datetime64[D]: 1970-01-01 был четвергом"""
+
+    return (np.asarray(days, dtype="datetime64[D]").astype(np.int64) + 3) % 7
+
+
+def build_calendar_matrix(dates: np.ndarray, values: np.ndarray, start: date, end: date) -> CalendarMatrix:
+    """Раскладка дневных сумм по сетке через целочисленные смещения от понедельника первой недели"""
+
+    start_day = np.datetime64(start, "D")
+    end_day = np.datetime64(end, "D")
+    first_monday = start_day - weekday(start_day)
+
+    first_offset = int((start_day - first_monday).astype(np.int64))
+    last_offset = int((end_day - first_monday).astype(np.int64))
+    weeks = last_offset // 7 + 1
+
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    values = np.asarray(values, dtype=np.float64)
+    in_range = (dates >= start_day) & (dates <= end_day)
+    offsets = (dates[in_range] - first_monday).astype(np.int64)
+
+    # bincount суммирует несколько записей за один день (по разным проектам)
+    sums = np.bincount(offsets, weights=values[in_range], minlength=weeks * 7)
+
+    in_range_cells = slice(first_offset, last_offset + 1)
+    cells = np.full(weeks * 7, np.nan)
+    cells[in_range_cells] = sums[in_range_cells]
+
+    week_starts = first_monday + np.arange(weeks) * 7
+    return CalendarMatrix(values=cells.reshape(weeks, 7).T, week_starts=week_starts, start=start_day, end=end_day)
+
+
+def build_yearly_calendars(dates: np.ndarray, values: np.ndarray, start: date, end: date) -> list[CalendarMatrix]:
+    """Календари в стиле GitHub: отдельная сетка на каждый год, обрезанная по границам диапазона"""
+
+    calendars = []
+    for year in range(start.year, end.year + 1):
+        year_start = max(start, date(year, 1, 1))
+        year_end = min(end, date(year, 12, 31))
+        calendars.append(build_calendar_matrix(dates, values, year_start, year_end))
+    return calendars
@@ -6,17 +6,47 @@ from pydantic_settings import BaseSettings
 
 
 class DatabaseSettings(BaseSettings):
+    driver: str = "postgresql"  # postgresql или sqlite
     host: str = "localhost"
     port: int = 5432
     name: str = "wakatime_tracker"
     user: str = "postgres"
     password: str = "postgres"
 
+    sqlite_path: str = "wakatime_tracker.db"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 64000
+    sqlite_mmap_size: int = 268435456
+
+    pool_size: int = 5
+    max_overflow: int = 5
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    statement_cache_size: int = 500
+    connect_retries: int = 5
+    connect_backoff: float = 1.0
+    connect_backoff_max: float = 30.0
+
+    partition_years_ahead: int = 1
+    retention_years: int = 0  # 0 — хранить детальные данные бессрочно
+    retention_mode: str = "archive"  # archive — отсоединить и переименовать секцию, drop — удалить
+
+    instrument_queries: bool = True
+    slow_query_threshold_ms: float = 200.0
+    explain_slow_queries: bool = False
+    repeated_query_threshold: int = 20
+
     class Config:
         env_prefix = "db_"
 
+    @property
+    def is_sqlite(self) -> bool:
+        return self.driver == "sqlite"
+
     @property
     def url(self) -> str:
+        if self.is_sqlite:
+            return f"sqlite:///{self.sqlite_path}"
         return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
 
 
@@ -36,6 +66,9 @@ class TelegramSettings(BaseSettings):
 
     bot_token: str = None
     chat_id: str = None
+    bot_enabled: bool = False
+    poll_timeout: int = 30
+    top_projects: int = 10
 
     class Config:
         env_prefix = "telegram_"
@@ -50,6 +83,10 @@ class LoggingSettings(BaseSettings):
 
     level: str = "INFO"
     render_json_logs: bool = False
+    sqlalchemy_level: str = "WARNING"
+    async_logging: bool = True
+    callsite_level: str = "WARNING"
+    debug_sample_rate: float = 1.0
 
     class Config:
         env_prefix = "logging_"
@@ -67,6 +104,127 @@ class SchedulerSettings(BaseSettings):
         env_prefix = "scheduler_"
 
 
+class DashboardSettings(BaseSettings):
+    """Настройки дашборда"""
+
+    debug: bool = False
+    day_resolution_max_days: int = 180
+    week_resolution_max_days: int = 1095
+    max_points_per_chart: int = 500
+    webgl_threshold: int = 300
+    project_options_limit: int = 50
+    frame_cache_ranges: int = 8
+    # Повторно запрашиваемое окно до водяного знака: updated_at выставляется до коммита записи
+    delta_sync_margin_seconds: int = 300
+
+    class Config:
+        env_prefix = "dashboard_"
+
+
+class ApiSettings(BaseSettings):
+    """Настройки HTTP API статистики"""
+
+    enabled: bool = False
+    host: str = "0.0.0.0"
+    port: int = 8080
+    cache_max_age: int = 60
+    version_ttl: float = 30.0
+    response_cache_size: int = 256
+
+    class Config:
+        env_prefix = "api_"
+
+
+class IngestSettings(BaseSettings):
+    """Настройки приёма heartbeat от плагинов редакторов"""
+
+    enabled: bool = False
+    host: str = "0.0.0.0"
+    port: int = 8090
+    api_key: str | None = None  # без ключа принимаются любые запросы
+    batch_size: int = 500
+    flush_interval: float = 5.0
+    # Предел неснесённых в базу heartbeat, сверх него отвечаем 429
+    max_buffer: int = 20000
+    # Журнал переживает падение процесса до записи в базу; без него буфер только в памяти
+    journal_directory: str | None = None
+    journal_fsync: bool = True
+    # Пауза между heartbeat дольше этого времени не засчитывается (как keystroke timeout в WakaTime)
+    session_timeout: float = 900.0
+
+    class Config:
+        env_prefix = "ingest_"
+
+
+class ArchiveSettings(BaseSettings):
+    """Настройки архива сырых ответов WakaTime API"""
+
+    enabled: bool = True
+    backend: str = "database"  # database — bytea в raw_responses, disk — файлы в directory
+    directory: str = "data/raw_responses"
+    compress_level: int = 6
+
+    class Config:
+        env_prefix = "archive_"
+
+
+class HotCacheSettings(BaseSettings):
+    """Настройки файла Arrow IPC с записями проектов, общего для процессов дашборда"""
+
+    enabled: bool = False
+    directory: str = "data/hot_cache"
+    keep_versions: int = 3
+
+    class Config:
+        env_prefix = "hot_cache_"
+
+
+class ReportSettings(BaseSettings):
+    """Настройки статических годовых и месячных отчётов"""
+
+    enabled: bool = False
+    directory: str = "data/reports"
+    top_projects: int = 10
+    # Адрес, по которому раздаётся directory (например, /reports API), для ссылок из дашборда
+    base_url: str | None = None
+
+    class Config:
+        env_prefix = "reports_"
+
+
+class QueueSettings(BaseSettings):
+    """Настройки очереди задач сбора"""
+
+    enabled: bool = False  # сбор через collection_tasks и отдельные процессы worker
+    lease_seconds: int = 300
+    max_attempts: int = 5
+    retry_backoff: float = 60.0
+    retry_backoff_max: float = 3600.0
+    poll_interval: float = 10.0
+    backfill_chunk_days: int = 7
+
+    class Config:
+        env_prefix = "queue_"
+
+
+class StatsSettings(BaseSettings):
+    """Настройки накопительной статистики"""
+
+    daily_goal_hours: float = 4.0
+    active_day_min_minutes: float = 1.0  # день с меньшим временем не продлевает серию
+
+    class Config:
+        env_prefix = "stats_"
+
+    @property
+    def goal_seconds(self) -> float:
+        return self.daily_goal_hours * 3600
+
+    @property
+    def active_min_seconds(self) -> float:
+        return self.active_day_min_minutes * 60
+
+
 class Settings(BaseSettings):
     """Основные настройки приложения"""
 
@@ -75,6 +233,14 @@ class Settings(BaseSettings):
     telegram: TelegramSettings = Field(default_factory=TelegramSettings)
     logging: LoggingSettings = Field(default_factory=LoggingSettings)
     scheduler: SchedulerSettings = Field(default_factory=SchedulerSettings)
+    dashboard: DashboardSettings = Field(default_factory=DashboardSettings)
+    api: ApiSettings = Field(default_factory=ApiSettings)
+    stats: StatsSettings = Field(default_factory=StatsSettings)
+    queue: QueueSettings = Field(default_factory=QueueSettings)
+    archive: ArchiveSettings = Field(default_factory=ArchiveSettings)
+    hot_cache: HotCacheSettings = Field(default_factory=HotCacheSettings)
+    ingest: IngestSettings = Field(default_factory=IngestSettings)
+    reports: ReportSettings = Field(default_factory=ReportSettings)
 
 
 @lru_cache()
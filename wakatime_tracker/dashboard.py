@@ -1,11 +1,22 @@
+import functools
 import logging
+import time
 
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from datetime import datetime, timedelta
 
+from wakatime_tracker.calendar_heatmap import build_calendar_matrix, build_yearly_calendars, DAYS_ORDER
+from wakatime_tracker.config import load_config
+from wakatime_tracker.database.instrumentation import current_operation, track_operation
 from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.downsampling import choose_resolution, resample_totals, RESOLUTION_LABELS, use_webgl
+from wakatime_tracker.frame_cache import FrameCache
+from wakatime_tracker.frames import filter_projects, frame_memory_bytes
+from wakatime_tracker.hot_cache import HotCacheReader
+from wakatime_tracker.reports import read_index, read_report
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +30,14 @@ def get_db():
     return DatabaseManager()
 
 
+@st.cache_resource
+def get_frame_cache():
+    # Общий для всех сессий: после сбора каждая дозагружает только изменённые строки
+    config = load_config()
+    hot_cache = HotCacheReader(config.hot_cache) if config.hot_cache.enabled else None
+    return FrameCache(get_db(), config.dashboard, hot_cache)
+
+
 def seconds_to_hms(seconds):
     """Конвертировать секунды в формат 'Xh Ym Zs'"""
     if pd.isna(seconds) or seconds == 0:
@@ -61,10 +80,61 @@ def format_metric_value(seconds):
     return seconds_to_hms_short(seconds)
 
 
+def is_debug_enabled():
+    return load_config().dashboard.debug or st.query_params.get("debug") == "1"
+
+
+def timed_section(name):
+    """Замер времени отрисовки секции; для фрагментов учитываются и их собственные перезапуски"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            section_ms = (time.perf_counter() - started) * 1000
+            st.session_state.setdefault("section_timings", {})[name] = section_ms
+            if is_debug_enabled():
+                st.caption(f"{name} rendered in {section_ms:.1f} ms")
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def show_debug_panel(rerun_started):
+    """Панель с временем перезапуска и числом запросов к базе"""
+
+    if not is_debug_enabled():
+        return
+
+    rerun_ms = (time.perf_counter() - rerun_started) * 1000
+    operation = current_operation()
+
+    with st.sidebar.expander("Debug", expanded=True):
+        st.metric("Rerun time", f"{rerun_ms:.0f} ms")
+        if operation is not None:
+            st.metric("DB queries", operation.query_count)
+            st.caption(f"DB time: {operation.total_duration * 1000:.1f} ms")
+        frame_memory = st.session_state.get("frame_memory")
+        if frame_memory is not None:
+            st.metric("Frame memory", f"{frame_memory['bytes'] / 1024:.0f} KiB", help=f"{frame_memory['rows']} rows")
+            st.caption(f"Frame sync: {frame_memory['sync']} ({frame_memory['fetched']} rows fetched)")
+        for name, section_ms in st.session_state.get("section_timings", {}).items():
+            st.caption(f"{name}: {section_ms:.1f} ms")
+
+
 db = get_db()
 
 
+TABS = ["Overview", "Time analysis", "Project details", "Raw data"]
+REPORTS_TAB = "Reports"
+COMPARISON_BASELINES = {"No comparison": None, "Previous period": "previous", "Same period last year": "year"}
+
+
 def main():
+    rerun_started = time.perf_counter()
     st.title("⏱️ WakaTime analytics dashboard")
 
     # Сайдбар с фильтрами
@@ -80,42 +150,79 @@ def main():
     with col2:
         end_date = st.date_input("End date", end_date)
 
-    # Выбор проектов
-    projects = db.get_unique_projects()
-    selected_projects = st.sidebar.multiselect("Select projects", projects, default=[])
-
-    # Получение данных
-    data = db.get_project_stats(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+    compare_with = st.sidebar.selectbox("Compare with", list(COMPARISON_BASELINES))
+    baseline = COMPARISON_BASELINES[compare_with]
+
+    # Выбор проектов: последние активные или найденные по префиксу, а не вся история
+    limit = load_config().dashboard.project_options_limit
+    search = st.sidebar.text_input("Search projects", key="project_search", placeholder="Name prefix")
+    projects = db.search_projects(search.strip(), limit)
+    # Выбор хранится отдельно от виджета: при смене списка вариантов виджет создаётся заново
+    selection = st.session_state.get("project_selection", [])
+    projects = list(dict.fromkeys([*selection, *projects]))
+    selected_projects = st.sidebar.multiselect("Select projects", projects, default=selection)
+    st.session_state["project_selection"] = selected_projects
+
+    # Получение данных: фрейм из кэша с дозагрузкой изменений, без копий передаётся во вкладки
+    df, sync = get_frame_cache().get_frame(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+    st.session_state["frame_memory"] = {
+        "rows": len(df),
+        "bytes": frame_memory_bytes(df),
+        "sync": sync["mode"],
+        "fetched": sync["fetched"],
+    }
+
+    # Вкладки: st.tabs отрисовывает все вкладки сразу, поэтому считаем только активную
+    tabs = [*TABS, REPORTS_TAB] if load_config().reports.enabled else TABS
+    active_tab = st.radio("View", tabs, horizontal=True, key="active_tab", label_visibility="collapsed")
+
+    # Отчёты не зависят от выбранного периода и доступны даже без данных за него
+    if active_tab == REPORTS_TAB:
+        show_reports()
+        show_debug_panel(rerun_started)
+        return
 
-    if not data:
+    if df.empty:
         st.warning("No data found for selected period")
+        show_debug_panel(rerun_started)
         return
 
-    df = pd.DataFrame(data)
-
     # Фильтрация по выбранным проектам
-    if selected_projects:
-        df = df[df["project_name"].isin(selected_projects)]
+    df = filter_projects(df, selected_projects)
 
-    # Вкладки
-    tab1, tab2, tab3, tab4 = st.tabs(["Overview", "Time analysis", "Project details", "Raw data"])
-
-    with tab1:
+    if active_tab == "Overview":
         show_overview(df, start_date, end_date)
-
-    with tab2:
+        if baseline is not None:
+            show_comparison(start_date, end_date, baseline, selected_projects)
+    elif active_tab == "Time analysis":
         show_time_analysis(df, start_date, end_date)
-
-    with tab3:
+    elif active_tab == "Project details":
         show_project_details(df, start_date, end_date)
-
-    with tab4:
+    else:
         show_raw_data(df)
 
+    show_debug_panel(rerun_started)
 
+
+@timed_section("Overview")
 def show_overview(df, start_date, end_date):
     st.header("Overview")
 
+    # Накопительная статистика по всей истории, не зависит от выбранного периода
+    stats = db.get_running_stats()
+    if stats["stale"]:
+        st.caption("Streaks and goal days were computed with different goal settings; the collector will rebuild them")
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Current streak", f"{stats['current_streak']} d", help=f"Longest: {stats['longest_streak']} days")
+    col2.metric("7-day average", format_metric_value(stats["rolling_7_avg_seconds"]))
+    col3.metric("30-day average", format_metric_value(stats["rolling_30_avg_seconds"]))
+    col4.metric("Best day", format_metric_value(stats["best_day_seconds"]), help=stats["best_day_date"])
+    col5.metric(
+        "Goal days",
+        f"{stats['goal_days']}/{stats['active_days']}",
+        help=f"Daily goal {format_metric_value(stats['goal_seconds'])}, met on {stats['goal_rate']:.0%} of active days",
+    )
+
     # Ключевые метрики
     col1, col2, col3, col4 = st.columns(4)
 
@@ -132,12 +239,12 @@ def show_overview(df, start_date, end_date):
 
     # Топ проектов по времени
     st.subheader("Top projects by time")
-    project_totals = df.groupby("project_name")["total_seconds"].sum().sort_values(ascending=False)
+    project_totals = df.groupby("project_name", observed=True)["total_seconds"].sum().sort_values(ascending=False)
 
     # Создаем DataFrame для графика с отформатированными метками
     plot_data = pd.DataFrame(
         {
-            "project": project_totals.index,
+            "project": project_totals.index.astype(str),
             "seconds": project_totals.values,
             "time_display": [seconds_to_hms(sec) for sec in project_totals.values],
         }
@@ -169,20 +276,12 @@ def show_overview(df, start_date, end_date):
 
     # Распределение времени по дням недели
     st.subheader("Time distribution by day of week")
-    df_copy = df.copy()
-    df_copy["date"] = pd.to_datetime(df_copy["date"])
-    df_copy["day_of_week"] = df_copy["date"].dt.day_name()
-
-    day_totals = (
-        df_copy.groupby("day_of_week")["total_seconds"]
-        .sum()
-        .reindex(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
-    )
+    day_totals = df.groupby("weekday", observed=False)["total_seconds"].sum()
 
     # Создаем данные для графика с отформатированными метками
     day_plot_data = pd.DataFrame(
         {
-            "day": day_totals.index,
+            "day": day_totals.index.astype(str),
             "seconds": day_totals.values,
             "time_display": [seconds_to_hms(sec) for sec in day_totals.values],
         }
@@ -206,23 +305,89 @@ def show_overview(df, start_date, end_date):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@timed_section("Comparison")
+def show_comparison(start_date, end_date, baseline, selected_projects):
+    comparison = db.get_period_comparison(
+        start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"), baseline, selected_projects or None
+    )
+    current, previous = comparison["current"], comparison["previous"]
+
+    st.header("Period comparison")
+    st.caption(f"{current['start']} – {current['end']} vs {previous['start']} – {previous['end']}")
+
+    col1, col2, col3 = st.columns(3)
+    delta_pct = comparison["delta_pct"]
+    col1.metric(
+        "Current period",
+        format_metric_value(current["total_seconds"]),
+        delta=f"{delta_pct:+.0f}%" if delta_pct is not None else None,
+    )
+    col2.metric("Baseline period", format_metric_value(previous["total_seconds"]))
+    sign = "+" if comparison["delta_seconds"] >= 0 else "-"
+    col3.metric("Change", f"{sign}{format_metric_value(abs(comparison['delta_seconds']))}")
+
+    # Ряды выровнены по номеру дня внутри периода
+    daily = pd.DataFrame(comparison["daily"])
+    scatter = go.Scattergl if use_webgl(len(daily), load_config().dashboard) else go.Scatter
+    fig = go.Figure()
+    for period, label in (("previous", "Baseline"), ("current", "Current")):
+        fig.add_trace(
+            scatter(
+                x=daily["offset"] + 1,
+                y=daily[f"{period}_seconds"],
+                name=label,
+                mode="lines",
+                customdata=list(zip(daily[f"{period}_date"], daily[f"{period}_seconds"].apply(seconds_to_hms))),
+                hovertemplate=f"<b>{label}</b> %{{customdata[0]}}<br>Time: %{{customdata[1]}}<extra></extra>",
+            )
+        )
+    fig.update_layout(title="Daily activity by day of period", xaxis_title="Day of period", yaxis_title="Time")
+    fig.update_yaxes(tickvals=[3600, 7200, 10800, 14400, 18000], ticktext=["1h", "2h", "3h", "4h", "5h"])
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Изменение по проектам
+    projects = pd.DataFrame(comparison["projects"])
+    if projects.empty:
+        return
+    projects["change"] = projects["delta_seconds"].apply(lambda seconds: "Increase" if seconds >= 0 else "Decrease")
+    projects["time_display"] = projects["delta_seconds"].apply(lambda seconds: seconds_to_hms(abs(seconds)))
+    fig = px.bar(
+        projects.sort_values("delta_seconds"),
+        x="delta_seconds",
+        y="project_name",
+        color="change",
+        orientation="h",
+        title="Change by project",
+        labels={"delta_seconds": "Change", "project_name": "Project"},
+        custom_data=["time_display"],
+        color_discrete_map={"Increase": "#2ca02c", "Decrease": "#d62728"},
+    )
+    fig.update_traces(hovertemplate="<b>%{y}</b><br>Change: %{customdata[0]}<extra></extra>")
+    st.plotly_chart(fig, use_container_width=True)
+
+
+@timed_section("Time analysis")
 def show_time_analysis(df, start_date, end_date):
     st.header("Time analysis")
 
-    # Ежедневная активность
+    settings = load_config().dashboard
+    resolution = choose_resolution(start_date, end_date, settings)
+
+    # Активность с шагом, зависящим от длины диапазона
     daily_totals = df.groupby("date")["total_seconds"].sum().reset_index()
-    daily_totals["date"] = pd.to_datetime(daily_totals["date"])
+    activity = resample_totals(daily_totals, resolution)
 
     # Добавляем отформатированное время для tooltip
-    daily_totals["time_display"] = daily_totals["total_seconds"].apply(seconds_to_hms)
+    activity["time_display"] = activity["total_seconds"].apply(seconds_to_hms)
 
     fig = px.line(
-        daily_totals,
+        activity,
         x="date",
         y="total_seconds",
-        title="Daily coding activity",
+        title=f"{RESOLUTION_LABELS[resolution]} coding activity",
         labels={"total_seconds": "Time", "date": "Date"},
         custom_data=["time_display"],
+        render_mode="webgl" if use_webgl(len(activity), settings) else "svg",
     )
 
     fig.update_traces(hovertemplate="<b>%{x}</b><br>Time: %{customdata[0]}<extra></extra>", mode="lines+markers")
@@ -239,57 +404,57 @@ def show_time_analysis(df, start_date, end_date):
     # Heatmap по дням недели и неделям
     st.subheader("Activity heatmap")
 
-    df_copy = df.copy()
-    df_copy["date"] = pd.to_datetime(df_copy["date"])
-    df_copy["day_of_week"] = df_copy["date"].dt.day_name()
-    df_copy["week"] = df_copy["date"].dt.isocalendar().week
-    df_copy["year"] = df_copy["date"].dt.year
-
-    # Создаем полную сетку дат
-    all_dates = pd.date_range(start=start_date, end=end_date, freq="D")
-    all_days_df = pd.DataFrame(
-        {
-            "date": all_dates,
-            "day_of_week": all_dates.day_name(),
-            "week": all_dates.isocalendar().week,
-            "year": all_dates.year,
-        }
-    )
-
-    # Объединяем с данными
-    heatmap_data = all_days_df.merge(
-        df_copy.groupby("date")["total_seconds"].sum().reset_index(), on="date", how="left"
-    ).fillna(0)
-
-    # Создаем pivot таблицу для heatmap
-    pivot_data = heatmap_data.pivot_table(
-        index="day_of_week",
-        columns=heatmap_data["date"].dt.strftime("%Y-%m-%d"),
-        values="total_seconds",
-        aggfunc="sum",
-        fill_value=0,
-    )
-
-    days_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    pivot_data = pivot_data.reindex(days_order)
-
-    fig = px.imshow(
-        pivot_data,
-        title="Activity heatmap by day of week",
-        aspect="auto",
-        color_continuous_scale="Blues",
-        labels=dict(x="Date", y="Day of week", color="Time (seconds)"),
-    )
+    # Дневные суммы раскладываются в сетку напрямую; диапазоны длиннее года — отдельный календарь на год
+    dates = daily_totals["date"].to_numpy(dtype="datetime64[D]")
+    seconds = daily_totals["total_seconds"].to_numpy()
+    if (end_date - start_date).days < 366:
+        calendars = [build_calendar_matrix(dates, seconds, start_date, end_date)]
+    else:
+        calendars = build_yearly_calendars(dates, seconds, start_date, end_date)[::-1]
+
+    for calendar in calendars:
+        time_display = [[seconds_to_hms(value) for value in row] for row in calendar.values]
+        fig = go.Figure(
+            go.Heatmap(
+                z=calendar.values,
+                x=calendar.week_labels(),
+                y=DAYS_ORDER,
+                customdata=time_display,
+                coloraxis="coloraxis",
+                hoverongaps=False,
+                hovertemplate="<b>%{y}</b>, week of %{x}<br>Time: %{customdata}<extra></extra>",
+            )
+        )
 
-    # Форматируем цветовую шкалу
-    fig.update_coloraxes(colorbar=dict(tickvals=[0, 3600, 7200, 10800, 14400], ticktext=["0", "1h", "2h", "3h", "4h"]))
+        title = "Activity heatmap by day of week"
+        if len(calendars) > 1:
+            title = f"{title}, {calendar.year}"
+
+        # Форматируем цветовую шкалу
+        fig.update_layout(
+            title=title,
+            xaxis_title="Week",
+            yaxis=dict(title="Day of week", autorange="reversed"),
+            coloraxis=dict(
+                colorscale="Blues",
+                colorbar=dict(
+                    title="Time", tickvals=[0, 3600, 7200, 10800, 14400], ticktext=["0", "1h", "2h", "3h", "4h"]
+                ),
+            ),
+        )
 
-    st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True)
 
     # Тренды по неделям
     st.subheader("Weekly trends")
-    weekly_totals = df_copy.groupby(["year", "week"])["total_seconds"].sum().reset_index()
-    weekly_totals["week_label"] = weekly_totals["year"].astype(str) + "-W" + weekly_totals["week"].astype(str)
+    weekly_totals = df.groupby(["iso_year", "iso_week"])["total_seconds"].sum().reset_index()
+    weekly_totals["week_label"] = weekly_totals["iso_year"].astype(str) + "-W" + weekly_totals["iso_week"].astype(str)
+
+    # Слишком много недель — переходим на месяцы, чтобы ограничить размер графика
+    if len(weekly_totals) > settings.max_points_per_chart:
+        weekly_totals = resample_totals(daily_totals, "M")
+        weekly_totals["week_label"] = weekly_totals["date"].dt.strftime("%Y-%m")
+
     weekly_totals["time_display"] = weekly_totals["total_seconds"].apply(seconds_to_hms)
 
     fig = px.bar(
@@ -313,11 +478,13 @@ def show_time_analysis(df, start_date, end_date):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@st.fragment
+@timed_section("Project details")
 def show_project_details(df, start_date, end_date):
     st.header("Project details")
 
     # Выбор проекта для детального анализа
-    selected_project = st.selectbox("Select project", df["project_name"].unique())
+    selected_project = st.selectbox("Select project", df["project_name"].unique().tolist())
 
     if selected_project:
         project_data = df[df["project_name"] == selected_project]
@@ -337,17 +504,20 @@ def show_project_details(df, start_date, end_date):
 
         col1, col2 = st.columns(2)
 
+        settings = load_config().dashboard
+        resolution = choose_resolution(start_date, end_date, settings)
+
         with col1:
-            # Время по дням для выбранного проекта
+            # Время по дням (неделям, месяцам) для выбранного проекта
             project_daily = project_data.groupby("date")["total_seconds"].sum().reset_index()
-            project_daily["date"] = pd.to_datetime(project_daily["date"])
+            project_daily = resample_totals(project_daily, resolution)
             project_daily["time_display"] = project_daily["total_seconds"].apply(seconds_to_hms)
 
             fig = px.bar(
                 project_daily,
                 x="date",
                 y="total_seconds",
-                title=f"Daily activity for {selected_project}",
+                title=f"{RESOLUTION_LABELS[resolution]} activity for {selected_project}",
                 labels={"total_seconds": "Time", "date": "Date"},
                 custom_data=["time_display"],
             )
@@ -364,20 +534,12 @@ def show_project_details(df, start_date, end_date):
 
         with col2:
             # Распределение по дням недели для проекта
-            project_data_copy = project_data.copy()
-            project_data_copy["date"] = pd.to_datetime(project_data_copy["date"])
-            project_data_copy["day_of_week"] = project_data_copy["date"].dt.day_name()
-
-            day_distribution = (
-                project_data_copy.groupby("day_of_week")["total_seconds"]
-                .sum()
-                .reindex(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"], fill_value=0)
-            )
+            day_distribution = project_data.groupby("weekday", observed=False)["total_seconds"].sum()
 
             # Создаем данные для круговой диаграммы
             pie_data = pd.DataFrame(
                 {
-                    "day": day_distribution.index,
+                    "day": day_distribution.index.astype(str),
                     "seconds": day_distribution.values,
                     "time_display": [seconds_to_hms(sec) for sec in day_distribution.values],
                 }
@@ -400,9 +562,8 @@ def show_project_details(df, start_date, end_date):
 
         # Прогресс проекта во времени (кумулятивная сумма)
         st.subheader("Project progress over time")
-        project_data_sorted = project_data.sort_values("date")
+        project_data_sorted = project_daily.sort_values("date")
         project_data_sorted["cumulative_seconds"] = project_data_sorted["total_seconds"].cumsum()
-        project_data_sorted["date"] = pd.to_datetime(project_data_sorted["date"])
         project_data_sorted["cumulative_display"] = project_data_sorted["cumulative_seconds"].apply(seconds_to_hms)
 
         fig = px.line(
@@ -412,6 +573,7 @@ def show_project_details(df, start_date, end_date):
             title=f"Cumulative time spent on {selected_project}",
             labels={"cumulative_seconds": "Cumulative time", "date": "Date"},
             custom_data=["cumulative_display"],
+            render_mode="webgl" if use_webgl(len(project_data_sorted), settings) else "svg",
         )
 
         fig.update_traces(
@@ -425,21 +587,21 @@ def show_project_details(df, start_date, end_date):
         st.plotly_chart(fig, use_container_width=True)
 
 
+@st.fragment
+@timed_section("Raw data")
 def show_raw_data(df):
     st.header("Raw data")
 
-    # Показываем только основные колонки
-    display_columns = ["date", "project_name", "total_seconds", "digital_time", "text_time", "percent"]
-    display_df = df[display_columns].copy()
-
-    # Добавляем отформатированное время
-    display_df["time_formatted"] = display_df["total_seconds"].apply(seconds_to_hms)
-
-    # Переупорядочиваем колонки для лучшего отображения
-    display_df = display_df[
-        ["date", "project_name", "time_formatted", "total_seconds", "digital_time", "text_time", "percent"]
-    ]
-    display_df = display_df.rename(columns={"time_formatted": "time"})
+    # Таблица для отображения собирается из нужных колонок, исходный фрейм не меняется
+    display_df = pd.DataFrame(
+        {
+            "date": df["date"].dt.strftime("%Y-%m-%d"),
+            "project_name": df["project_name"],
+            "time": df["total_seconds"].apply(seconds_to_hms),
+            "total_seconds": df["total_seconds"],
+            "percent": df["percent"],
+        }
+    )
 
     st.dataframe(display_df.sort_values("date", ascending=False), use_container_width=True, hide_index=True)
 
@@ -448,5 +610,45 @@ def show_raw_data(df):
     st.download_button(label="Download data as CSV", data=csv, file_name="wakatime_data.csv", mime="text/csv")
 
 
+@st.cache_data(max_entries=32)
+def load_report(directory, period, generated_at):
+    # generated_at в ключе: перегенерированный отчёт читается заново
+    return read_report(directory, period)
+
+
+@timed_section("Reports")
+def show_reports():
+    st.header("Reports")
+
+    # Готовые отчёты генерируются после сбора, здесь только чтение файлов без запросов к базе
+    settings = load_config().reports
+    index = {entry["period"]: entry for entry in read_index(settings.directory)}
+    if not index:
+        st.info("No reports generated yet")
+        return
+
+    period = st.selectbox(
+        "Period",
+        sorted(index, reverse=True),
+        format_func=lambda value: f"{value} ({index[value]['kind']})",
+        key="report_period",
+    )
+    report = load_report(settings.directory, period, index[period]["generated_at"])
+    summary = report["summary"]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total time", format_metric_value(summary["total_seconds"]))
+    col2.metric("Active days", summary["active_days"])
+    col3.metric("Daily average", format_metric_value(summary["daily_average_seconds"]))
+    col4.metric("Best day", format_metric_value(summary["best_day_seconds"]), help=summary["best_day"])
+
+    if settings.base_url:
+        st.link_button("Open static report", f"{settings.base_url.rstrip('/')}/{period}.html")
+
+    for figure in report["figures"].values():
+        st.plotly_chart(go.Figure(figure), use_container_width=True)
+
+
 if __name__ == "__main__":
-    main()
+    with track_operation("dashboard_rerun"):
+        main()
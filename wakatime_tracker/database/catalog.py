@@ -0,0 +1,89 @@
+from datetime import datetime, UTC
+
+from sqlalchemy import case, delete, func, select, text
+from sqlalchemy.orm import Session
+
+from wakatime_tracker.database.engine import dialect_insert
+from wakatime_tracker.database.models import Project, ProjectSummary
+
+# Тот же запрос заполняет каталог в миграции 6d2f8e1a4c73
+REBUILD_CATALOG_SQL = text(
+    """
+    INSERT INTO projects (name, first_seen, last_seen, total_seconds, days_active, updated_at)
+    SELECT project_name, MIN(first_seen), MAX(last_seen), SUM(total_seconds), SUM(days_active), CURRENT_TIMESTAMP
+    FROM (
+        SELECT project_name, MIN(date) AS first_seen, MAX(date) AS last_seen,
+               SUM(total_seconds) AS total_seconds, COUNT(*) AS days_active
+        FROM project_summaries GROUP BY project_name
+        UNION ALL
+        SELECT project_name, MIN(month) || '-01', MAX(month) || '-01', SUM(total_seconds), SUM(days_active)
+        FROM project_monthly_summaries GROUP BY project_name
+    ) AS sources
+    GROUP BY project_name
+    """
+)
+
+
+def previous_totals(session: Session, date: str, names: list[str]) -> dict[str, float]:
+    """Время проектов за день до upsert: разница с новыми значениями идёт в каталог"""
+
+    rows = session.execute(
+        select(ProjectSummary.project_name, ProjectSummary.total_seconds).where(
+            ProjectSummary.date == date, ProjectSummary.project_name.in_(names)
+        )
+    )
+    return {name: total_seconds for name, total_seconds in rows}
+
+
+def update_catalog(session: Session, date: str, values: list[dict], previous: dict[str, float]) -> None:
+    """Обновление каталога по записям проектов за день: одна upsert-строка на проект"""
+
+    rows = [
+        {
+            "name": value["project_name"],
+            "first_seen": date,
+            "last_seen": date,
+            "total_seconds": value["total_seconds"] - previous.get(value["project_name"], 0.0),
+            "days_active": 0 if value["project_name"] in previous else 1,
+            "updated_at": datetime.now(UTC).replace(tzinfo=None),
+        }
+        for value in values
+    ]
+    insert_stmt = dialect_insert(session.get_bind(), Project).values(rows)
+    excluded = insert_stmt.excluded
+    session.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=[Project.name],
+            set_={
+                "first_seen": case(
+                    (excluded.first_seen < Project.first_seen, excluded.first_seen), else_=Project.first_seen
+                ),
+                "last_seen": case(
+                    (excluded.last_seen > Project.last_seen, excluded.last_seen), else_=Project.last_seen
+                ),
+                "total_seconds": Project.total_seconds + excluded.total_seconds,
+                "days_active": Project.days_active + excluded.days_active,
+                "updated_at": excluded.updated_at,
+            },
+        )
+    )
+
+
+def rebuild_catalog(session: Session) -> None:
+    """Полный пересчёт каталога по дневным записям и помесячным агрегатам сжатых лет"""
+
+    session.execute(delete(Project))
+    session.execute(REBUILD_CATALOG_SQL)
+
+
+def prefix_filter(session: Session, prefix: str):
+    """Условие поиска по префиксу имени без учёта регистра, использующее индекс на lower(name)"""
+
+    prefix = prefix.lower()
+    if session.get_bind().dialect.name == "postgresql":
+        # LIKE с постоянным префиксом использует индекс varchar_pattern_ops
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return func.lower(Project.name).like(f"{escaped}%", escape="\\")
+    # SQLite не применяет индекс выражения к LIKE, поэтому префикс задаётся диапазоном
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (func.lower(Project.name) >= prefix) & (func.lower(Project.name) < upper)
@@ -0,0 +1,119 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, func, literal, or_, select, Select, union_all
+
+from wakatime_tracker.database.models import ProjectSummary
+
+BASELINES = ("previous", "year")
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def shift_year(day: date) -> date:
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:
+        # 29 февраля -> 28 февраля прошлого года
+        return day.replace(year=day.year - 1, day=28)
+
+
+def baseline_period(start: date, end: date, baseline: str) -> tuple[date, date]:
+    """Период для сравнения: предыдущий такой же длины или тот же период год назад"""
+
+    if baseline == "previous":
+        length = (end - start).days + 1
+        return start - timedelta(days=length), start - timedelta(days=1)
+    if baseline == "year":
+        return shift_year(start), shift_year(end)
+    raise ValueError(f"Unknown baseline: {baseline}, expected one of {BASELINES}")
+
+
+def comparison_query(current: tuple[str, str], previous: tuple[str, str], projects: list[str] | None = None) -> Select:
+    """Один запрос: строки обоих периодов читаются один раз, ветки по проектам и по дням объединяются,
+    итоги периодов считаются оконной функцией по каждой ветке"""
+
+    # Периоды могут пересекаться (базовый год назад при диапазоне длиннее года): строка из пересечения
+    # учитывается в обоих периодах, поэтому у каждого столбца своё условие
+    in_current = ProjectSummary.date.between(*current)
+    in_previous = ProjectSummary.date.between(*previous)
+    rows = select(
+        ProjectSummary.date,
+        ProjectSummary.project_name,
+        case((in_current, ProjectSummary.total_seconds), else_=0).label("current_seconds"),
+        case((in_previous, ProjectSummary.total_seconds), else_=0).label("previous_seconds"),
+    ).where(or_(in_current, in_previous))
+    if projects:
+        rows = rows.where(ProjectSummary.project_name.in_(projects))
+    rows = rows.cte("period_rows")
+
+    def branch(kind: str, key):
+        return select(
+            literal(kind).label("kind"),
+            key.label("key"),
+            func.sum(rows.c.current_seconds).label("current_seconds"),
+            func.sum(rows.c.previous_seconds).label("previous_seconds"),
+        ).group_by(key)
+
+    branches = union_all(branch("project", rows.c.project_name), branch("day", rows.c.date)).cte("branches")
+    return select(
+        branches.c.kind,
+        branches.c.key,
+        branches.c.current_seconds,
+        branches.c.previous_seconds,
+        func.sum(branches.c.current_seconds).over(partition_by=branches.c.kind).label("current_total"),
+        func.sum(branches.c.previous_seconds).over(partition_by=branches.c.kind).label("previous_total"),
+    )
+
+
+def delta_pct(current: float, previous: float) -> float | None:
+    return (current - previous) / previous * 100 if previous else None
+
+
+def shape_comparison(rows, current: tuple[date, date], previous: tuple[date, date], baseline: str) -> dict:
+    """Итоги, изменения по проектам и выровненные по дню периода ряды"""
+
+    current_total = previous_total = 0.0
+    projects = []
+    current_by_day, previous_by_day = {}, {}
+    for kind, key, current_seconds, previous_seconds, kind_current_total, kind_previous_total in rows:
+        current_total, previous_total = kind_current_total, kind_previous_total
+        if kind == "project":
+            projects.append(
+                {
+                    "project_name": key,
+                    "current_seconds": current_seconds,
+                    "previous_seconds": previous_seconds,
+                    "delta_seconds": current_seconds - previous_seconds,
+                    "delta_pct": delta_pct(current_seconds, previous_seconds),
+                    "current_share": current_seconds / kind_current_total if kind_current_total else 0.0,
+                }
+            )
+        else:
+            current_by_day[key], previous_by_day[key] = current_seconds, previous_seconds
+
+    daily = []
+    for offset in range((current[1] - current[0]).days + 1):
+        current_day = (current[0] + timedelta(days=offset)).strftime("%Y-%m-%d")
+        previous_day = previous[0] + timedelta(days=offset)
+        previous_day = previous_day.strftime("%Y-%m-%d") if previous_day <= previous[1] else None
+        daily.append(
+            {
+                "offset": offset,
+                "current_date": current_day,
+                "current_seconds": current_by_day.get(current_day, 0.0),
+                "previous_date": previous_day,
+                "previous_seconds": previous_by_day.get(previous_day, 0.0),
+            }
+        )
+
+    return {
+        "baseline": baseline,
+        "current": {"start": str(current[0]), "end": str(current[1]), "total_seconds": current_total},
+        "previous": {"start": str(previous[0]), "end": str(previous[1]), "total_seconds": previous_total},
+        "delta_seconds": current_total - previous_total,
+        "delta_pct": delta_pct(current_total, previous_total),
+        "projects": sorted(projects, key=lambda project: project["current_seconds"], reverse=True),
+        "daily": daily,
+    }
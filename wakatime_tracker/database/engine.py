@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text, Engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import Insert
+
+from wakatime_tracker.config import DatabaseSettings
+from wakatime_tracker.database.instrumentation import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+_engines: dict[str, Engine] = {}
+_healthy_engines: set[str] = set()
+_lock = threading.Lock()
+
+
+def get_engine(settings: DatabaseSettings) -> Engine:
+    """Общий для процесса движок с пулом соединений; соединения открываются лениво"""
+
+    url = settings.url
+    engine = _engines.get(url)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = create_engine(
+                url,
+                pool_pre_ping=True,
+                pool_size=settings.pool_size,
+                max_overflow=settings.max_overflow,
+                pool_timeout=settings.pool_timeout,
+                pool_recycle=settings.pool_recycle,
+                query_cache_size=settings.statement_cache_size,
+                echo=False,
+            )
+            if settings.is_sqlite:
+                _configure_sqlite(engine, settings)
+            instrument_engine(engine, settings)
+            _engines[url] = engine
+            logger.info("Database engine created", extra={"pool_size": settings.pool_size})
+
+    return engine
+
+
+def _configure_sqlite(engine: Engine, settings: DatabaseSettings) -> None:
+    """WAL и прагмы SQLite для каждого нового соединения"""
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL позволяет дашборду читать, пока сборщик пишет
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def dialect_insert(engine: Engine, table) -> Insert:
+    """INSERT с поддержкой ON CONFLICT для диалекта движка (PostgreSQL или SQLite)"""
+
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+def ensure_connection(engine: Engine, settings: DatabaseSettings) -> None:
+    """Проверка доступности базы при первом обращении с экспоненциальной задержкой между попытками"""
+
+    key = str(engine.url)
+    if key in _healthy_engines:
+        return
+
+    delay = settings.connect_backoff
+    for attempt in range(settings.connect_retries):
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+            _healthy_engines.add(key)
+            logger.info("Database connection established")
+            return
+
+        except SQLAlchemyError as e:
+            logger.warning(f"Database connection attempt {attempt + 1} failed: {e}")
+            if attempt < settings.connect_retries - 1:
+                logger.info(f"Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
+                delay = min(delay * 2, settings.connect_backoff_max)
+            else:
+                logger.error("Failed to establish database connection after all retries")
+                raise
+
+
+def dispose_engines() -> None:
+    """Закрытие всех пулов соединений процесса"""
+
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _healthy_engines.clear()
@@ -0,0 +1,156 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Generator
+
+from sqlalchemy import Engine, event
+
+from wakatime_tracker.config import DatabaseSettings
+
+logger = logging.getLogger(__name__)
+
+_QUERY_START_KEY = "query_start_time"
+
+
+@dataclass
+class OperationStats:
+    """Статистика запросов в рамках одной логической операции"""
+
+    name: str
+    query_count: int = 0
+    total_duration: float = 0.0
+    slow_query_count: int = 0
+    statements: Counter = field(default_factory=Counter)
+
+
+_current_operation: ContextVar[OperationStats | None] = ContextVar("db_operation", default=None)
+_settings: DatabaseSettings | None = None
+
+
+def current_operation() -> OperationStats | None:
+    return _current_operation.get()
+
+
+@contextmanager
+def track_operation(name: str) -> Generator[OperationStats, None, None]:
+    """Подсчёт запросов и их суммарного времени для логической операции (перезапуск дашборда, задача сбора)"""
+
+    stats = OperationStats(name=name)
+    token = _current_operation.set(stats)
+    started = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        _current_operation.reset(token)
+        _log_operation(stats, time.perf_counter() - started)
+
+
+def _log_operation(stats: OperationStats, elapsed: float) -> None:
+    settings = _settings
+    extra = {
+        "operation": stats.name,
+        "query_count": stats.query_count,
+        "db_time_ms": round(stats.total_duration * 1000, 2),
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "slow_queries": stats.slow_query_count,
+    }
+    if not stats.statements:
+        logger.debug("Database operation finished", extra=extra)
+        return
+
+    statement, repeats = stats.statements.most_common(1)[0]
+    if settings is not None and repeats >= settings.repeated_query_threshold:
+        # Один и тот же запрос много раз за операцию — типичный признак N+1
+        logger.warning("Repeated query detected", extra={**extra, "statement": statement, "statement_repeats": repeats})
+    else:
+        logger.info("Database operation finished", extra=extra)
+
+
+def instrument_engine(engine: Engine, settings: DatabaseSettings) -> None:
+    """Подключение обработчиков событий движка для замера времени запросов"""
+
+    global _settings
+    _settings = settings
+
+    if not settings.instrument_queries:
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Время начала привязано к контексту выполнения, а не к порядку вызовов: ошибка может прийти
+    # и после after_cursor_execute (при чтении результата), когда запись уже снята
+    conn.info.setdefault(_QUERY_START_KEY, {})[context] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get(_QUERY_START_KEY, {}).pop(context, None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+
+    stats = _current_operation.get()
+    if stats is not None:
+        stats.query_count += 1
+        stats.total_duration += duration
+        stats.statements[statement] += 1
+
+    settings = _settings
+    if settings is None or duration * 1000 < settings.slow_query_threshold_ms:
+        return
+
+    if stats is not None:
+        stats.slow_query_count += 1
+
+    extra: dict[str, Any] = {
+        "statement": statement,
+        "parameters": parameters,
+        "duration_ms": round(duration * 1000, 2),
+        "executemany": executemany,
+        "operation": stats.name if stats is not None else None,
+    }
+    if settings.explain_slow_queries and not executemany:
+        extra["plan"] = _explain(conn, statement, parameters)
+
+    logger.warning("Slow query", extra=extra)
+
+
+def _handle_error(context) -> None:
+    # after_cursor_execute не вызывается для упавшего запроса: снимаем его время начала, иначе запись
+    # останется в info соединения из пула. Если ошибка пришла при чтении результата, записи уже нет
+    connection = context.connection
+    if connection is None:
+        return
+    starts = connection.info.get(_QUERY_START_KEY)
+    if starts:
+        starts.pop(context.execution_context, None)
+
+
+def _explain(conn, statement: str, parameters: Any) -> list[str] | None:
+    """EXPLAIN (ANALYZE, BUFFERS) для медленного SELECT-запроса"""
+
+    # ANALYZE выполняет запрос повторно, поэтому изменяющие запросы не трогаем
+    if conn.dialect.name != "postgresql" or not statement.lstrip().upper().startswith("SELECT"):
+        return None
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        # Точка сохранения не даёт ошибке EXPLAIN прервать текущую транзакцию
+        cursor.execute("SAVEPOINT explain_slow_query")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            plan = [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT explain_slow_query")
+            logger.debug("Failed to explain slow query: %s", e)
+            return None
+        cursor.execute("RELEASE SAVEPOINT explain_slow_query")
+        return plan
+    finally:
+        cursor.close()
@@ -2,48 +2,49 @@ from contextlib import contextmanager
 from datetime import datetime, UTC
 from typing import Generator
 
-from sqlalchemy import create_engine, func, Engine
+from sqlalchemy import func, Engine
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
-from wakatime_tracker.config import load_config
-from wakatime_tracker.database.models import ProjectSummary
+from wakatime_tracker.config import load_config, DatabaseSettings, StatsSettings
+from wakatime_tracker.database.catalog import prefix_filter, previous_totals, rebuild_catalog, update_catalog
+from wakatime_tracker.database.comparison import baseline_period, comparison_query, parse_date, shape_comparison
+from wakatime_tracker.database.engine import dialect_insert, ensure_connection, get_engine
+from wakatime_tracker.database.models import (
+    DataImport,
+    Heartbeat,
+    Project,
+    ProjectMonthlySummary,
+    ProjectSummary,
+    RunningStats,
+    UNKNOWN_PROJECT,
+)
+from wakatime_tracker.database.running_stats import (
+    compacted_through,
+    is_stale,
+    rebuild_daily_totals,
+    rebuild_running_stats,
+    STATE_ID,
+    summarize,
+    update_day,
+)
 import logging
-import time
 
 logger = logging.getLogger(__name__)
 
+# Строк в одном INSERT при пакетной записи: 7 параметров на строку, предел PostgreSQL — 65535
+SUMMARY_BATCH_SIZE = 1000
 
-class DatabaseManager:
-    def __init__(self):
-        self.config = load_config()
-        self.engine: Engine | None = None
-        self.session_pool: sessionmaker[Session] | None = None
-        self._init_engine()
-
-    def _init_engine(self):
-        max_retries = 5
-        retry_delay = 5
-
-        for attempt in range(max_retries):
-            try:
-                self.engine = create_engine(self.config.database.url, pool_pre_ping=True, echo=False)
-                self.session_pool = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
-                logger.info("Database connection established")
-                break
-
-            except SQLAlchemyError as e:
-                logger.warning(f"Database connection attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    logger.info(f"Retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
-                else:
-                    logger.error("Failed to establish database connection after all retries")
-                    raise
+class DatabaseManager:
+    def __init__(self, settings: DatabaseSettings | None = None, stats_settings: StatsSettings | None = None):
+        self.settings = settings or load_config().database
+        self.stats_settings = stats_settings or load_config().stats
+        self.engine: Engine = get_engine(self.settings)
+        self.session_pool: sessionmaker[Session] = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
     @contextmanager
     def get_session(self) -> Generator[Session, Session, None]:
+        ensure_connection(self.engine, self.settings)
         with self.session_pool() as session:
             yield session
 
@@ -57,68 +58,177 @@ class DatabaseManager:
     def save_project_data(self, date: str, project_data: dict):
         """Сохранение данных проекта с обновлением при существовании"""
 
-        with self.get_session() as session:
-            try:
-                # Проверяем, существует ли уже запись
-                existing = (
-                    session.query(ProjectSummary)
-                    .filter(ProjectSummary.date == date, ProjectSummary.project_name == project_data["name"])
-                    .first()
-                )
+        self.save_projects(date, [project_data])
 
-                if existing:
-                    # Обновляем существующую запись
-                    existing.total_seconds = project_data["total_seconds"]
-                    existing.digital_time = project_data.get("digital", "")
-                    existing.text_time = project_data.get("text", "")
-                    existing.percent = project_data.get("percent", 0)
-                    existing.updated_at = datetime.now(UTC)
-
-                    logger.debug(f"Updated data for project {project_data['name']} on {date}")
-                else:
-                    # Создаем новую запись
-                    project = ProjectSummary(
-                        date=date,
-                        project_name=project_data["name"],
-                        total_seconds=project_data["total_seconds"],
-                        digital_time=project_data.get("digital", ""),
-                        text_time=project_data.get("text", ""),
-                        percent=project_data.get("percent", 0),
-                    )
-                    session.add(project)
-                    logger.debug(f"Saved new data for project {project_data['name']} on {date}")
+    def save_projects(self, date: str, projects: list[dict]):
+        """Сохранение данных всех проектов за день одним запросом"""
 
-                session.commit()
+        if not projects:
+            return
 
-            except IntegrityError:
-                self._update_existing(session, date, project_data)
+        with self.get_session() as session:
+            try:
+                self._upsert_projects(session, date, projects)
+                session.commit()
             except Exception as e:
                 logger.error(f"Error saving project data: {e}")
                 raise
 
     @staticmethod
-    def _update_existing(session: Session, date: str, project_data: dict):
-        """Обновление существующей записи при IntegrityError"""
-
-        try:
-            existing = (
-                session.query(ProjectSummary)
-                .filter(ProjectSummary.date == date, ProjectSummary.project_name == project_data["name"])
-                .with_for_update()
-                .first()
+    def _summary_values(date: str, projects: list[dict]) -> list[dict]:
+        values = [
+            {
+                "date": date,
+                "project_name": project_data["name"],
+                "total_seconds": project_data["total_seconds"],
+                "digital_time": project_data.get("digital", ""),
+                "text_time": project_data.get("text", ""),
+                "percent": project_data.get("percent", 0),
+            }
+            for project_data in projects
+        ]
+        # Дубликаты проекта в одном INSERT ... ON CONFLICT DO UPDATE недопустимы, оставляем последнюю запись
+        return list({value["project_name"]: value for value in values}.values())
+
+    def _upsert_summaries(self, session: Session, values: list[dict]):
+        insert_stmt = dialect_insert(self.engine, ProjectSummary).values(values)
+        # Одна и та же семантика upsert для PostgreSQL и SQLite через ON CONFLICT
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[ProjectSummary.date, ProjectSummary.project_name],
+            set_={
+                "total_seconds": insert_stmt.excluded.total_seconds,
+                "digital_time": insert_stmt.excluded.digital_time,
+                "text_time": insert_stmt.excluded.text_time,
+                "percent": insert_stmt.excluded.percent,
+                "updated_at": datetime.now(UTC).replace(tzinfo=None),
+            },
+        )
+        session.execute(upsert_stmt)
+
+    def _upsert_projects(self, session: Session, date: str, projects: list[dict]):
+        """Upsert записей проектов за день в рамках переданной сессии"""
+
+        through = compacted_through(session)
+        if through is not None and date <= through:
+            # Секция сжатого года уже отсоединена: строка попала бы в секцию по умолчанию в обход агрегатов
+            logger.warning(f"Skipped {len(projects)} projects on {date}: year is compacted into monthly summaries")
+            return
+
+        values = self._summary_values(date, projects)
+        previous = previous_totals(session, date, [value["project_name"] for value in values])
+        self._upsert_summaries(session, values)
+        update_catalog(session, date, values, previous)
+        # Дневной итог и накопительная статистика фиксируются вместе с записями проектов
+        update_day(session, date, self.stats_settings)
+        logger.debug("Saved data for %s projects on %s", len(projects), date)
+
+    def save_project_summaries(self, by_date: dict[str, list[dict]]) -> int:
+        """Пакетная запись только в project_summaries, без каталога и статистики
+
+        Для массовой пересборки: производные таблицы затем пересчитываются один раз через rebuild_derived_tables.
+        """
+
+        with self.get_session() as session:
+            through = compacted_through(session)
+            skipped = {date for date in by_date if through is not None and date <= through}
+            if skipped:
+                logger.warning(
+                    f"Skipped {len(skipped)} days {min(skipped)}..{max(skipped)}: "
+                    "years are compacted into monthly summaries"
+                )
+            values = [
+                value
+                for date, projects in by_date.items()
+                if date not in skipped
+                for value in self._summary_values(date, projects)
+            ]
+            for offset in range(0, len(values), SUMMARY_BATCH_SIZE):
+                end = offset + SUMMARY_BATCH_SIZE
+                self._upsert_summaries(session, values[offset:end])
+            session.commit()
+        return len(values)
+
+    def rebuild_derived_tables(self, dates: list[str] | None = None) -> dict:
+        """Пересчёт дневных итогов за dates (за все даты при None), каталога и накопительной статистики"""
+
+        with self.get_session() as session:
+            rebuild_daily_totals(session, dates)
+            rebuild_catalog(session)
+            state = rebuild_running_stats(session, self.stats_settings)
+            session.commit()
+            return summarize(state, datetime.now().strftime("%Y-%m-%d"))
+
+    def save_heartbeats(self, heartbeats: list[dict]) -> int:
+        """Запись пачки heartbeat одним запросом; уже сохранённые (time, entity) пропускаются"""
+
+        if not heartbeats:
+            return 0
+
+        stmt = (
+            dialect_insert(self.engine, Heartbeat)
+            .values(heartbeats)
+            .on_conflict_do_nothing(index_elements=[Heartbeat.time, Heartbeat.entity])
+        )
+        with self.get_session() as session:
+            result = session.execute(stmt)
+            session.commit()
+        return result.rowcount
+
+    def get_heartbeat_rows(self, start_date: str, end_date: str) -> list[tuple]:
+        """(date, project, time) heartbeat за период, упорядоченные по дню, проекту и времени;
+        heartbeat без проекта относятся к UNKNOWN_PROJECT"""
+
+        project = func.coalesce(Heartbeat.project, UNKNOWN_PROJECT)
+        with self.get_session() as session:
+            return (
+                session.query(Heartbeat.date, project, Heartbeat.time)
+                .filter(Heartbeat.date >= start_date, Heartbeat.date <= end_date)
+                .order_by(Heartbeat.date, project, Heartbeat.time)
+                .all()
             )
 
-            if existing:
-                existing.total_seconds = project_data["total_seconds"]
-                existing.digital_time = project_data.get("digital", "")
-                existing.text_time = project_data.get("text", "")
-                existing.percent = project_data.get("percent", 0)
-                existing.updated_at = datetime.now(UTC)
+    def get_import(self, content_hash: str) -> dict | None:
+        """Получение записи об импорте файла по хэшу содержимого"""
 
+        with self.get_session() as session:
+            record = session.query(DataImport).filter(DataImport.content_hash == content_hash).first()
+            return record.to_dict() if record else None
+
+    def start_import(self, content_hash: str, file_path: str, total_days: int):
+        """Регистрация нового импорта файла"""
+
+        with self.get_session() as session:
+            session.add(DataImport(content_hash=content_hash, file_path=file_path, total_days=total_days))
+            session.commit()
+
+    def save_import_day(self, content_hash: str, date: str, projects: list[dict], error_count: int = 0):
+        """Сохранение проектов за день и контрольной точки импорта в одной транзакции"""
+
+        with self.get_session() as session:
+            try:
+                if projects:
+                    self._upsert_projects(session, date, projects)
+                session.query(DataImport).filter(DataImport.content_hash == content_hash).update(
+                    {
+                        DataImport.last_committed_date: date,
+                        DataImport.imported_count: DataImport.imported_count + len(projects),
+                        DataImport.error_count: DataImport.error_count + error_count,
+                        DataImport.updated_at: datetime.now(UTC).replace(tzinfo=None),
+                    }
+                )
+                session.commit()
+            except Exception as e:
+                logger.error(f"Error saving import checkpoint for {date}: {e}")
+                raise
+
+    def complete_import(self, content_hash: str):
+        """Отметка импорта как завершённого"""
+
+        with self.get_session() as session:
+            session.query(DataImport).filter(DataImport.content_hash == content_hash).update(
+                {DataImport.status: "completed", DataImport.updated_at: datetime.now(UTC).replace(tzinfo=None)}
+            )
             session.commit()
-        except Exception as e:
-            logger.error(f"Error in update retry: {e}")
-            raise
 
     def get_project_stats(self, start_date: str, end_date: str, project_name: str = None):
         """Получение статистики по проектам за период"""
@@ -133,13 +243,68 @@ class DatabaseManager:
 
             return [item.to_dict() for item in query.order_by(ProjectSummary.date.desc()).all()]
 
+    def get_project_rows_updated_after(
+        self, start_date: str, end_date: str, updated_after: datetime | None = None
+    ) -> list[tuple]:
+        """Записи за период, изменённые после updated_after (все при None), вместе с updated_at"""
+
+        with self.get_session() as session:
+            query = session.query(
+                ProjectSummary.date,
+                ProjectSummary.project_name,
+                ProjectSummary.total_seconds,
+                ProjectSummary.percent,
+                ProjectSummary.updated_at,
+            ).filter(ProjectSummary.date >= start_date, ProjectSummary.date <= end_date)
+            if updated_after is not None:
+                query = query.filter(ProjectSummary.updated_at > updated_after)
+            return query.all()
+
+    def count_project_rows(self, start_date: str, end_date: str) -> int:
+        with self.get_session() as session:
+            return (
+                session.query(func.count(ProjectSummary.id))
+                .filter(ProjectSummary.date >= start_date, ProjectSummary.date <= end_date)
+                .scalar()
+            )
+
     def get_unique_projects(self):
         """Получение списка уникальных проектов"""
 
         with self.get_session() as session:
-            projects = session.query(ProjectSummary.project_name).distinct().all()
+            projects = session.query(Project.name).all()
+            return [p[0] for p in projects]
+
+    def get_recent_projects(self, limit: int = 50) -> list[str]:
+        """Последние активные проекты по индексу last_seen"""
+
+        with self.get_session() as session:
+            projects = session.query(Project.name).order_by(Project.last_seen.desc(), Project.name).limit(limit).all()
             return [p[0] for p in projects]
 
+    def search_projects(self, prefix: str, limit: int = 50) -> list[str]:
+        """Поиск проектов по началу имени без учёта регистра"""
+
+        if not prefix:
+            return self.get_recent_projects(limit)
+
+        with self.get_session() as session:
+            projects = (
+                session.query(Project.name)
+                .filter(prefix_filter(session, prefix))
+                .order_by(func.lower(Project.name))
+                .limit(limit)
+                .all()
+            )
+            return [p[0] for p in projects]
+
+    def get_project_catalog(self, limit: int = 50) -> list[dict]:
+        """Каталог последних активных проектов со сроками и суммарным временем"""
+
+        with self.get_session() as session:
+            projects = session.query(Project).order_by(Project.last_seen.desc(), Project.name).limit(limit).all()
+            return [project.to_dict() for project in projects]
+
     def get_daily_totals(self, start_date: str, end_date: str):
         """Получение ежедневных итогов"""
 
@@ -153,3 +318,121 @@ class DatabaseManager:
             )
 
             return [{"date": r[0], "total_seconds": r[1]} for r in result]
+
+    def get_project_totals(self, start_date: str, end_date: str):
+        """Получение суммарного времени по проектам за период"""
+
+        with self.get_session() as session:
+            result = (
+                session.query(
+                    ProjectSummary.project_name, func.sum(ProjectSummary.total_seconds).label("total_seconds")
+                )
+                .filter(ProjectSummary.date >= start_date, ProjectSummary.date <= end_date)
+                .group_by(ProjectSummary.project_name)
+                .order_by(func.sum(ProjectSummary.total_seconds).desc())
+                .all()
+            )
+
+            return [{"project_name": r[0], "total_seconds": r[1]} for r in result]
+
+    def get_monthly_project_totals(self, start_month: str, end_month: str) -> list[tuple]:
+        """(month, project_name, total_seconds, days_active) из помесячных агрегатов сжатых лет"""
+
+        with self.get_session() as session:
+            return (
+                session.query(
+                    ProjectMonthlySummary.month,
+                    ProjectMonthlySummary.project_name,
+                    ProjectMonthlySummary.total_seconds,
+                    ProjectMonthlySummary.days_active,
+                )
+                .filter(ProjectMonthlySummary.month >= start_month, ProjectMonthlySummary.month <= end_month)
+                .all()
+            )
+
+    def get_month_versions(self) -> dict[str, str]:
+        """Версия данных каждого месяца: меняется при вставке, обновлении или сжатии записей месяца"""
+
+        month = func.substr(ProjectSummary.date, 1, 7)
+        with self.get_session() as session:
+            daily = session.query(
+                month,
+                func.count(ProjectSummary.id),
+                func.sum(ProjectSummary.total_seconds),
+                func.max(ProjectSummary.updated_at),
+            ).group_by(month)
+            monthly = session.query(
+                ProjectMonthlySummary.month,
+                func.count(ProjectMonthlySummary.project_name),
+                func.sum(ProjectMonthlySummary.total_seconds),
+            ).group_by(ProjectMonthlySummary.month)
+
+            versions = {
+                row_month: f"{count}:{total:.3f}:{last_update.isoformat() if last_update else ''}"
+                for row_month, count, total, last_update in daily
+            }
+            for row_month, count, total in monthly:
+                versions[row_month] = f"{versions.get(row_month, '')}|monthly:{count}:{total:.3f}"
+            return versions
+
+    def get_period_comparison(
+        self, start_date: str, end_date: str, baseline: str = "previous", projects: list[str] | None = None
+    ) -> dict:
+        """Сравнение периода с предыдущим или с тем же периодом год назад одним запросом"""
+
+        current = parse_date(start_date), parse_date(end_date)
+        previous = baseline_period(*current, baseline)
+        query = comparison_query(
+            (start_date, end_date), tuple(day.strftime("%Y-%m-%d") for day in previous), projects=projects
+        )
+
+        with self.get_session() as session:
+            rows = session.execute(query).all()
+            return shape_comparison(rows, current, previous, baseline)
+
+    def get_date_range(self):
+        """Получение первой и последней даты, за которые есть данные"""
+
+        with self.get_session() as session:
+            first_date, last_date = session.query(func.min(ProjectSummary.date), func.max(ProjectSummary.date)).one()
+            return {"first_date": first_date, "last_date": last_date}
+
+    def get_running_stats(self) -> dict:
+        """Серии, скользящие средние, лучший день и выполнение цели без сканирования истории
+
+        Только чтение: stale=True, если состояние считалось с другими целью и порогом (или ещё не создано).
+        Пересчёт выполняет сборщик при записи или ensure_running_stats.
+        """
+
+        with self.get_session() as session:
+            state = session.get(RunningStats, STATE_ID)
+            stale = is_stale(state, self.stats_settings)
+            if state is None:
+                # Состояния ещё нет: считаем его в транзакции без фиксации
+                state = rebuild_running_stats(session, self.stats_settings)
+            return {**summarize(state, datetime.now().strftime("%Y-%m-%d")), "stale": stale}
+
+    def ensure_running_stats(self) -> bool:
+        """Пересчёт накопительной статистики, если она отсутствует или считалась с другими настройками"""
+
+        with self.get_session() as session:
+            if not is_stale(session.get(RunningStats, STATE_ID), self.stats_settings):
+                return False
+            rebuild_running_stats(session, self.stats_settings)
+            session.commit()
+            return True
+
+    def rebuild_running_stats(self) -> dict:
+        """Полный пересчёт накопительной статистики по дневным итогам"""
+
+        with self.get_session() as session:
+            state = rebuild_running_stats(session, self.stats_settings)
+            session.commit()
+            return summarize(state, datetime.now().strftime("%Y-%m-%d"))
+
+    def get_data_version(self) -> str:
+        """Версия данных: меняется при любой вставке или обновлении записей"""
+
+        with self.get_session() as session:
+            count, last_update = session.query(func.count(ProjectSummary.id), func.max(ProjectSummary.updated_at)).one()
+            return f"{count}:{last_update.isoformat() if last_update else ''}"
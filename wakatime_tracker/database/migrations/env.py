@@ -21,7 +21,11 @@ if not (full_url := config.get_main_option("sqlalchemy.url")):
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     context.configure(
-        url=full_url, target_metadata=target_metadata, literal_binds=True, dialect_opts={"paramstyle": "named"}
+        url=full_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=full_url.startswith("sqlite"),
     )
 
     with context.begin_transaction():
@@ -35,7 +39,10 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        # SQLite не поддерживает большинство ALTER TABLE, поэтому миграции выполняются в batch-режиме
+        context.configure(
+            connection=connection, target_metadata=target_metadata, render_as_batch=connection.dialect.name == "sqlite"
+        )
 
         with context.begin_transaction():
             context.run_migrations()
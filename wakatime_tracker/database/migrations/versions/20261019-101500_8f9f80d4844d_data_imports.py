@@ -0,0 +1,43 @@
+"""Data imports registry
+
+Revision ID: 8f9f80d4844d
+Revises: a45cd7caca60
+Create Date: 2026-10-19 10:15:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8f9f80d4844d"
+down_revision: Union[str, Sequence[str], None] = "a45cd7caca60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "data_imports",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("file_path", sa.String(length=1024), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("last_committed_date", sa.String(length=10), nullable=True),
+        sa.Column("imported_count", sa.Integer(), nullable=False),
+        sa.Column("error_count", sa.Integer(), nullable=False),
+        sa.Column("total_days", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_data_imports_hash", "data_imports", ["content_hash"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_data_imports_hash", table_name="data_imports")
+    op.drop_table("data_imports")
@@ -0,0 +1,140 @@
+"""Partition project_summaries by year
+
+Revision ID: b370b35201d0
+Revises: 8f9f80d4844d
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b370b35201d0"
+down_revision: Union[str, Sequence[str], None] = "8f9f80d4844d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, date, project_name, total_seconds, digital_time, text_time, percent, created_at, updated_at"
+
+
+def create_monthly_summaries() -> None:
+    op.create_table(
+        "project_monthly_summaries",
+        sa.Column("month", sa.String(length=7), nullable=False),
+        sa.Column("project_name", sa.String(length=255), nullable=False),
+        sa.Column("total_seconds", sa.Float(), nullable=False),
+        sa.Column("days_active", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("month", "project_name"),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_monthly_summaries()
+
+    # Декларативное секционирование есть только в PostgreSQL
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE project_summaries RENAME TO project_summaries_legacy")
+    op.execute(
+        "ALTER TABLE project_summaries_legacy RENAME CONSTRAINT project_summaries_pkey TO project_summaries_legacy_pkey"
+    )
+    op.execute("ALTER INDEX idx_date RENAME TO idx_date_legacy")
+    op.execute("ALTER INDEX idx_date_project RENAME TO idx_date_project_legacy")
+    op.execute("ALTER INDEX idx_project RENAME TO idx_project_legacy")
+    # Последовательность переходит к новой таблице, иначе она будет удалена вместе со старой
+    op.execute("ALTER SEQUENCE project_summaries_id_seq OWNED BY NONE")
+
+    # Ключ секционирования обязан входить в первичный ключ и уникальные индексы
+    op.execute(
+        """
+        CREATE TABLE project_summaries (
+            id INTEGER NOT NULL DEFAULT nextval('project_summaries_id_seq'),
+            date VARCHAR(10) NOT NULL,
+            project_name VARCHAR(255) NOT NULL,
+            total_seconds FLOAT NOT NULL,
+            digital_time VARCHAR(20),
+            text_time VARCHAR(50),
+            percent FLOAT,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            updated_at TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT project_summaries_pkey PRIMARY KEY (id, date)
+        ) PARTITION BY RANGE (date)
+        """
+    )
+    op.execute("ALTER SEQUENCE project_summaries_id_seq OWNED BY project_summaries.id")
+    op.execute("CREATE TABLE project_summaries_default PARTITION OF project_summaries DEFAULT")
+
+    # Секции на все годы из существующих данных и на следующий год; остальное попадает в секцию по умолчанию
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            partition_year integer;
+            first_year integer;
+            current_year integer := EXTRACT(YEAR FROM now())::integer;
+        BEGIN
+            SELECT COALESCE(MIN(CAST(substr(date, 1, 4) AS integer)), current_year)
+            INTO first_year FROM project_summaries_legacy;
+
+            FOR partition_year IN first_year .. current_year + 1 LOOP
+                EXECUTE format(
+                    'CREATE TABLE project_summaries_y%s PARTITION OF project_summaries FOR VALUES FROM (%L) TO (%L)',
+                    partition_year, partition_year || '-01-01', (partition_year + 1) || '-01-01'
+                );
+            END LOOP;
+        END $$
+        """
+    )
+
+    op.create_index("idx_date", "project_summaries", ["date"], unique=False)
+    op.create_index("idx_date_project", "project_summaries", ["date", "project_name"], unique=True)
+    op.create_index("idx_project", "project_summaries", ["project_name"], unique=False)
+
+    op.execute(f"INSERT INTO project_summaries ({COLUMNS}) SELECT {COLUMNS} FROM project_summaries_legacy")
+    op.execute("DROP TABLE project_summaries_legacy")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("ALTER TABLE project_summaries RENAME TO project_summaries_partitioned")
+        op.execute("ALTER INDEX idx_date RENAME TO idx_date_partitioned")
+        op.execute("ALTER INDEX idx_date_project RENAME TO idx_date_project_partitioned")
+        op.execute("ALTER INDEX idx_project RENAME TO idx_project_partitioned")
+        op.execute(
+            "ALTER TABLE project_summaries_partitioned "
+            "RENAME CONSTRAINT project_summaries_pkey TO project_summaries_partitioned_pkey"
+        )
+        op.execute("ALTER SEQUENCE project_summaries_id_seq OWNED BY NONE")
+
+        op.execute(
+            """
+            CREATE TABLE project_summaries (
+                id INTEGER NOT NULL DEFAULT nextval('project_summaries_id_seq'),
+                date VARCHAR(10) NOT NULL,
+                project_name VARCHAR(255) NOT NULL,
+                total_seconds FLOAT NOT NULL,
+                digital_time VARCHAR(20),
+                text_time VARCHAR(50),
+                percent FLOAT,
+                created_at TIMESTAMP WITHOUT TIME ZONE,
+                updated_at TIMESTAMP WITHOUT TIME ZONE,
+                CONSTRAINT project_summaries_pkey PRIMARY KEY (id)
+            )
+            """
+        )
+        op.execute("ALTER SEQUENCE project_summaries_id_seq OWNED BY project_summaries.id")
+        op.execute(f"INSERT INTO project_summaries ({COLUMNS}) SELECT {COLUMNS} FROM project_summaries_partitioned")
+        op.execute("DROP TABLE project_summaries_partitioned CASCADE")
+
+        op.create_index("idx_date", "project_summaries", ["date"], unique=False)
+        op.create_index("idx_date_project", "project_summaries", ["date", "project_name"], unique=True)
+        op.create_index("idx_project", "project_summaries", ["project_name"], unique=False)
+
+    op.drop_table("project_monthly_summaries")
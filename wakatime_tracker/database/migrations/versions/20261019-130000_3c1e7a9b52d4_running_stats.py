@@ -0,0 +1,67 @@
+"""Daily totals and running stats
+
+Revision ID: 3c1e7a9b52d4
+Revises: b370b35201d0
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1e7a9b52d4"
+down_revision: Union[str, Sequence[str], None] = "b370b35201d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "daily_totals",
+        sa.Column("date", sa.String(length=10), nullable=False),
+        sa.Column("total_seconds", sa.Float(), nullable=False),
+        sa.Column("project_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("date"),
+    )
+    op.create_index("idx_daily_totals_seconds", "daily_totals", ["total_seconds"], unique=False)
+
+    op.create_table(
+        "running_stats",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("goal_seconds", sa.Float(), nullable=False),
+        sa.Column("active_min_seconds", sa.Float(), nullable=False),
+        sa.Column("total_seconds", sa.Float(), nullable=False),
+        sa.Column("active_days", sa.Integer(), nullable=False),
+        sa.Column("goal_days", sa.Integer(), nullable=False),
+        sa.Column("last_date", sa.String(length=10), nullable=True),
+        sa.Column("last_day_seconds", sa.Float(), nullable=False),
+        sa.Column("rolling_7_seconds", sa.Float(), nullable=False),
+        sa.Column("rolling_30_seconds", sa.Float(), nullable=False),
+        sa.Column("best_day_date", sa.String(length=10), nullable=True),
+        sa.Column("best_day_seconds", sa.Float(), nullable=False),
+        sa.Column("current_streak", sa.Integer(), nullable=False),
+        sa.Column("current_streak_start", sa.String(length=10), nullable=True),
+        sa.Column("current_streak_end", sa.String(length=10), nullable=True),
+        sa.Column("longest_streak", sa.Integer(), nullable=False),
+        sa.Column("longest_streak_start", sa.String(length=10), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # Дневные итоги по уже накопленным данным; running_stats пересчитывается при первой записи или запуске сборщика
+    op.execute(
+        "INSERT INTO daily_totals (date, total_seconds, project_count, updated_at) "
+        "SELECT date, SUM(total_seconds), COUNT(*), CURRENT_TIMESTAMP FROM project_summaries GROUP BY date"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("running_stats")
+    op.drop_index("idx_daily_totals_seconds", table_name="daily_totals")
+    op.drop_table("daily_totals")
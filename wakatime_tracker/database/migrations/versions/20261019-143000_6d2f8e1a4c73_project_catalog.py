@@ -0,0 +1,63 @@
+"""Project catalog
+
+Revision ID: 6d2f8e1a4c73
+Revises: 3c1e7a9b52d4
+Create Date: 2026-10-19 14:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "6d2f8e1a4c73"
+down_revision: Union[str, Sequence[str], None] = "3c1e7a9b52d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "projects",
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("first_seen", sa.String(length=10), nullable=False),
+        sa.Column("last_seen", sa.String(length=10), nullable=False),
+        sa.Column("total_seconds", sa.Float(), nullable=False),
+        sa.Column("days_active", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.create_index("idx_projects_last_seen", "projects", ["last_seen"], unique=False)
+
+    # varchar_pattern_ops позволяет использовать индекс для LIKE 'prefix%' при любой локали базы
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE INDEX idx_projects_name_prefix ON projects (lower(name) varchar_pattern_ops)")
+    else:
+        op.execute("CREATE INDEX idx_projects_name_prefix ON projects (lower(name))")
+
+    # Каталог по накопленным данным, включая годы, сжатые в помесячные агрегаты (с точностью до месяца)
+    op.execute(
+        """
+        INSERT INTO projects (name, first_seen, last_seen, total_seconds, days_active, updated_at)
+        SELECT project_name, MIN(first_seen), MAX(last_seen), SUM(total_seconds), SUM(days_active), CURRENT_TIMESTAMP
+        FROM (
+            SELECT project_name, MIN(date) AS first_seen, MAX(date) AS last_seen,
+                   SUM(total_seconds) AS total_seconds, COUNT(*) AS days_active
+            FROM project_summaries GROUP BY project_name
+            UNION ALL
+            SELECT project_name, MIN(month) || '-01', MAX(month) || '-01', SUM(total_seconds), SUM(days_active)
+            FROM project_monthly_summaries GROUP BY project_name
+        ) AS sources
+        GROUP BY project_name
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_projects_name_prefix", table_name="projects")
+    op.drop_index("idx_projects_last_seen", table_name="projects")
+    op.drop_table("projects")
@@ -0,0 +1,58 @@
+"""Covering and BRIN indexes for project_summaries
+
+Revision ID: 9a4b2c7e1f05
+Revises: 6d2f8e1a4c73
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4b2c7e1f05"
+down_revision: Union[str, Sequence[str], None] = "6d2f8e1a4c73"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+
+    if is_postgresql:
+        # Уникальный индекс пересоздаётся с INCLUDE: чтения по диапазону дат обходятся без обращения к таблице,
+        # а ON CONFLICT (date, project_name) продолжает на него опираться. Новый индекс строится до удаления старого
+        op.create_index(
+            "idx_date_project_covering",
+            "project_summaries",
+            ["date", "project_name"],
+            unique=True,
+            postgresql_include=["total_seconds", "percent"],
+        )
+        op.drop_index("idx_date_project", table_name="project_summaries")
+        op.execute("ALTER INDEX idx_date_project_covering RENAME TO idx_date_project")
+
+        # Даты записываются почти по порядку, BRIN занимает несколько страниц вместо B-дерева на каждую строку
+        op.create_index("idx_date_brin", "project_summaries", ["date"], postgresql_using="brin")
+
+    # idx_date дублирует префикс idx_date_project, idx_project поглощается idx_project_date
+    op.drop_index("idx_date", table_name="project_summaries")
+    op.drop_index("idx_project", table_name="project_summaries")
+    op.create_index(
+        "idx_project_date", "project_summaries", ["project_name", "date"], postgresql_include=["total_seconds"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_project_date", table_name="project_summaries")
+    op.create_index("idx_project", "project_summaries", ["project_name"], unique=False)
+    op.create_index("idx_date", "project_summaries", ["date"], unique=False)
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("idx_date_brin", table_name="project_summaries")
+        op.create_index("idx_date_project_plain", "project_summaries", ["date", "project_name"], unique=True)
+        op.drop_index("idx_date_project", table_name="project_summaries")
+        op.execute("ALTER INDEX idx_date_project_plain RENAME TO idx_date_project")
@@ -0,0 +1,48 @@
+"""Collection task queue
+
+Revision ID: e5b81c3d9a26
+Revises: 9a4b2c7e1f05
+Create Date: 2026-10-19 17:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b81c3d9a26"
+down_revision: Union[str, Sequence[str], None] = "9a4b2c7e1f05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "collection_tasks",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.String(length=64), nullable=False),
+        sa.Column("start_date", sa.String(length=10), nullable=False),
+        sa.Column("end_date", sa.String(length=10), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("available_at", sa.DateTime(), nullable=False),
+        sa.Column("lease_owner", sa.String(length=128), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_collection_tasks_unit", "collection_tasks", ["user_id", "start_date", "end_date"], unique=True)
+    op.create_index("idx_collection_tasks_claim", "collection_tasks", ["status", "available_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_collection_tasks_claim", table_name="collection_tasks")
+    op.drop_index("idx_collection_tasks_unit", table_name="collection_tasks")
+    op.drop_table("collection_tasks")
@@ -0,0 +1,48 @@
+"""Raw API response archive
+
+Revision ID: 1f7d3e5a8b94
+Revises: e5b81c3d9a26
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "1f7d3e5a8b94"
+down_revision: Union[str, Sequence[str], None] = "e5b81c3d9a26"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "raw_responses",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.String(length=64), nullable=False),
+        sa.Column("start_date", sa.String(length=10), nullable=False),
+        sa.Column("end_date", sa.String(length=10), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("compressed_size", sa.Integer(), nullable=False),
+        sa.Column("storage", sa.String(length=20), nullable=False),
+        sa.Column("path", sa.String(length=1024), nullable=True),
+        sa.Column("payload", sa.LargeBinary(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "idx_raw_responses_content", "raw_responses", ["user_id", "start_date", "end_date", "content_hash"], unique=True
+    )
+    op.create_index("idx_raw_responses_range", "raw_responses", ["start_date", "end_date", "fetched_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_raw_responses_range", table_name="raw_responses")
+    op.drop_index("idx_raw_responses_content", table_name="raw_responses")
+    op.drop_table("raw_responses")
@@ -0,0 +1,28 @@
+"""Index on project_summaries.updated_at
+
+Revision ID: 7b2e9c4d1a68
+Revises: 1f7d3e5a8b94
+Create Date: 2026-10-19 19:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7b2e9c4d1a68"
+down_revision: Union[str, Sequence[str], None] = "1f7d3e5a8b94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Дозагрузка изменений дашбордом: WHERE updated_at > watermark
+    op.create_index("idx_updated_at", "project_summaries", ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_updated_at", table_name="project_summaries")
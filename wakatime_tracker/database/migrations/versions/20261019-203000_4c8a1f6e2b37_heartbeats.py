@@ -0,0 +1,50 @@
+"""Heartbeats from editor plugins
+
+Revision ID: 4c8a1f6e2b37
+Revises: 7b2e9c4d1a68
+Create Date: 2026-10-19 20:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "4c8a1f6e2b37"
+down_revision: Union[str, Sequence[str], None] = "7b2e9c4d1a68"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "heartbeats",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("time", sa.Float(), nullable=False),
+        sa.Column("date", sa.String(length=10), nullable=False),
+        sa.Column("entity", sa.String(length=1024), nullable=False),
+        sa.Column("type", sa.String(length=20), nullable=False),
+        sa.Column("category", sa.String(length=50), nullable=True),
+        sa.Column("project", sa.String(length=255), nullable=True),
+        sa.Column("branch", sa.String(length=255), nullable=True),
+        sa.Column("language", sa.String(length=100), nullable=True),
+        sa.Column("is_write", sa.Boolean(), nullable=False),
+        sa.Column("lines", sa.Integer(), nullable=True),
+        sa.Column("lineno", sa.Integer(), nullable=True),
+        sa.Column("cursorpos", sa.Integer(), nullable=True),
+        sa.Column("user_agent", sa.String(length=512), nullable=True),
+        sa.Column("received_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_heartbeats_time_entity", "heartbeats", ["time", "entity"], unique=True)
+    op.create_index("idx_heartbeats_date_project", "heartbeats", ["date", "project"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_heartbeats_date_project", table_name="heartbeats")
+    op.drop_index("idx_heartbeats_time_entity", table_name="heartbeats")
+    op.drop_table("heartbeats")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Float, Integer, Index
+from sqlalchemy import Boolean, Column, String, DateTime, Float, func, Integer, Index, LargeBinary, Text
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -6,6 +6,7 @@ Base = declarative_base()
 
 
 class ProjectSummary(Base):
+    # В PostgreSQL таблица секционирована по годам (RANGE по date), первичный ключ в базе — (id, date)
     __tablename__ = "project_summaries"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -19,10 +20,12 @@ class ProjectSummary(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Покрывающие индексы (INCLUDE) и BRIN создаются только в PostgreSQL
     __table_args__ = (
-        Index("idx_date_project", "date", "project_name", unique=True),
-        Index("idx_date", "date"),
-        Index("idx_project", "project_name"),
+        Index("idx_date_project", "date", "project_name", unique=True, postgresql_include=["total_seconds", "percent"]),
+        Index("idx_project_date", "project_name", "date", postgresql_include=["total_seconds"]),
+        Index("idx_date_brin", "date", postgresql_using="brin").ddl_if(dialect="postgresql"),
+        Index("idx_updated_at", "updated_at"),
     )
 
     def to_dict(self):
@@ -36,3 +39,216 @@ class ProjectSummary(Base):
             "percent": self.percent,
             "created_at": self.created_at.isoformat(),
         }
+
+
+class DataImport(Base):
+    __tablename__ = "data_imports"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 содержимого файла
+    file_path = Column(String(1024))
+    status = Column(String(20), nullable=False, default="in_progress")  # in_progress | completed
+    last_committed_date = Column(String(10))  # YYYY-MM-DD, последний полностью сохранённый день
+    imported_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    total_days = Column(Integer)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (Index("idx_data_imports_hash", "content_hash", unique=True),)
+
+    def to_dict(self):
+        return {
+            "content_hash": self.content_hash,
+            "file_path": self.file_path,
+            "status": self.status,
+            "last_committed_date": self.last_committed_date,
+            "imported_count": self.imported_count,
+            "error_count": self.error_count,
+            "total_days": self.total_days,
+        }
+
+
+class ProjectMonthlySummary(Base):
+    """Помесячные агрегаты по проектам для годов, детальные строки которых удалены политикой хранения"""
+
+    __tablename__ = "project_monthly_summaries"
+
+    month = Column(String(7), primary_key=True)  # YYYY-MM
+    project_name = Column(String(255), primary_key=True)
+    total_seconds = Column(Float, nullable=False)
+    days_active = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Project(Base):
+    """Каталог проектов с первой и последней датой активности и суммарным временем, обновляется при записи"""
+
+    __tablename__ = "projects"
+
+    name = Column(String(255), primary_key=True)
+    first_seen = Column(String(10), nullable=False)  # YYYY-MM-DD
+    last_seen = Column(String(10), nullable=False)
+    total_seconds = Column(Float, nullable=False)
+    days_active = Column(Integer, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Поиск по префиксу: в PostgreSQL с классом операторов varchar_pattern_ops, как в миграции 6d2f8e1a4c73
+    __table_args__ = (
+        Index("idx_projects_last_seen", "last_seen"),
+        Index(
+            "idx_projects_name_prefix",
+            func.lower(name).label("name_lower"),
+            postgresql_ops={"name_lower": "varchar_pattern_ops"},
+        ),
+    )
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "total_seconds": self.total_seconds,
+            "days_active": self.days_active,
+        }
+
+
+class DailyTotal(Base):
+    """Суммарное время за день, обновляется вместе с записями проектов и переживает сжатие секций"""
+
+    __tablename__ = "daily_totals"
+
+    date = Column(String(10), primary_key=True)  # YYYY-MM-DD
+    total_seconds = Column(Float, nullable=False)
+    project_count = Column(Integer, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (Index("idx_daily_totals_seconds", "total_seconds"),)
+
+
+class RunningStats(Base):
+    """Накопительные агрегаты по дневным итогам, единственная строка с id = 1"""
+
+    __tablename__ = "running_stats"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    goal_seconds = Column(Float, nullable=False)  # цель и порог активного дня, с которыми считались агрегаты
+    active_min_seconds = Column(Float, nullable=False)
+
+    total_seconds = Column(Float, nullable=False, default=0)
+    active_days = Column(Integer, nullable=False, default=0)
+    goal_days = Column(Integer, nullable=False, default=0)
+
+    last_date = Column(String(10))
+    last_day_seconds = Column(Float, nullable=False, default=0)
+    rolling_7_seconds = Column(Float, nullable=False, default=0)  # сумма за 7 дней до last_date включительно
+    rolling_30_seconds = Column(Float, nullable=False, default=0)
+
+    best_day_date = Column(String(10))
+    best_day_seconds = Column(Float, nullable=False, default=0)
+
+    current_streak = Column(Integer, nullable=False, default=0)  # последняя серия активных дней
+    current_streak_start = Column(String(10))
+    current_streak_end = Column(String(10))
+    longest_streak = Column(Integer, nullable=False, default=0)
+    longest_streak_start = Column(String(10))
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CollectionTask(Base):
+    """Задача сбора данных пользователя за диапазон дат; забирается воркерами через SKIP LOCKED с арендой"""
+
+    __tablename__ = "collection_tasks"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(64), nullable=False)
+    start_date = Column(String(10), nullable=False)  # YYYY-MM-DD
+    end_date = Column(String(10), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending | running | done | dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    available_at = Column(DateTime, nullable=False)  # не раньше этого времени задачу можно забрать
+    lease_owner = Column(String(128))
+    lease_expires_at = Column(DateTime)
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_collection_tasks_unit", "user_id", "start_date", "end_date", unique=True),
+        Index("idx_collection_tasks_claim", "status", "available_at"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "lease_owner": self.lease_owner,
+            "last_error": self.last_error,
+        }
+
+
+class RawResponse(Base):
+    """Сжатый gzip ответ WakaTime API; содержимое хранится в payload или в файле path"""
+
+    __tablename__ = "raw_responses"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(64), nullable=False)
+    start_date = Column(String(10), nullable=False)  # YYYY-MM-DD
+    end_date = Column(String(10), nullable=False)
+    fetched_at = Column(DateTime, nullable=False)
+    content_hash = Column(String(64), nullable=False)  # sha256 несжатого ответа
+    size_bytes = Column(Integer, nullable=False)
+    compressed_size = Column(Integer, nullable=False)
+    storage = Column(String(20), nullable=False)  # database | disk
+    path = Column(String(1024))
+    payload = Column(LargeBinary)
+
+    __table_args__ = (
+        Index("idx_raw_responses_content", "user_id", "start_date", "end_date", "content_hash", unique=True),
+        Index("idx_raw_responses_range", "start_date", "end_date", "fetched_at"),
+    )
+
+
+# Так WakaTime называет время без проекта
+UNKNOWN_PROJECT = "Unknown Project"
+
+
+class Heartbeat(Base):
+    """Heartbeat плагина редактора в формате WakaTime, принятый локальным endpoint"""
+
+    __tablename__ = "heartbeats"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    time = Column(Float, nullable=False)  # unix timestamp из плагина
+    date = Column(String(10), nullable=False)  # YYYY-MM-DD по локальному времени сервера
+    entity = Column(String(1024), nullable=False)
+    type = Column(String(20), nullable=False)
+    category = Column(String(50))
+    project = Column(String(255))
+    branch = Column(String(255))
+    language = Column(String(100))
+    is_write = Column(Boolean, nullable=False, default=False)
+    lines = Column(Integer)
+    lineno = Column(Integer)
+    cursorpos = Column(Integer)
+    user_agent = Column(String(512))
+    received_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Повторная отправка плагином и воспроизведение журнала не создают дубликатов
+        Index("idx_heartbeats_time_entity", "time", "entity", unique=True),
+        Index("idx_heartbeats_date_project", "date", "project"),
+    )
@@ -0,0 +1,161 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from wakatime_tracker.database.manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "project_summaries"
+DEFAULT_PARTITION = "project_summaries_default"
+PARTITION_PREFIX = "project_summaries_y"
+ARCHIVE_PREFIX = "project_summaries_archive_"
+
+MONTHLY_SUMMARIES_SQL = (
+    "INSERT INTO project_monthly_summaries (month, project_name, total_seconds, days_active, created_at) "
+    "SELECT substr(date, 1, 7), project_name, SUM(total_seconds), COUNT(DISTINCT date), now() "
+    "FROM {source} GROUP BY substr(date, 1, 7), project_name"
+)
+
+
+def partition_name(year: int) -> str:
+    return f"{PARTITION_PREFIX}{year}"
+
+
+def year_bounds(year: int) -> tuple[str, str]:
+    return f"{year}-01-01", f"{year + 1}-01-01"
+
+
+def create_year_partition(session: Session, year: int) -> None:
+    """Создание секции за год; строки этого года, попавшие в секцию по умолчанию, переносятся в неё"""
+
+    lower, upper = year_bounds(year)
+
+    # Секцию нельзя создать, пока подходящие ей строки лежат в секции по умолчанию,
+    # поэтому она временно отсоединяется, а строки переносятся через родительскую таблицу
+    session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    session.execute(
+        text(
+            f"CREATE TABLE {partition_name(year)} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+    )
+    session.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= :lower AND date < :upper RETURNING *) "
+            f"INSERT INTO {PARENT_TABLE} SELECT * FROM moved"
+        ),
+        {"lower": lower, "upper": upper},
+    )
+    session.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+
+class PartitionManager:
+    """Обслуживание годовых секций project_summaries: создание будущих секций и политика хранения"""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self.settings = db_manager.settings
+
+    @property
+    def is_supported(self) -> bool:
+        return self.db.engine.dialect.name == "postgresql"
+
+    def get_partition_years(self, session: Session) -> set[int]:
+        rows = session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :parent"
+            ),
+            {"parent": PARENT_TABLE},
+        ).scalars()
+        return {int(name.removeprefix(PARTITION_PREFIX)) for name in rows if name.startswith(PARTITION_PREFIX)}
+
+    def ensure_partitions(self) -> list[int]:
+        """Создание секций на текущий и следующие годы, а также для лет, попавших в секцию по умолчанию"""
+
+        if not self.is_supported:
+            return []
+
+        current_year = datetime.now().year
+        wanted = set(range(current_year, current_year + self.settings.partition_years_ahead + 1))
+
+        with self.db.get_session() as session:
+            default_years = session.execute(
+                text(f"SELECT DISTINCT CAST(substr(date, 1, 4) AS integer) FROM {DEFAULT_PARTITION}")
+            ).scalars()
+            wanted.update(default_years)
+
+            missing = sorted(wanted - self.get_partition_years(session))
+            for year in missing:
+                create_year_partition(session, year)
+                logger.info(f"Created partition {partition_name(year)}")
+            session.commit()
+
+        return missing
+
+    def apply_retention(self) -> list[int]:
+        """Сжатие секций старше retention_years лет в помесячные агрегаты и удаление или архивация деталей"""
+
+        if not self.is_supported or self.settings.retention_years <= 0:
+            return []
+
+        cutoff_year = datetime.now().year - self.settings.retention_years
+        compacted = []
+
+        with self.db.get_session() as session:
+            for year in sorted(self.get_partition_years(session)):
+                if year > cutoff_year:
+                    continue
+
+                partition = partition_name(year)
+                archive = f"{ARCHIVE_PREFIX}{year}"
+                session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition}"))
+
+                if self.settings.retention_mode == "drop":
+                    # Детали прошлого сжатия не сохранились: поздние строки дополняют только отсутствующие агрегаты,
+                    # иначе уже учтённые дни посчитались бы дважды
+                    session.execute(
+                        text(
+                            MONTHLY_SUMMARIES_SQL.format(source=partition)
+                            + " ON CONFLICT (month, project_name) DO NOTHING"
+                        )
+                    )
+                    session.execute(text(f"DROP TABLE {partition}"))
+                else:
+                    if session.execute(text("SELECT to_regclass(:name)"), {"name": archive}).scalar() is None:
+                        session.execute(text(f"ALTER TABLE {partition} RENAME TO {archive}"))
+                    else:
+                        # Год сжимается повторно: поздние строки сливаются в существующий архив
+                        session.execute(
+                            text(
+                                f"INSERT INTO {archive} SELECT * FROM {partition} "
+                                "ON CONFLICT (date, project_name) DO UPDATE SET "
+                                "total_seconds = EXCLUDED.total_seconds, digital_time = EXCLUDED.digital_time, "
+                                "text_time = EXCLUDED.text_time, percent = EXCLUDED.percent, "
+                                "updated_at = EXCLUDED.updated_at"
+                            )
+                        )
+                        session.execute(text(f"DROP TABLE {partition}"))
+
+                    # Агрегаты года пересчитываются по полному архиву, а не прибавляются к прежним
+                    session.execute(
+                        text("DELETE FROM project_monthly_summaries WHERE month >= :first AND month <= :last"),
+                        {"first": f"{year}-01", "last": f"{year}-12"},
+                    )
+                    session.execute(text(MONTHLY_SUMMARIES_SQL.format(source=archive)))
+
+                # Агрегаты и отсоединение секции фиксируются вместе, чтобы данные не потерялись при сбое
+                session.commit()
+                compacted.append(year)
+                logger.info(f"Compacted partition {partition} into monthly summaries ({self.settings.retention_mode})")
+
+        return compacted
+
+    def maintain(self) -> None:
+        self.ensure_partitions()
+        self.apply_retention()
@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+
+from sqlalchemy import select
+
+from wakatime_tracker.config import ArchiveSettings
+from wakatime_tracker.database.engine import dialect_insert
+from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.database.models import RawResponse
+from wakatime_tracker.database.running_stats import compacted_through
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("database", "disk")
+
+
+def iter_dates(start_date: str, end_date: str):
+    day = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    while day <= end:
+        yield day.strftime("%Y-%m-%d")
+        day += timedelta(days=1)
+
+
+class RawArchive:
+    """Архив сырых ответов WakaTime API, сжатых gzip
+
+    Метаданные всегда пишутся в raw_responses, содержимое — в bytea payload или в файл под directory.
+    Повторно полученный идентичный ответ за тот же диапазон не сохраняется второй раз.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, settings: ArchiveSettings):
+        if settings.backend not in BACKENDS:
+            raise ValueError(f"Unknown archive backend: {settings.backend}, expected one of {BACKENDS}")
+        self.db = db_manager
+        self.settings = settings
+
+    def _write_file(self, user_id: str, start_date: str, end_date: str, content_hash: str, compressed: bytes) -> str:
+        """Атомарная запись файла: временный файл переименовывается только после полной записи"""
+
+        path = Path(self.settings.directory) / user_id / f"{start_date}_{end_date}_{content_hash[:16]}.json.gz"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return str(path)
+
+    def store(self, user_id: str, start_date: str, end_date: str, raw: bytes) -> bool:
+        """Сохранение ответа; False, если такой же ответ уже в архиве"""
+
+        if not self.settings.enabled:
+            return False
+
+        content_hash = hashlib.sha256(raw).hexdigest()
+        compressed = gzip.compress(raw, compresslevel=self.settings.compress_level)
+        path = None
+        if self.settings.backend == "disk":
+            path = self._write_file(user_id, start_date, end_date, content_hash, compressed)
+
+        row = {
+            "user_id": user_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "fetched_at": datetime.now(UTC).replace(tzinfo=None),
+            "content_hash": content_hash,
+            "size_bytes": len(raw),
+            "compressed_size": len(compressed),
+            "storage": self.settings.backend,
+            "path": path,
+            "payload": compressed if path is None else None,
+        }
+        stmt = (
+            dialect_insert(self.db.engine, RawResponse)
+            .values(row)
+            .on_conflict_do_nothing(
+                index_elements=[
+                    RawResponse.user_id,
+                    RawResponse.start_date,
+                    RawResponse.end_date,
+                    RawResponse.content_hash,
+                ]
+            )
+        )
+        with self.db.get_session() as session:
+            result = session.execute(stmt)
+            session.commit()
+
+        stored = result.rowcount == 1
+        if stored:
+            logger.info(
+                f"Archived raw response for {start_date}..{end_date}: {len(raw)} -> {len(compressed)} bytes",
+                extra={"storage": self.settings.backend},
+            )
+        return stored
+
+    def plan(self, start_date: str | None = None, end_date: str | None = None) -> dict[int, list[str]]:
+        """Какие даты берутся из какого ответа: для каждой даты — самый поздно полученный ответ, который её
+        покрывает. Каждая дата принадлежит ровно одному ответу, поэтому ответы можно обрабатывать параллельно"""
+
+        query = select(RawResponse.id, RawResponse.start_date, RawResponse.end_date).order_by(
+            RawResponse.fetched_at, RawResponse.id
+        )
+        if start_date:
+            query = query.where(RawResponse.end_date >= start_date)
+        if end_date:
+            query = query.where(RawResponse.start_date <= end_date)
+
+        owners: dict[str, int] = {}
+        with self.db.get_session() as session:
+            through = compacted_through(session)
+            for record_id, record_start, record_end in session.execute(query):
+                for date in iter_dates(
+                    max(record_start, start_date or record_start), min(record_end, end_date or record_end)
+                ):
+                    owners[date] = record_id
+
+        # Детали сжатых лет уже свёрнуты в помесячные агрегаты и не пересобираются
+        skipped = [date for date in owners if through is not None and date <= through]
+        if skipped:
+            logger.warning(f"Skipping {len(skipped)} days up to {through}: years are compacted into monthly summaries")
+            for date in skipped:
+                del owners[date]
+
+        plan: dict[int, list[str]] = {}
+        for date, record_id in sorted(owners.items()):
+            plan.setdefault(record_id, []).append(date)
+        return plan
+
+    def load(self, record_id: int) -> bytes:
+        """Распакованное содержимое ответа"""
+
+        with self.db.get_session() as session:
+            record = session.get(RawResponse, record_id)
+            if record is None:
+                raise KeyError(f"Raw response {record_id} not found")
+            storage, path, payload = record.storage, record.path, record.payload
+
+        if storage == "disk":
+            with open(path, "rb") as f:
+                payload = f.read()
+        return gzip.decompress(payload)
@@ -0,0 +1,328 @@
+import logging
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from wakatime_tracker.config import StatsSettings
+from wakatime_tracker.database.engine import dialect_insert
+from wakatime_tracker.database.models import DailyTotal, ProjectMonthlySummary, ProjectSummary, RunningStats
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = 1
+ROLLING_WINDOWS = (7, 30)
+
+
+def shift_date(date: str, days: int) -> str:
+    return (datetime.strptime(date, "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def is_active(total_seconds: float, settings: StatsSettings) -> bool:
+    return total_seconds > 0 and total_seconds >= settings.active_min_seconds
+
+
+def is_goal_met(total_seconds: float, settings: StatsSettings) -> bool:
+    return total_seconds > 0 and total_seconds >= settings.goal_seconds
+
+
+def is_stale(state: RunningStats | None, settings: StatsSettings) -> bool:
+    """Состояние отсутствует или считалось с другой целью — нужен полный пересчёт"""
+
+    return (
+        state is None
+        or state.goal_seconds != settings.goal_seconds
+        or state.active_min_seconds != settings.active_min_seconds
+    )
+
+
+def compacted_through(session: Session) -> str | None:
+    """Последняя дата сжатых лет: их детальные строки уже свёрнуты в project_monthly_summaries"""
+
+    last_month = session.execute(select(func.max(ProjectMonthlySummary.month))).scalar()
+    return f"{last_month[:4]}-12-31" if last_month else None
+
+
+def _threshold(seconds: float):
+    return and_(DailyTotal.total_seconds > 0, DailyTotal.total_seconds >= seconds)
+
+
+def _window_sum(session: Session, last_date: str, days: int) -> float:
+    """Сумма за days дней до last_date включительно: не больше days строк по первичному ключу"""
+
+    return session.execute(
+        select(func.coalesce(func.sum(DailyTotal.total_seconds), 0)).where(
+            DailyTotal.date > shift_date(last_date, -days), DailyTotal.date <= last_date
+        )
+    ).scalar_one()
+
+
+def _refresh_rolling(session: Session, state: RunningStats) -> None:
+    state.rolling_7_seconds = _window_sum(session, state.last_date, 7)
+    state.rolling_30_seconds = _window_sum(session, state.last_date, 30)
+
+
+def _refresh_best_day(session: Session, state: RunningStats) -> None:
+    best = session.execute(
+        select(DailyTotal.date, DailyTotal.total_seconds)
+        .where(DailyTotal.total_seconds > 0)
+        .order_by(DailyTotal.total_seconds.desc(), DailyTotal.date)
+        .limit(1)
+    ).first()
+    state.best_day_date, state.best_day_seconds = best if best else (None, 0.0)
+
+
+def _rebuild_streaks(session: Session, state: RunningStats, settings: StatsSettings) -> None:
+    """Пересчёт серий по активным дням; нужен только когда задним числом меняется активность дня"""
+
+    active_dates = session.execute(
+        select(DailyTotal.date).where(_threshold(settings.active_min_seconds)).order_by(DailyTotal.date)
+    ).scalars()
+
+    run_start = run_end = None
+    run_length = longest = 0
+    longest_start = None
+    for date in active_dates:
+        if run_end is not None and date == shift_date(run_end, 1):
+            run_length += 1
+        else:
+            run_start, run_length = date, 1
+        run_end = date
+        if run_length > longest:
+            longest, longest_start = run_length, run_start
+
+    state.current_streak, state.current_streak_start, state.current_streak_end = run_length, run_start, run_end
+    state.longest_streak, state.longest_streak_start = longest, longest_start
+
+
+def _active_dates(session: Session, date: str, span: int, settings: StatsSettings) -> set[str]:
+    """Активные дни в пределах span дней по обе стороны от date"""
+
+    return set(
+        session.execute(
+            select(DailyTotal.date).where(
+                DailyTotal.date >= shift_date(date, -span),
+                DailyTotal.date <= shift_date(date, span),
+                _threshold(settings.active_min_seconds),
+            )
+        ).scalars()
+    )
+
+
+def _run_bounds(active: set[str], date: str) -> tuple[str, str]:
+    """Первый и последний день серии, проходящей через date"""
+
+    start = end = date
+    while shift_date(start, -1) in active:
+        start = shift_date(start, -1)
+    while shift_date(end, 1) in active:
+        end = shift_date(end, 1)
+    return start, end
+
+
+def _run_length(start: str, end: str) -> int:
+    return (datetime.strptime(end, "%Y-%m-%d") - datetime.strptime(start, "%Y-%m-%d")).days + 1
+
+
+def _set_current_streak(state: RunningStats, start: str | None, end: str | None) -> None:
+    state.current_streak = _run_length(start, end) if start else 0
+    state.current_streak_start, state.current_streak_end = start, end
+
+
+def _update_streaks(
+    session: Session, state: RunningStats, settings: StatsSettings, date: str, now_active: bool
+) -> None:
+    """Серии после смены активности дня задним числом: затронута только серия вокруг date
+
+    Любая серия не длиннее longest_streak, поэтому соседние серии целиком помещаются в окно
+    longest_streak + 1 дней. Полный пересчёт нужен, только если разрывается сама самая длинная серия.
+    """
+
+    span = state.longest_streak + 1
+    active = _active_dates(session, date, span, settings)
+
+    if now_active:
+        start, end = _run_bounds(active, date)
+        if state.current_streak_end is None or end >= state.current_streak_end:
+            _set_current_streak(state, start, end)
+        # При равной длине самой длинной считается более ранняя серия, как в _rebuild_streaks
+        length = _run_length(start, end)
+        if length > state.longest_streak or (length == state.longest_streak and start < state.longest_streak_start):
+            state.longest_streak, state.longest_streak_start = length, start
+        return
+
+    previous_day, next_day = shift_date(date, -1), shift_date(date, 1)
+    left = _run_bounds(active, previous_day) if previous_day in active else None
+    right = _run_bounds(active, next_day) if next_day in active else None
+    broken_start = left[0] if left else date
+    broken_end = right[1] if right else date
+
+    if broken_start == state.longest_streak_start:
+        _rebuild_streaks(session, state, settings)
+        return
+
+    if broken_end == state.current_streak_end:
+        # Текущей становится правая часть разорванной серии, иначе левая, иначе предыдущая серия
+        if right or left:
+            _set_current_streak(state, *(right or left))
+        else:
+            last_active = session.execute(
+                select(func.max(DailyTotal.date)).where(DailyTotal.date < date, _threshold(settings.active_min_seconds))
+            ).scalar()
+            if last_active is None:
+                _set_current_streak(state, None, None)
+            else:
+                _set_current_streak(
+                    state, *_run_bounds(_active_dates(session, last_active, span, settings), last_active)
+                )
+
+
+def rebuild_running_stats(session: Session, settings: StatsSettings) -> RunningStats:
+    """Полный пересчёт агрегатов по daily_totals: после миграции или смены цели"""
+
+    state = session.get(RunningStats, STATE_ID)
+    if state is None:
+        state = RunningStats(id=STATE_ID)
+        session.add(state)
+
+    state.goal_seconds = settings.goal_seconds
+    state.active_min_seconds = settings.active_min_seconds
+
+    total_seconds, active_days, goal_days, last_date = session.execute(
+        select(
+            func.coalesce(func.sum(DailyTotal.total_seconds), 0),
+            func.count(case((_threshold(settings.active_min_seconds), 1))),
+            func.count(case((_threshold(settings.goal_seconds), 1))),
+            func.max(DailyTotal.date),
+        )
+    ).one()
+    state.total_seconds, state.active_days, state.goal_days, state.last_date = (
+        total_seconds,
+        active_days,
+        goal_days,
+        last_date,
+    )
+
+    if last_date is not None:
+        state.last_day_seconds = session.execute(
+            select(DailyTotal.total_seconds).where(DailyTotal.date == last_date)
+        ).scalar_one()
+        _refresh_rolling(session, state)
+    else:
+        state.last_day_seconds = state.rolling_7_seconds = state.rolling_30_seconds = 0.0
+
+    _refresh_best_day(session, state)
+    _rebuild_streaks(session, state, settings)
+    logger.info(f"Running stats rebuilt up to {last_date}")
+    return state
+
+
+def rebuild_daily_totals(session: Session, dates: list[str] | None = None) -> None:
+    """Дневные итоги по записям проектов за dates (все даты при None); дни сжатых лет не затрагиваются"""
+
+    query = select(
+        ProjectSummary.date, func.sum(ProjectSummary.total_seconds), func.count(ProjectSummary.id), func.now()
+    ).group_by(ProjectSummary.date)
+    # WHERE обязателен: без него SQLite не разбирает INSERT ... SELECT ... ON CONFLICT
+    query = query.where(ProjectSummary.date.in_(dates) if dates is not None else ProjectSummary.date.is_not(None))
+    # Итоги сжатых лет посчитаны по полным данным, поздние строки их не заменяют
+    through = compacted_through(session)
+    if through is not None:
+        query = query.where(ProjectSummary.date > through)
+
+    insert_stmt = dialect_insert(session.get_bind(), DailyTotal).from_select(
+        ["date", "total_seconds", "project_count", "updated_at"], query
+    )
+    session.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=[DailyTotal.date],
+            set_={
+                "total_seconds": insert_stmt.excluded.total_seconds,
+                "project_count": insert_stmt.excluded.project_count,
+                "updated_at": insert_stmt.excluded.updated_at,
+            },
+        )
+    )
+
+
+def update_day(session: Session, date: str, settings: StatsSettings) -> None:
+    """Обновление дневного итога и агрегатов после upsert проектов за день, в той же транзакции"""
+
+    new_total, project_count = session.execute(
+        select(func.coalesce(func.sum(ProjectSummary.total_seconds), 0), func.count(ProjectSummary.id)).where(
+            ProjectSummary.date == date
+        )
+    ).one()
+    old_total = session.execute(select(DailyTotal.total_seconds).where(DailyTotal.date == date)).scalar() or 0.0
+
+    insert_stmt = dialect_insert(session.get_bind(), DailyTotal).values(
+        date=date, total_seconds=new_total, project_count=project_count
+    )
+    session.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=[DailyTotal.date],
+            set_={
+                "total_seconds": insert_stmt.excluded.total_seconds,
+                "project_count": insert_stmt.excluded.project_count,
+                "updated_at": datetime.now(UTC).replace(tzinfo=None),
+            },
+        )
+    )
+
+    # Блокировка строки состояния сериализует параллельные записи в PostgreSQL
+    state = session.execute(select(RunningStats).where(RunningStats.id == STATE_ID).with_for_update()).scalar()
+    if is_stale(state, settings):
+        rebuild_running_stats(session, settings)
+        return
+
+    was_active, now_active = is_active(old_total, settings), is_active(new_total, settings)
+    state.total_seconds += new_total - old_total
+    state.active_days += int(now_active) - int(was_active)
+    state.goal_days += int(is_goal_met(new_total, settings)) - int(is_goal_met(old_total, settings))
+
+    # Лучший день: при равенстве побеждает более ранняя дата, как в _refresh_best_day; пересчёт по индексу
+    # нужен, только если уменьшился сам рекордный день
+    if new_total > 0 and (
+        state.best_day_date is None
+        or new_total > state.best_day_seconds
+        or (new_total == state.best_day_seconds and date < state.best_day_date)
+    ):
+        state.best_day_date, state.best_day_seconds = date, new_total
+    elif date == state.best_day_date and new_total < old_total:
+        _refresh_best_day(session, state)
+
+    # Скользящие суммы затрагивает только новый последний день или правка внутри окна
+    previous_last_date = state.last_date
+    if previous_last_date is None or date >= previous_last_date:
+        state.last_date, state.last_day_seconds = date, new_total
+    if date > shift_date(state.last_date, -max(ROLLING_WINDOWS)):
+        _refresh_rolling(session, state)
+
+    if was_active != now_active:
+        _update_streaks(session, state, settings, date, now_active)
+
+
+def summarize(state: RunningStats, today: str) -> dict:
+    """Агрегаты для отображения; серия считается текущей, если закончилась не раньше вчерашнего дня"""
+
+    streak_end = state.current_streak_end
+    current_streak = state.current_streak if streak_end and streak_end >= shift_date(today, -1) else 0
+
+    return {
+        "total_seconds": state.total_seconds,
+        "active_days": state.active_days,
+        "goal_seconds": state.goal_seconds,
+        "goal_days": state.goal_days,
+        "goal_rate": state.goal_days / state.active_days if state.active_days else 0.0,
+        "last_date": state.last_date,
+        "last_day_seconds": state.last_day_seconds,
+        "last_day_goal_met": state.last_day_seconds >= state.goal_seconds > 0,
+        "rolling_7_avg_seconds": state.rolling_7_seconds / 7,
+        "rolling_30_avg_seconds": state.rolling_30_seconds / 30,
+        "best_day_date": state.best_day_date,
+        "best_day_seconds": state.best_day_seconds,
+        "current_streak": current_streak,
+        "current_streak_start": state.current_streak_start if current_streak else None,
+        "longest_streak": state.longest_streak,
+        "longest_streak_start": state.longest_streak_start,
+    }
@@ -0,0 +1,204 @@
+import logging
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import and_, func, or_, select, update
+
+from wakatime_tracker.config import QueueSettings
+from wakatime_tracker.database.engine import dialect_insert
+from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.database.models import CollectionTask
+
+logger = logging.getLogger(__name__)
+
+
+def utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def split_range(start_date: str, end_date: str, chunk_days: int) -> list[tuple[str, str]]:
+    """Разбиение диапазона дат на части не длиннее chunk_days дней"""
+
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + timedelta(days=chunk_days - 1), end)
+        chunks.append((start.strftime("%Y-%m-%d"), chunk_end.strftime("%Y-%m-%d")))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+class TaskQueue:
+    """Очередь задач сбора в таблице collection_tasks
+
+    Задача забирается через SELECT ... FOR UPDATE SKIP LOCKED и арендуется на lease_seconds: если воркер
+    не завершил её за это время, задачу заберёт другой. Попытка засчитывается при захвате, поэтому задачи,
+    на которых падают воркеры, тоже попадают в dead после max_attempts.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, settings: QueueSettings):
+        self.db = db_manager
+        self.settings = settings
+
+    def enqueue(self, user_id: str, start_date: str, end_date: str, reset: bool = False) -> int:
+        """Постановка диапазона частями по backfill_chunk_days дней; уже известные части не дублируются,
+        с reset=True завершённые и мёртвые части возвращаются в очередь"""
+
+        now = utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "start_date": chunk_start,
+                "end_date": chunk_end,
+                "status": "pending",
+                "attempts": 0,
+                "max_attempts": self.settings.max_attempts,
+                "available_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for chunk_start, chunk_end in split_range(start_date, end_date, self.settings.backfill_chunk_days)
+        ]
+
+        insert_stmt = dialect_insert(self.db.engine, CollectionTask).values(rows)
+        index_elements = [CollectionTask.user_id, CollectionTask.start_date, CollectionTask.end_date]
+        if reset:
+            stmt = insert_stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={"status": "pending", "attempts": 0, "available_at": now, "last_error": None, "updated_at": now},
+                where=CollectionTask.status.in_(["done", "dead"]),
+            )
+        else:
+            stmt = insert_stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+        with self.db.get_session() as session:
+            result = session.execute(stmt)
+            session.commit()
+
+        logger.info(f"Enqueued {result.rowcount} of {len(rows)} collection tasks for {start_date}..{end_date}")
+        return result.rowcount
+
+    @staticmethod
+    def _claimable(now: datetime):
+        return or_(
+            and_(CollectionTask.status == "pending", CollectionTask.available_at <= now),
+            and_(CollectionTask.status == "running", CollectionTask.lease_expires_at < now),
+        )
+
+    def claim(self, worker_id: str, user_id: str, limit: int = 1) -> list[dict]:
+        """Захват до limit задач; параллельные воркеры пропускают заблокированные строки, а не ждут их"""
+
+        now = utcnow()
+        with self.db.get_session() as session:
+            ids = (
+                session.execute(
+                    select(CollectionTask.id)
+                    .where(CollectionTask.user_id == user_id, self._claimable(now))
+                    .order_by(CollectionTask.available_at, CollectionTask.id)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                )
+                .scalars()
+                .all()
+            )
+            if not ids:
+                return []
+
+            # Условие захвата проверяется повторно: в SQLite нет блокировок строк, там это защищает от гонки
+            claimed = session.execute(
+                update(CollectionTask)
+                .where(CollectionTask.id.in_(ids), self._claimable(now))
+                .values(
+                    status="running",
+                    attempts=CollectionTask.attempts + 1,
+                    lease_owner=worker_id,
+                    lease_expires_at=now + timedelta(seconds=self.settings.lease_seconds),
+                    updated_at=now,
+                )
+                .returning(CollectionTask)
+            ).scalars()
+            tasks = [task.to_dict() for task in claimed]
+            session.commit()
+
+        return tasks
+
+    def _update_leased(self, task_id: int, worker_id: str, **values) -> bool:
+        """Изменение задачи только её текущим арендатором: после истечения аренды результат отбрасывается"""
+
+        with self.db.get_session() as session:
+            result = session.execute(
+                update(CollectionTask)
+                .where(
+                    CollectionTask.id == task_id,
+                    CollectionTask.status == "running",
+                    CollectionTask.lease_owner == worker_id,
+                )
+                .values(updated_at=utcnow(), **values)
+            )
+            session.commit()
+
+        if result.rowcount == 0:
+            logger.warning(f"Collection task {task_id} lease lost by {worker_id}")
+        return result.rowcount == 1
+
+    def complete(self, task_id: int, worker_id: str) -> bool:
+        return self._update_leased(
+            task_id, worker_id, status="done", lease_owner=None, lease_expires_at=None, last_error=None
+        )
+
+    def fail(self, task: dict, worker_id: str, error: str) -> str:
+        """Возврат задачи в очередь с экспоненциальной задержкой или перевод в dead после max_attempts;
+        "lost", если аренду уже забрал другой воркер и задача осталась за ним"""
+
+        if task["attempts"] >= task["max_attempts"]:
+            status, available_at = "dead", utcnow()
+        else:
+            delay = min(self.settings.retry_backoff * 2 ** (task["attempts"] - 1), self.settings.retry_backoff_max)
+            status, available_at = "pending", utcnow() + timedelta(seconds=delay)
+
+        updated = self._update_leased(
+            task["id"],
+            worker_id,
+            status=status,
+            available_at=available_at,
+            lease_owner=None,
+            lease_expires_at=None,
+            last_error=error[:4000],
+        )
+        return status if updated else "lost"
+
+    def last_completed_at(self, user_id: str) -> datetime | None:
+        """Время последнего завершения задачи: по нему планировщик узнаёт, что воркеры записали данные"""
+
+        with self.db.get_session() as session:
+            return session.execute(
+                select(func.max(CollectionTask.updated_at)).where(
+                    CollectionTask.user_id == user_id, CollectionTask.status == "done"
+                )
+            ).scalar()
+
+    def requeue_dead(self, user_id: str | None = None) -> int:
+        """Ручной повтор мёртвых задач"""
+
+        now = utcnow()
+        stmt = (
+            update(CollectionTask)
+            .where(CollectionTask.status == "dead")
+            .values(status="pending", attempts=0, available_at=now, last_error=None, updated_at=now)
+        )
+        if user_id:
+            stmt = stmt.where(CollectionTask.user_id == user_id)
+
+        with self.db.get_session() as session:
+            result = session.execute(stmt)
+            session.commit()
+        return result.rowcount
+
+    def get_stats(self) -> dict[str, int]:
+        """Число задач по статусам"""
+
+        with self.db.get_session() as session:
+            rows = session.execute(
+                select(CollectionTask.status, func.count(CollectionTask.id)).group_by(CollectionTask.status)
+            )
+            return {status: count for status, count in rows}
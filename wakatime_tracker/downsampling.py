@@ -0,0 +1,41 @@
+from datetime import date
+
+import pandas as pd
+
+from wakatime_tracker.config import DashboardSettings
+
+# Периоды pandas для корзин: неделя с понедельника по воскресенье, календарный месяц
+PERIOD_FREQUENCIES = {"D": "D", "W": "W-SUN", "M": "M"}
+RESOLUTION_LABELS = {"D": "Daily", "W": "Weekly", "M": "Monthly"}
+RESOLUTION_DAYS = {"D": 1, "W": 7, "M": 30}
+
+
+def choose_resolution(start_date: date, end_date: date, settings: DashboardSettings) -> str:
+    """Выбор шага агрегации (день, неделя, месяц) по длине диапазона и лимиту точек на график"""
+
+    days = (end_date - start_date).days + 1
+
+    if days <= settings.day_resolution_max_days and days <= settings.max_points_per_chart:
+        return "D"
+    if days <= settings.week_resolution_max_days and days / RESOLUTION_DAYS["W"] <= settings.max_points_per_chart:
+        return "W"
+    return "M"
+
+
+def bucket_start(dates: pd.Series, resolution: str) -> pd.Series:
+    """Начало корзины (день, понедельник недели, первое число месяца) для каждой даты"""
+
+    if resolution == "D":
+        return dates.dt.normalize()
+    return dates.dt.to_period(PERIOD_FREQUENCIES[resolution]).dt.start_time
+
+
+def resample_totals(df: pd.DataFrame, resolution: str, value_column: str = "total_seconds") -> pd.DataFrame:
+    """Сумма значений по корзинам выбранного разрешения; df должен содержать столбец date типа datetime64"""
+
+    buckets = bucket_start(df["date"], resolution)
+    return df.groupby(buckets)[value_column].sum().rename_axis("date").reset_index()
+
+
+def use_webgl(points: int, settings: DashboardSettings) -> bool:
+    return points > settings.webgl_threshold
@@ -0,0 +1,148 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from cachetools import LRUCache
+
+from wakatime_tracker.config import DashboardSettings
+from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.frames import build_project_frame, frame_from_arrow
+from wakatime_tracker.hot_cache import ArrowRowIndex, build_table, HotCacheReader
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedRange:
+    watermark: datetime | None
+    frame: pd.DataFrame
+    # Строки из базы: (date, project_name) -> строка фрейма; для среза Arrow — только изменённые поверх него
+    rows: dict[tuple[str, str], tuple] = field(default_factory=dict)
+    # Срез опубликованного файла, на буферах которого построен фрейм, и перекрытые строками rows позиции
+    base: ArrowRowIndex | None = None
+    replaced: set[int] = field(default_factory=set)
+    source: str | None = None
+
+    @property
+    def row_count(self) -> int:
+        base_rows = self.base.table.num_rows - len(self.replaced) if self.base is not None else 0
+        return base_rows + len(self.rows)
+
+
+class FrameCache:
+    """Фреймы дашборда по диапазонам дат с дозагрузкой изменений
+
+    При повторном обращении запрашиваются только строки с updated_at позже водяного знака (минус запас
+    на запись, закоммиченную позже выставленного ей updated_at), и они заменяют строки с тем же
+    (date, project_name). Удаления так не видны, поэтому при расхождении числа строк с базой диапазон
+    загружается заново.
+
+    С hot_cache диапазон берётся из опубликованного файла Arrow без обращения к базе, а водяным знаком
+    становится updated_at на момент публикации. Фрейм ссылается на отображённые страницы файла; изменения
+    ищутся в срезе по индексам Arrow и накладываются поверх него, а новая публикация снова заменяет запись.
+    """
+
+    def __init__(self, db: DatabaseManager, settings: DashboardSettings, hot_cache: HotCacheReader | None = None):
+        self.db = db
+        self.settings = settings
+        self.hot_cache = hot_cache
+        self._entries: LRUCache = LRUCache(maxsize=settings.frame_cache_ranges)
+        self._lock = threading.Lock()
+
+    def _full_load(self, start_date: str, end_date: str) -> CachedRange:
+        rows = self.db.get_project_rows_updated_after(start_date, end_date)
+        by_key = {(row[0], row[1]): tuple(row[:4]) for row in rows}
+        return CachedRange(
+            watermark=max((row[4] for row in rows if row[4] is not None), default=None),
+            frame=build_project_frame(sorted(by_key.values())),
+            rows=by_key,
+        )
+
+    @staticmethod
+    def _hot_load(table: pa.Table, pointer: dict, start_date: str, end_date: str) -> CachedRange:
+        part = HotCacheReader.slice_range(table, start_date, end_date)
+        return CachedRange(
+            watermark=datetime.fromisoformat(pointer["watermark"]) if pointer["watermark"] else None,
+            frame=frame_from_arrow(part),
+            base=ArrowRowIndex(part),
+            source=pointer["file"],
+        )
+
+    @staticmethod
+    def _supersedes(pointer: dict, entry: CachedRange) -> bool:
+        """Публикация новее записи: другой файл и водяной знак не раньше уже загруженных изменений"""
+
+        if pointer["file"] == entry.source:
+            return False
+        if entry.watermark is None:
+            return True
+        return pointer["watermark"] is not None and datetime.fromisoformat(pointer["watermark"]) >= entry.watermark
+
+    @staticmethod
+    def _build_frame(entry: CachedRange) -> pd.DataFrame:
+        if entry.base is None:
+            return build_project_frame(sorted(entry.rows.values()))
+
+        # Перекрытые строки исключаются из среза, изменённые добавляются: фрейм становится частной копией
+        base = entry.base.table
+        if entry.replaced:
+            keep = np.ones(base.num_rows, dtype=bool)
+            keep[list(entry.replaced)] = False
+            base = base.filter(pa.array(keep))
+        combined = pa.concat_tables([base, build_table(sorted(entry.rows.values()))])
+        return frame_from_arrow(combined.sort_by("date"))
+
+    def _sync(self, entry: CachedRange, start_date: str, end_date: str) -> int:
+        """Дозагрузка изменённых строк в запись кэша; возвращает число полученных строк"""
+
+        updated_after = None
+        if entry.watermark is not None:
+            updated_after = entry.watermark - timedelta(seconds=self.settings.delta_sync_margin_seconds)
+        changes = self.db.get_project_rows_updated_after(start_date, end_date, updated_after)
+
+        changed = False
+        for row in changes:
+            key, values = (row[0], row[1]), tuple(row[:4])
+            current = entry.rows.get(key)
+            if current is None and entry.base is not None:
+                position = entry.base.position(*key)
+                if position is not None:
+                    current = entry.base.row(position, *key)
+                    if current != values:
+                        entry.replaced.add(position)
+            if current != values:
+                entry.rows[key] = values
+                changed = True
+            if row[4] is not None and (entry.watermark is None or row[4] > entry.watermark):
+                entry.watermark = row[4]
+
+        # Фрейм перестраивается только если что-то действительно изменилось, а не из-за окна запаса
+        if changed:
+            entry.frame = self._build_frame(entry)
+        return len(changes)
+
+    def get_frame(self, start_date: str, end_date: str) -> tuple[pd.DataFrame, dict]:
+        """Фрейм за период и сведения о синхронизации: full или delta и число полученных строк"""
+
+        key = (start_date, end_date)
+        with self._lock:
+            entry = self._entries.get(key)
+            loaded = self.hot_cache.load() if self.hot_cache is not None else None
+            if loaded is not None and (entry is None or self._supersedes(loaded[1], entry)):
+                entry = self._hot_load(*loaded, start_date, end_date)
+                self._entries[key] = entry
+                return entry.frame, {"mode": "hot", "fetched": 0}
+
+            if entry is not None:
+                fetched = self._sync(entry, start_date, end_date)
+                if entry.row_count == self.db.count_project_rows(start_date, end_date):
+                    return entry.frame, {"mode": "delta", "fetched": fetched}
+                logger.info(f"Row count changed for {start_date}..{end_date}, reloading frame")
+
+            entry = self._full_load(start_date, end_date)
+            self._entries[key] = entry
+            return entry.frame, {"mode": "full", "fetched": len(entry.rows)}
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from wakatime_tracker.calendar_heatmap import DAYS_ORDER
+
+FRAME_COLUMNS = ["date", "project_name", "total_seconds", "percent"]
+
+
+def build_project_frame(rows: list[tuple]) -> pd.DataFrame:
+    """Компактный фрейм записей проектов: datetime64 даты, категориальные имена, float32 значения"""
+
+    df = pd.DataFrame.from_records(rows, columns=FRAME_COLUMNS)
+    df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d")
+    df["project_name"] = df["project_name"].astype("category")
+    df["total_seconds"] = df["total_seconds"].astype(np.float32)
+    df["percent"] = df["percent"].astype(np.float32)
+    add_calendar_columns(df)
+    return df
+
+
+def frame_from_arrow(table: pa.Table) -> pd.DataFrame:
+    """Фрейм поверх буферов Arrow: даты и значения — представления без копирования, имена — категории
+
+    split_blocks не даёт pandas склеить колонки в общий блок, а значения остаются float64: приведение
+    к float32 скопировало бы отображённые страницы в память процесса.
+    """
+
+    df = table.select(FRAME_COLUMNS).to_pandas(split_blocks=True, date_as_object=False)
+    add_calendar_columns(df)
+    return df
+
+
+def add_calendar_columns(df: pd.DataFrame) -> None:
+    """Производные колонки дня недели и ISO-недели, считаются один раз для всех вкладок"""
+
+    df["weekday"] = pd.Categorical.from_codes(df["date"].dt.weekday.to_numpy(), categories=DAYS_ORDER, ordered=True)
+    iso = df["date"].dt.isocalendar()
+    df["iso_year"] = iso["year"].to_numpy(dtype=np.int16)
+    df["iso_week"] = iso["week"].to_numpy(dtype=np.int8)
+
+
+def filter_projects(df: pd.DataFrame, projects: list[str]) -> pd.DataFrame:
+    """Отбор проектов; без выбора возвращается исходный фрейм без копирования"""
+
+    if not projects:
+        return df
+    return df[df["project_name"].isin(projects)]
+
+
+def frame_memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
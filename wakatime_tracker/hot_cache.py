@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, UTC
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from wakatime_tracker.config import HotCacheSettings
+from wakatime_tracker.database.manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+POINTER_FILE = "CURRENT"
+FILE_PREFIX = "project_summaries-"
+
+# Без сжатия: сжатые буферы пришлось бы распаковывать в память каждого процесса.
+# Даты в timestamp[ns] совпадают с datetime64[ns] pandas, поэтому фрейм ссылается на буфер без преобразования
+SCHEMA = pa.schema(
+    [
+        ("date", pa.timestamp("ns")),
+        ("project_name", pa.dictionary(pa.int32(), pa.string())),
+        ("total_seconds", pa.float64()),
+        ("percent", pa.float64()),
+    ]
+)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_pointer(directory: str) -> dict | None:
+    """Описание текущей версии: имя файла, версия данных, водяной знак updated_at"""
+
+    try:
+        with open(Path(directory) / POINTER_FILE, "rb") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def build_table(rows: list[tuple]) -> pa.Table:
+    """Таблица Arrow из строк (date, project_name, total_seconds, percent), отсортированных по дате"""
+
+    dates, names, seconds, percents = zip(*rows) if rows else ((), (), (), ())
+    return pa.table(
+        [
+            pc.strptime(pa.array(dates, pa.string()), format="%Y-%m-%d", unit="ns"),
+            pa.array(names, pa.string()).dictionary_encode(),
+            pa.array(seconds, pa.float64()),
+            pa.array(percents, pa.float64()),
+        ],
+        schema=SCHEMA,
+    )
+
+
+class HotCachePublisher:
+    """Публикация всех записей проектов в файл Arrow IPC после сбора
+
+    Каждая версия пишется в новый файл, затем атомарно подменяется указатель CURRENT. Процессы, уже
+    отобразившие старую версию, продолжают её читать; удаляются только версии старше keep_versions.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, settings: HotCacheSettings):
+        self.db = db_manager
+        self.settings = settings
+        self.directory = Path(settings.directory)
+
+    def publish(self) -> str | None:
+        """Запись новой версии, если данные изменились; возвращает имя файла"""
+
+        data_version = self.db.get_data_version()
+        pointer = read_pointer(self.settings.directory)
+        if pointer is not None and pointer["data_version"] == data_version:
+            logger.info("Hot cache is up to date, skipping publish")
+            return None
+
+        rows = sorted(self.db.get_project_rows_updated_after("0000-01-01", "9999-12-31"))
+        watermark = max((row[4] for row in rows if row[4] is not None), default=None)
+        table = build_table([row[:4] for row in rows])
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            # Одна пачка: колонка даты читается из отображения одним непрерывным массивом
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        file_name = f"{FILE_PREFIX}{datetime.now(UTC):%Y%m%dT%H%M%S%f}.arrow"
+        _write_atomic(self.directory / file_name, sink.getvalue().to_pybytes())
+        pointer = {
+            "file": file_name,
+            "data_version": data_version,
+            "watermark": watermark.isoformat() if watermark else None,
+            "rows": table.num_rows,
+        }
+        _write_atomic(self.directory / POINTER_FILE, json.dumps(pointer).encode())
+
+        self._cleanup()
+        logger.info(f"Published hot cache {file_name}: {table.num_rows} rows")
+        return file_name
+
+    def _cleanup(self) -> None:
+        keep = self.settings.keep_versions
+        for path in sorted(self.directory.glob(f"{FILE_PREFIX}*.arrow"), reverse=True)[keep:]:
+            path.unlink(missing_ok=True)
+
+
+class HotCacheReader:
+    """Отображение текущей версии в память: таблица ссылается на страницы файла, общие для всех процессов"""
+
+    def __init__(self, settings: HotCacheSettings):
+        self.settings = settings
+        self._file: str | None = None
+        self._table: pa.Table | None = None
+        self._pointer: dict | None = None
+        self._lock = threading.Lock()
+
+    def load(self) -> tuple[pa.Table, dict] | None:
+        """Таблица и указатель текущей версии; None, если кэш ещё не опубликован"""
+
+        pointer = read_pointer(self.settings.directory)
+        if pointer is None:
+            return None
+
+        with self._lock:
+            if pointer["file"] != self._file:
+                try:
+                    source = pa.memory_map(str(Path(self.settings.directory) / pointer["file"]), "r")
+                    table = pa.ipc.open_file(source).read_all()
+                except FileNotFoundError:
+                    logger.warning(f"Hot cache file {pointer['file']} disappeared")
+                    return None
+                if not table.schema.equals(SCHEMA):
+                    # Файл прежней схемы: до следующей публикации фреймы загружаются из базы
+                    logger.warning(f"Hot cache file {pointer['file']} has an outdated schema, ignoring it")
+                    return None
+                self._table = table
+                self._file, self._pointer = pointer["file"], pointer
+                logger.info(f"Mapped hot cache {pointer['file']}: {self._table.num_rows} rows")
+            return self._table, self._pointer
+
+    @staticmethod
+    def slice_range(table: pa.Table, start_date: str, end_date: str) -> pa.Table:
+        """Строки за период без копирования: даты отсортированы, границы находятся двоичным поиском"""
+
+        dates = table.column("date").to_numpy()
+        lower = np.searchsorted(dates, np.datetime64(start_date, "ns"), side="left")
+        upper = np.searchsorted(dates, np.datetime64(end_date, "ns"), side="right")
+        return table.slice(lower, upper - lower)
+
+
+def single_chunk(table: pa.Table, name: str) -> pa.Array:
+    # Опубликованный файл — одна пачка, поэтому срез колонки обычно тоже один кусок и берётся без копирования
+    column = table.column(name)
+    return column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+
+class ArrowRowIndex:
+    """Поиск строки среза по (date, project_name) без материализации: двоичный поиск по дате и сравнение
+    кодов словаря внутри дня"""
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self.dates = single_chunk(table, "date").to_numpy()
+        names = single_chunk(table, "project_name")
+        self.codes = names.indices.to_numpy()
+        self.code_by_name = {name: code for code, name in enumerate(names.dictionary.to_pylist())}
+
+    def position(self, date: str, project_name: str) -> int | None:
+        code = self.code_by_name.get(project_name)
+        if code is None:
+            return None
+        day = np.datetime64(date, "ns")
+        lower = int(np.searchsorted(self.dates, day, side="left"))
+        upper = int(np.searchsorted(self.dates, day, side="right"))
+        matches = np.flatnonzero(self.codes[lower:upper] == code)
+        return lower + int(matches[0]) if len(matches) else None
+
+    def row(self, position: int, date: str, project_name: str) -> tuple:
+        return (
+            date,
+            project_name,
+            self.table.column("total_seconds")[position].as_py(),
+            self.table.column("percent")[position].as_py(),
+        )
@@ -0,0 +1,335 @@
+import atexit
+import base64
+import binascii
+import hmac
+import logging
+import math
+import os
+import threading
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any
+
+import orjson
+from tornado.ioloop import IOLoop
+from tornado.web import Application, HTTPError, RequestHandler
+
+from wakatime_tracker.api import serve_in_thread
+from wakatime_tracker.config import IngestSettings
+from wakatime_tracker.database.manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Столько heartbeat wakatime-cli отправляет в одном bulk-запросе
+BULK_LIMIT = 25
+JOURNAL_PREFIX = "heartbeats-"
+
+
+def _optional_int(value: Any) -> int | None:
+    return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _optional_str(value: Any, max_length: int) -> str | None:
+    return str(value)[:max_length] if value not in (None, "") else None
+
+
+def normalize_heartbeat(payload: Any, user_agent: str | None, received_at: datetime) -> dict:
+    """Строка таблицы heartbeats из тела запроса в формате WakaTime; ValueError при неверных полях"""
+
+    if not isinstance(payload, dict):
+        raise ValueError("heartbeat must be a JSON object")
+    entity, timestamp = payload.get("entity"), payload.get("time")
+    if not isinstance(entity, str) or not entity:
+        raise ValueError("entity is required")
+    if isinstance(timestamp, bool) or not isinstance(timestamp, (int, float)):
+        raise ValueError("time must be a unix timestamp")
+    try:
+        date = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+    except (OverflowError, OSError, ValueError):
+        raise ValueError("time out of range")
+
+    return {
+        "time": float(timestamp),
+        "date": date,
+        "entity": entity[:1024],
+        "type": _optional_str(payload.get("type"), 20) or "file",
+        "category": _optional_str(payload.get("category"), 50) or "coding",
+        "project": _optional_str(payload.get("project"), 255),
+        "branch": _optional_str(payload.get("branch"), 255),
+        "language": _optional_str(payload.get("language"), 100),
+        "is_write": bool(payload.get("is_write")),
+        "lines": _optional_int(payload.get("lines")),
+        "lineno": _optional_int(payload.get("lineno")),
+        "cursorpos": _optional_int(payload.get("cursorpos")),
+        "user_agent": _optional_str(payload.get("user_agent") or user_agent, 512),
+        "received_at": received_at,
+    }
+
+
+class HeartbeatJournal:
+    """Журнал принятых heartbeat в сегментах JSON Lines
+
+    Запись идёт в текущий сегмент; при сбросе буфера сегмент закрывается и удаляется только после
+    записи всех его heartbeat в базу. После падения процесса незакрытые сегменты воспроизводятся.
+    """
+
+    def __init__(self, directory: str, fsync: bool):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        existing = [int(path.stem.removeprefix(JOURNAL_PREFIX)) for path in self._segments()]
+        self._sequence = max(existing, default=0) + 1
+        self._file = open(self._segment_path(self._sequence), "ab")
+
+    def _segment_path(self, sequence: int) -> Path:
+        return self.directory / f"{JOURNAL_PREFIX}{sequence:012d}.jsonl"
+
+    def _segments(self) -> list[Path]:
+        return sorted(self.directory.glob(f"{JOURNAL_PREFIX}*.jsonl"))
+
+    def replay(self) -> list[dict]:
+        """Heartbeat из закрытых сегментов; оборванная при падении последняя строка пропускается"""
+
+        heartbeats = []
+        current = self._segment_path(self._sequence)
+        for path in self._segments():
+            if path == current:
+                continue
+            for line in path.read_bytes().splitlines():
+                try:
+                    heartbeat = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    logger.warning(f"Skipping truncated journal record in {path.name}")
+                    continue
+                heartbeat["received_at"] = datetime.fromisoformat(heartbeat["received_at"])
+                heartbeats.append(heartbeat)
+        return heartbeats
+
+    def append(self, heartbeats: list[dict]) -> None:
+        self._file.write(b"".join(orjson.dumps(heartbeat) + b"\n" for heartbeat in heartbeats))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> list[Path]:
+        """Закрытие текущего сегмента; возвращает все закрытые сегменты"""
+
+        self._file.close()
+        self._sequence += 1
+        self._file = open(self._segment_path(self._sequence), "ab")
+        current = self._segment_path(self._sequence)
+        return [path for path in self._segments() if path != current]
+
+    @staticmethod
+    def remove(segments: list[Path]) -> None:
+        for path in segments:
+            path.unlink(missing_ok=True)
+
+
+class HeartbeatBuffer:
+    """Буфер heartbeat в памяти между приёмом и пакетной записью в базу
+
+    Ёмкость ограничена max_buffer с учётом пачки, которая пишется в данный момент: при заполнении
+    submit возвращает False и обработчик отвечает 429, плагины повторят отправку позже.
+    """
+
+    def __init__(self, settings: IngestSettings):
+        self.settings = settings
+        self._items: list[dict] = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.batch_ready = threading.Event()
+        self.journal = (
+            HeartbeatJournal(settings.journal_directory, settings.journal_fsync) if settings.journal_directory else None
+        )
+        if self.journal is not None:
+            self._items = self.journal.replay()
+            if self._items:
+                logger.info(f"Replayed {len(self._items)} heartbeats from journal")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items) + self._in_flight
+
+    def submit(self, heartbeats: list[dict]) -> bool:
+        with self._lock:
+            if len(self._items) + self._in_flight + len(heartbeats) > self.settings.max_buffer:
+                return False
+            # Ответ плагину отправляется только после записи в журнал
+            if self.journal is not None:
+                self.journal.append(heartbeats)
+            self._items.extend(heartbeats)
+            if len(self._items) >= self.settings.batch_size:
+                self.batch_ready.set()
+        return True
+
+    def drain(self) -> tuple[list[dict], list[Path]]:
+        """Забрать всё накопленное вместе с сегментами журнала, которые покрывают эти heartbeat"""
+
+        with self._lock:
+            items, self._items = self._items, []
+            self._in_flight += len(items)
+            self.batch_ready.clear()
+            segments = self.journal.rotate() if self.journal is not None and items else []
+        return items, segments
+
+    def restore(self, items: list[dict]) -> None:
+        """Возврат незаписанных heartbeat в начало буфера; сегменты журнала остаются на диске"""
+
+        with self._lock:
+            self._items[:0] = items
+            self._in_flight -= len(items)
+
+    def complete(self, items: list[dict], segments: list[Path]) -> None:
+        with self._lock:
+            self._in_flight -= len(items)
+            if self.journal is not None:
+                self.journal.remove(segments)
+
+
+class HeartbeatFlusher:
+    """Фоновая запись буфера в базу пачками по batch_size: по заполнению пачки или раз в flush_interval"""
+
+    def __init__(self, buffer: HeartbeatBuffer, db_manager: DatabaseManager, settings: IngestSettings):
+        self.buffer = buffer
+        self.db = db_manager
+        self.settings = settings
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        # stop() из atexit может вызвать flush, пока фоновый поток ещё пишет предыдущую пачку
+        self._flush_lock = threading.Lock()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        items, segments = self.buffer.drain()
+        if not items:
+            return 0
+
+        saved = 0
+        try:
+            for offset in range(0, len(items), self.settings.batch_size):
+                end = offset + self.settings.batch_size
+                saved += self.db.save_heartbeats(items[offset:end])
+        except Exception as e:
+            # Уже записанные пачки при повторе пропустит ON CONFLICT DO NOTHING
+            logger.error(f"Failed to flush {len(items)} heartbeats, will retry: {e}")
+            self.buffer.restore(items)
+            return 0
+
+        self.buffer.complete(items, segments)
+        logger.debug("Flushed %s heartbeats (%s new)", len(items), saved)
+        return saved
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            self.buffer.batch_ready.wait(self.settings.flush_interval)
+            self.flush()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, name="heartbeat-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Остановка с последним сбросом буфера"""
+
+        self._stopping.set()
+        self.buffer.batch_ready.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.settings.flush_interval * 2)
+        self.flush()
+
+
+class HeartbeatHandler(RequestHandler):
+    """POST /users/{user}/heartbeats и /users/{user}/heartbeats.bulk в формате WakaTime API"""
+
+    def initialize(self, buffer: HeartbeatBuffer, ingest_settings: IngestSettings, bulk: bool):
+        self.buffer = buffer
+        self.ingest_settings = ingest_settings
+        self.bulk = bulk
+
+    def prepare(self):
+        if self.ingest_settings.api_key and not self._authorized():
+            raise HTTPError(401, "Invalid api key")
+
+    def _authorized(self) -> bool:
+        # Плагины передают ключ как Basic base64(api_key) или параметром api_key
+        key = self.get_query_argument("api_key", None)
+        scheme, _, credentials = self.request.headers.get("Authorization", "").partition(" ")
+        if key is None and scheme.lower() == "basic":
+            try:
+                key = base64.b64decode(credentials).decode().partition(":")[0]
+            except (binascii.Error, UnicodeDecodeError):
+                return False
+        return key is not None and hmac.compare_digest(key.encode(), self.ingest_settings.api_key.encode())
+
+    def write_json(self, status: int, body: Any) -> None:
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(orjson.dumps(body))
+
+    async def post(self, user: str):
+        try:
+            payload = orjson.loads(self.request.body)
+        except orjson.JSONDecodeError:
+            raise HTTPError(400, "Invalid JSON")
+
+        received_at = datetime.now(UTC).replace(tzinfo=None)
+        user_agent = self.request.headers.get("User-Agent")
+        if self.bulk:
+            if not isinstance(payload, list) or len(payload) > BULK_LIMIT:
+                raise HTTPError(400, f"Expected a JSON array of at most {BULK_LIMIT} heartbeats")
+            results = []
+            for item in payload:
+                try:
+                    results.append(normalize_heartbeat(item, user_agent, received_at))
+                except ValueError as e:
+                    results.append(e)
+        else:
+            try:
+                results = [normalize_heartbeat(payload, user_agent, received_at)]
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+
+        accepted = [result for result in results if isinstance(result, dict)]
+        # Запись в журнал с fsync блокирует, поэтому выполняется вне event loop
+        if accepted and not await IOLoop.current().run_in_executor(None, self.buffer.submit, accepted):
+            self.set_header("Retry-After", str(math.ceil(self.ingest_settings.flush_interval)))
+            self.write_json(429, {"error": "Heartbeat buffer is full, retry later"})
+            return
+
+        responses = [
+            (
+                [{"data": {"entity": result["entity"], "type": result["type"], "time": result["time"]}}, 201]
+                if isinstance(result, dict)
+                else [{"error": str(result)}, 400]
+            )
+            for result in results
+        ]
+        if self.bulk:
+            self.write_json(201, {"responses": responses})
+        else:
+            self.write_json(201, responses[0][0])
+
+
+def make_ingest_app(buffer: HeartbeatBuffer, settings: IngestSettings) -> Application:
+    handler_kwargs = {"buffer": buffer, "ingest_settings": settings}
+    return Application(
+        [
+            (r"/api/v1/users/([^/]+)/heartbeats\.bulk", HeartbeatHandler, {**handler_kwargs, "bulk": True}),
+            (r"/api/v1/users/([^/]+)/heartbeats", HeartbeatHandler, {**handler_kwargs, "bulk": False}),
+        ]
+    )
+
+
+def start_ingest_server(db: DatabaseManager, settings: IngestSettings) -> HeartbeatFlusher:
+    """Запуск приёма heartbeat рядом со сборщиком; плагины настраиваются на api_url http://host:port/api/v1"""
+
+    buffer = HeartbeatBuffer(settings)
+    flusher = HeartbeatFlusher(buffer, db, settings)
+    flusher.start()
+    serve_in_thread("heartbeat-ingest", lambda: make_ingest_app(buffer, settings), settings.host, settings.port)
+    return flusher
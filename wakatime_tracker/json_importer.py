@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 
@@ -5,41 +6,73 @@ from wakatime_tracker.database.manager import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
+HASH_CHUNK_SIZE = 1024 * 1024
+
 
 class JSONImporter:
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
 
+    @staticmethod
+    def _file_hash(file_path: str) -> str:
+        """SHA-256 содержимого файла"""
+
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
     def _import_from_file(self, file_path: str) -> dict:
-        """Импортирование данных из JSON файла"""
+        """Импортирование данных из JSON файла с продолжением с последней контрольной точки"""
 
         try:
+            content_hash = self._file_hash(file_path)
+            record = self.db.get_import(content_hash)
+
+            if record and record["status"] == "completed":
+                logger.info(f"JSON file {file_path} already imported, skipping")
+                return {"imported_count": 0, "error_count": 0, "total_days": record["total_days"], "skipped": True}
+
             with open(file_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
 
+            days = sorted(data.get("days", []), key=lambda day: day["date"])
+
+            if record is None:
+                self.db.start_import(content_hash, file_path, len(days))
+                checkpoint = None
+            else:
+                checkpoint = record["last_committed_date"]
+                logger.info(f"Resuming JSON import of {file_path} after {checkpoint}")
+
             imported_count = 0
             error_count = 0
 
-            for day_data in data.get("days", []):
+            for day_data in days:
                 date = day_data["date"]
+                if checkpoint and date <= checkpoint:
+                    continue
 
                 # Обрабатываем проекты
+                projects = []
+                day_errors = 0
                 for project in day_data.get("projects", []):
                     try:
-                        project_info = self._extract_project_data(project, date)
-                        self.db.save_project_data(date, project_info)
-                        imported_count += 1
-
+                        projects.append(self._extract_project_data(project, date))
                     except Exception as e:
                         logger.error(f"Error importing project {project.get('name', 'unknown')} for {date}: {e}")
-                        error_count += 1
+                        day_errors += 1
+
+                # День и контрольная точка сохраняются атомарно, после сбоя импорт продолжится со следующего дня
+                self.db.save_import_day(content_hash, date, projects, day_errors)
+                imported_count += len(projects)
+                error_count += day_errors
+
+            self.db.complete_import(content_hash)
 
             logger.info(f"JSON import completed: {imported_count} projects imported, {error_count} errors")
-            return {
-                "imported_count": imported_count,
-                "error_count": error_count,
-                "total_days": len(data.get("days", [])),
-            }
+            return {"imported_count": imported_count, "error_count": error_count, "total_days": len(days)}
 
         except Exception as e:
             logger.error(f"Error reading JSON file: {e}")
@@ -1,5 +1,11 @@
+import atexit
+import copy
 import logging
+import queue
+import random
 import sys
+from datetime import datetime, UTC
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Callable
 
 import structlog
@@ -10,6 +16,12 @@ from wakatime_tracker.config import LoggingSettings
 
 ProcessorType = Callable[[structlog.types.WrappedLogger, str, structlog.types.EventDict], str | bytes]
 
+_RECORD_CONTEXT_ATTR = "structlog_contextvars"
+
+_traceback_formatter = logging.Formatter()
+
+_queue_listener: QueueListener | None = None
+
 
 def additionally_serialize(obj: Any) -> Any:
     try:
@@ -30,20 +42,141 @@ def get_render_processor(
     return structlog.dev.ConsoleRenderer(colors=colors)
 
 
+def add_record_timestamp(
+    logger: structlog.types.WrappedLogger, method_name: str, event_dict: structlog.types.EventDict
+) -> structlog.types.EventDict:
+    """Метка времени из LogRecord.created, чтобы не зависеть от момента форматирования в фоновом потоке"""
+
+    record: logging.LogRecord | None = event_dict.get("_record")
+    created = record.created if record is not None else datetime.now(UTC).timestamp()
+    event_dict["timestamp"] = datetime.fromtimestamp(created, UTC).strftime("%Y-%m-%d %H:%M:%S.%f")
+    return event_dict
+
+
+def merge_record_contextvars(
+    logger: structlog.types.WrappedLogger, method_name: str, event_dict: structlog.types.EventDict
+) -> structlog.types.EventDict:
+    """Контекст structlog, сохранённый в записи в момент вызова логгера"""
+
+    # ExtraAdder уже перенёс атрибут записи в event_dict
+    context = event_dict.pop(_RECORD_CONTEXT_ATTR, None)
+    if context:
+        for key, value in context.items():
+            event_dict.setdefault(key, value)
+    return event_dict
+
+
+def add_record_exception(
+    logger: structlog.types.WrappedLogger, method_name: str, event_dict: structlog.types.EventDict
+) -> structlog.types.EventDict:
+    """Traceback, отформатированный до постановки записи в очередь (см. DeferredQueueHandler.prepare)"""
+
+    record: logging.LogRecord | None = event_dict.get("_record")
+    if record is not None and record.exc_text and "exc_info" not in event_dict:
+        event_dict["exception"] = record.exc_text
+    return event_dict
+
+
+def level_gated(processor: Processor, min_level: str) -> Processor:
+    """Запуск процессора только для записей с уровнем не ниже min_level"""
+
+    threshold = logging.getLevelName(min_level.upper())
+
+    def gated(
+        logger: structlog.types.WrappedLogger, method_name: str, event_dict: structlog.types.EventDict
+    ) -> structlog.types.EventDict:
+        if structlog.processors.NAME_TO_LEVEL.get(method_name, logging.NOTSET) < threshold:
+            return event_dict
+        return processor(logger, method_name, event_dict)
+
+    return gated
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Пропускает только долю DEBUG-записей, остальные уровни проходят всегда"""
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.sample_rate >= 1:
+            return True
+        return random.random() < self.sample_rate
+
+
+class ContextVarsFilter(logging.Filter):
+    """Сохраняет контекст structlog в записи в потоке вызова: и для синхронного вывода, и для очереди"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = structlog.contextvars.get_contextvars()
+        if context:
+            setattr(record, _RECORD_CONTEXT_ATTR, context)
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Кладёт запись в очередь без рендеринга — он выполняется в фоновом потоке QueueListener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Как в базовом QueueHandler, сообщение и traceback вычисляются в потоке вызова, пока аргументы
+        # и исключение не изменились; в очередь попадают только строки
+        if isinstance(record.msg, dict):
+            # Запись structlog: event_dict уже собран в потоке вызова, фиксируется только текущее исключение,
+            # которого в фоновом потоке уже не будет
+            if record.msg.get("exc_info") is True:
+                record.msg["exc_info"] = sys.exc_info()
+            return record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def stop_logging() -> None:
+    """Остановка фонового потока логирования с записью оставшихся сообщений"""
+
+    global _queue_listener
+
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
 def configure_logging(config: LoggingSettings) -> None:
     """Configuring structlog logging"""
 
+    global _queue_listener
+
+    callsite_adder = level_gated(
+        structlog.processors.CallsiteParameterAdder(
+            (structlog.processors.CallsiteParameter.FILENAME, structlog.processors.CallsiteParameter.LINENO),
+            additional_ignores=[__name__],
+        ),
+        config.callsite_level,
+    )
+
+    # Выполняется в потоке вызова для логгеров structlog
     common_processors = [
         structlog.stdlib.add_log_level,
         structlog.stdlib.add_logger_name,
-        structlog.stdlib.ExtraAdder(),
         structlog.dev.set_exc_info,
-        structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S.%f", utc=True),
         structlog.contextvars.merge_contextvars,
         # structlog.processors.dict_tracebacks,
-        structlog.processors.CallsiteParameterAdder(
-            (structlog.processors.CallsiteParameter.FILENAME, structlog.processors.CallsiteParameter.LINENO)
-        ),
+        callsite_adder,
+    ]
+    # Выполняется при форматировании записей стандартного logging (в фоновом потоке при async_logging)
+    foreign_pre_chain = [
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.ExtraAdder(),
+        structlog.dev.set_exc_info,
+        merge_record_contextvars,
+        add_record_exception,
+        callsite_adder,
     ]
     structlog_processors: list[Processor] = [
         structlog.processors.StackInfoRenderer(),
@@ -54,11 +187,12 @@ def configure_logging(config: LoggingSettings) -> None:
     ]
 
     logging_console_processors = (
+        add_record_timestamp,
         structlog.stdlib.ProcessorFormatter.remove_processors_meta,
         get_render_processor(render_json_logs=config.render_json_logs, colors=True),
     )
 
-    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+    logging.getLogger("sqlalchemy.engine").setLevel(config.sqlalchemy_level)
     logging.getLogger("httpcore").setLevel(logging.INFO)
     logging.getLogger("httpx").setLevel(logging.INFO)
     logging.getLogger("aiogram_dialog").setLevel(logging.WARNING)
@@ -68,6 +202,7 @@ def configure_logging(config: LoggingSettings) -> None:
     logging.getLogger("python_multipart.multipart").setLevel(logging.INFO)
 
     # Removing existing logging handlers
+    stop_logging()
     for handler in logging.getLogger().handlers[:]:
         logging.getLogger().removeHandler(handler)
 
@@ -76,11 +211,24 @@ def configure_logging(config: LoggingSettings) -> None:
     handler.set_name("default")
     handler.setLevel(config.level)
     console_formatter = structlog.stdlib.ProcessorFormatter(
-        foreign_pre_chain=common_processors, processors=logging_console_processors  # type: ignore
+        foreign_pre_chain=foreign_pre_chain, processors=logging_console_processors  # type: ignore
     )
     handler.setFormatter(console_formatter)
 
-    handlers: list[logging.Handler] = [handler]
+    if config.async_logging:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        root_handler: logging.Handler = DeferredQueueHandler(log_queue)
+        root_handler.set_name("queue")
+        root_handler.setLevel(config.level)
+
+        _queue_listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        _queue_listener.start()
+    else:
+        root_handler = handler
+
+    root_handler.addFilter(DebugSamplingFilter(config.debug_sample_rate))
+    root_handler.addFilter(ContextVarsFilter())
+    handlers: list[logging.Handler] = [root_handler]
 
     logging.basicConfig(handlers=handlers, level=config.level)
     structlog.configure(
@@ -89,3 +237,6 @@ def configure_logging(config: LoggingSettings) -> None:
         wrapper_class=structlog.stdlib.BoundLogger,  # type: ignore  # noqa
         cache_logger_on_first_use=True,
     )
+
+
+atexit.register(stop_logging)
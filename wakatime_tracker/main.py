@@ -1,12 +1,22 @@
 import logging
 import os
 import time
+from datetime import datetime, timedelta
+from typing import Callable
 
 import schedule
 
+from wakatime_tracker.api import start_api_server
 from wakatime_tracker.config import load_config, SchedulerSettings
+from wakatime_tracker.database.instrumentation import track_operation
 from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.database.partitions import PartitionManager
+from wakatime_tracker.database.task_queue import TaskQueue
+from wakatime_tracker.hot_cache import HotCachePublisher
+from wakatime_tracker.ingest import start_ingest_server
 from wakatime_tracker.logger import configure_logging
+from wakatime_tracker.reports import ReportGenerator
+from wakatime_tracker.telegram_bot import start_telegram_bot
 from wakatime_tracker.telegram_notifier import TelegramNotifier
 from wakatime_tracker.wakatime_service import WakaTimeService
 from wakatime_tracker.json_importer import JSONImporter
@@ -15,27 +25,81 @@ from wakatime_tracker.json_importer import JSONImporter
 logger = logging.getLogger(__name__)
 
 
-def daily_collection_job(service: WakaTimeService, telegram_notifier: TelegramNotifier):
+def run_post_collection_hooks(post_collection_hooks: list[Callable[[], None]]) -> None:
+    """Обновление производных данных (кэши, отчёты) после записи собранных данных"""
+
+    for hook in post_collection_hooks:
+        try:
+            hook()
+        except Exception as e:
+            logger.error(f"Error in post-collection hook {getattr(hook, '__name__', hook)}: {e}")
+
+
+def daily_collection_job(
+    service: WakaTimeService,
+    telegram_notifier: TelegramNotifier,
+    post_collection_hooks: list[Callable[[], None]] | None = None,
+    task_queue: TaskQueue | None = None,
+):
     """Задача для ежедневного сбора данных"""
 
     try:
         logger.info("Running daily data collection job...")
-        service.collect_yesterday_data()
+        with track_operation("daily_collection_job"):
+            if task_queue is not None:
+                # Сбор выполняют воркеры; задача за день ставится один раз, сколько бы планировщиков ни работало
+                yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+                task_queue.enqueue(load_config().wakatime.user_id, yesterday, yesterday)
+            else:
+                service.collect_yesterday_data()
     except Exception as e:
         logger.error(f"Error in daily collection job: {e}")
         telegram_notifier.send_error(f"Daily collection job failed: {str(e)}")
 
+    # В режиме очереди данных ещё нет: хуки запустит CompletionWatcher, когда воркеры завершат задачи
+    if task_queue is None:
+        run_post_collection_hooks(post_collection_hooks or [])
+
+
+class CompletionWatcher:
+    """Запуск хуков после сбора в режиме очереди, когда воркеры завершили новые задачи"""
+
+    def __init__(self, task_queue: TaskQueue, user_id: str, post_collection_hooks: list[Callable[[], None]]):
+        self.task_queue = task_queue
+        self.user_id = user_id
+        self.post_collection_hooks = post_collection_hooks
+        self._seen = task_queue.last_completed_at(user_id)
+
+    def check(self) -> None:
+        try:
+            completed_at = self.task_queue.last_completed_at(self.user_id)
+        except Exception as e:
+            logger.error(f"Failed to check completed collection tasks: {e}")
+            return
+        if completed_at is None or (self._seen is not None and completed_at <= self._seen):
+            return
+
+        self._seen = completed_at
+        logger.info(f"Collection tasks completed at {completed_at}, running post-collection hooks")
+        run_post_collection_hooks(self.post_collection_hooks)
+
 
 def import_initial_data(config: SchedulerSettings, importer: JSONImporter) -> None:
     if not config.import_initial_data:
         return
     if config.initial_data_path is None:
         logger.warning("File with initial data not set, skipping initial data import.")
+        return
     if not os.path.isfile(config.initial_data_path):
         logger.warning("Initial data file not found, skipping initial data import.")
+        return
 
-    result = importer.import_initial_data(config.initial_data_path)
-    logger.info(f"Initial data import completed: {result['imported_count']} projects imported")
+    with track_operation("initial_data_import"):
+        result = importer.import_initial_data(config.initial_data_path)
+    if result.get("skipped"):
+        logger.info("Initial data file already imported, nothing to do")
+    else:
+        logger.info(f"Initial data import completed: {result['imported_count']} projects imported")
 
 
 def start_scheduler() -> None:
@@ -44,9 +108,35 @@ def start_scheduler() -> None:
 
     db = DatabaseManager()
 
-    wakatime_service = WakaTimeService()
+    wakatime_service = WakaTimeService(db)
     tg_notifier = TelegramNotifier()
     importer = JSONImporter(db)
+    partitions = PartitionManager(db)
+    post_collection_hooks: list[Callable[[], None]] = [partitions.maintain]
+    task_queue = TaskQueue(db, config.queue) if config.queue.enabled else None
+
+    if config.hot_cache.enabled:
+        post_collection_hooks.append(HotCachePublisher(db, config.hot_cache).publish)
+
+    if config.reports.enabled:
+        post_collection_hooks.append(ReportGenerator(db, config.reports).generate)
+
+    if config.api.enabled:
+        reports_directory = config.reports.directory if config.reports.enabled else None
+        api_state = start_api_server(db, config.api, reports_directory)
+        post_collection_hooks.append(api_state.invalidate)
+
+    if config.ingest.enabled:
+        start_ingest_server(db, config.ingest)
+
+    if config.telegram.bot_enabled and config.telegram.is_configured:
+        post_collection_hooks.append(start_telegram_bot(db, config.telegram).refresh)
+
+    # Секции на текущий и следующий год должны существовать до записи данных
+    partitions.maintain()
+
+    # Статистика пересчитывается здесь, с целью из настроек сборщика, а не при чтении из дашборда или API
+    db.ensure_running_stats()
 
     # Импорт начальных данных, если база пуста
     import_initial_data(config.scheduler, importer)
@@ -54,11 +144,16 @@ def start_scheduler() -> None:
     cron_parts = config.scheduler.cron_schedule.split()
     hour, minute = int(cron_parts[1]), int(cron_parts[0])
 
-    schedule.every().day.at(f"{hour:02d}:{minute:02d}").do(daily_collection_job)
+    schedule.every().day.at(f"{hour:02d}:{minute:02d}").do(
+        daily_collection_job, wakatime_service, tg_notifier, post_collection_hooks, task_queue
+    )
+    if task_queue is not None:
+        watcher = CompletionWatcher(task_queue, config.wakatime.user_id, post_collection_hooks)
+        schedule.every(1).minutes.do(watcher.check)
     logger.info(schedule.get_jobs())
 
     if config.scheduler.run_on_startup:
-        daily_collection_job(wakatime_service, tg_notifier)
+        daily_collection_job(wakatime_service, tg_notifier, post_collection_hooks, task_queue)
 
     while True:
         schedule.run_pending()
@@ -0,0 +1,302 @@
+"""Статические годовые и месячные отчёты: агрегаты и графики Plotly считаются вне запросов дашборда
+
+Запуск: python -m wakatime_tracker.reports [--force]
+"""
+
+import argparse
+import calendar
+import json
+import logging
+import os
+from datetime import date, datetime, UTC
+from pathlib import Path
+
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from wakatime_tracker.calendar_heatmap import DAYS_ORDER
+from wakatime_tracker.config import load_config, ReportSettings
+from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.logger import configure_logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.json"
+PLOTLY_JS_FILE = "plotly.min.js"
+OTHER_PROJECTS = "Other"
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>WakaTime report {period}</title>
+<script src="{plotly_js}"></script>
+<style>body {{ font-family: sans-serif; margin: 2em; }} td {{ padding: 0 1em; }}</style>
+</head>
+<body>
+<h1>WakaTime report {period}</h1>
+<table>{summary}</table>
+{figures}
+</body>
+</html>
+"""
+
+
+def _write_atomic(path: Path, data: str) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(data, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def format_hours(seconds: float) -> str:
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"{hours}h {minutes}m"
+
+
+def _hours_bar(data: pd.DataFrame, x: str, title: str, **kwargs):
+    fig = px.bar(data.assign(hours=data["total_seconds"] / 3600), x=x, y="hours", title=title, **kwargs)
+    fig.update_traces(hovertemplate="<b>%{x}</b><br>%{y:.1f} h<extra></extra>")
+    fig.update_layout(yaxis_title="Hours", xaxis_title=None)
+    return fig
+
+
+def summarize_period(daily: pd.DataFrame, projects: pd.DataFrame, top_projects: int) -> dict:
+    total = float(projects["total_seconds"].sum())
+    active = daily[daily["total_seconds"] > 0]
+    best = active.loc[active["total_seconds"].idxmax()] if not active.empty else None
+    return {
+        "total_seconds": total,
+        "active_days": int(len(active)),
+        "daily_average_seconds": float(active["total_seconds"].mean()) if not active.empty else 0.0,
+        "best_day": best["date"] if best is not None else None,
+        "best_day_seconds": float(best["total_seconds"]) if best is not None else 0.0,
+        "projects": int(len(projects)),
+        "top_projects": [
+            {"project_name": row.project_name, "total_seconds": row.total_seconds, "share": row.total_seconds / total}
+            for row in projects.head(top_projects).itertuples()
+        ],
+    }
+
+
+def weekday_totals(daily: pd.DataFrame) -> pd.DataFrame:
+    weekdays = pd.to_datetime(daily["date"]).dt.day_name()
+    totals = daily.groupby(weekdays)["total_seconds"].sum().reindex(DAYS_ORDER, fill_value=0.0)
+    return totals.rename_axis("weekday").reset_index()
+
+
+def concat_rows(*frames: pd.DataFrame) -> pd.DataFrame:
+    """Объединение дневных строк и помесячных агрегатов; пустые части пропускаются"""
+
+    non_empty = [frame for frame in frames if not frame.empty]
+    return pd.concat(non_empty, ignore_index=True) if non_empty else frames[0]
+
+
+def project_totals(rows: pd.DataFrame) -> pd.DataFrame:
+    return (
+        rows.groupby("project_name", as_index=False)["total_seconds"]
+        .sum()
+        .sort_values("total_seconds", ascending=False, ignore_index=True)
+    )
+
+
+def build_month_report(month: str, rows: pd.DataFrame, monthly: pd.DataFrame, top_projects: int) -> dict:
+    """Отчёт за месяц; для сжатых месяцев без дневных строк — только итоги по проектам"""
+
+    year, month_number = map(int, month.split("-"))
+    days = pd.date_range(date(year, month_number, 1), periods=calendar.monthrange(year, month_number)[1])
+    daily = (
+        rows.groupby("date")["total_seconds"]
+        .sum()
+        .reindex(days.strftime("%Y-%m-%d"), fill_value=0.0)
+        .rename_axis("date")
+        .reset_index()
+    )
+    projects = project_totals(concat_rows(rows, monthly))
+
+    top = projects.head(top_projects)
+    figures = {
+        "projects": _hours_bar(top, "project_name", f"Top projects, {month}"),
+        "weekdays": _hours_bar(weekday_totals(daily), "weekday", f"Time by day of week, {month}"),
+    }
+    if not rows.empty:
+        figures["daily"] = _hours_bar(daily, "date", f"Daily activity, {month}")
+
+    return {
+        "period": month,
+        "kind": "month",
+        "summary": summarize_period(daily, projects, top_projects),
+        "daily": daily.to_dict("records"),
+        "figures": figures,
+    }
+
+
+def build_year_report(year: str, rows: pd.DataFrame, monthly: pd.DataFrame, top_projects: int) -> dict:
+    """Отчёт за год: помесячная активность по основным проектам, дни недели и топ проектов"""
+
+    daily_by_month = rows.assign(month=rows["date"].str[:7])[["month", "project_name", "total_seconds"]]
+    by_month = concat_rows(daily_by_month, monthly)
+    projects = project_totals(by_month)
+    top_names = set(projects["project_name"].head(top_projects))
+    by_month["project_name"] = by_month["project_name"].where(by_month["project_name"].isin(top_names), OTHER_PROJECTS)
+    months = [f"{year}-{number:02d}" for number in range(1, 13)]
+    stacked = by_month.groupby(["month", "project_name"], as_index=False)["total_seconds"].sum()
+
+    daily = rows.groupby("date", as_index=False)["total_seconds"].sum()
+    figures = {
+        "months": _hours_bar(
+            stacked, "month", f"Monthly activity, {year}", color="project_name", category_orders={"month": months}
+        ),
+        "projects": _hours_bar(projects.head(top_projects), "project_name", f"Top projects, {year}"),
+        "weekdays": _hours_bar(weekday_totals(daily), "weekday", f"Time by day of week, {year}"),
+    }
+
+    month_totals = stacked.groupby("month")["total_seconds"].sum().reindex(months, fill_value=0.0)
+    return {
+        "period": year,
+        "kind": "year",
+        "summary": summarize_period(daily, projects, top_projects),
+        "months": month_totals.rename_axis("month").reset_index().to_dict("records"),
+        "figures": figures,
+    }
+
+
+def render_html(report: dict) -> str:
+    summary = report["summary"]
+    rows = [
+        ("Total", format_hours(summary["total_seconds"])),
+        ("Active days", summary["active_days"]),
+        ("Daily average", format_hours(summary["daily_average_seconds"])),
+        ("Best day", f"{summary['best_day']} ({format_hours(summary['best_day_seconds'])})"),
+        ("Projects", summary["projects"]),
+    ]
+    return HTML_TEMPLATE.format(
+        period=report["period"],
+        plotly_js=PLOTLY_JS_FILE,
+        summary="".join(f"<tr><td>{name}</td><td>{value}</td></tr>" for name, value in rows),
+        figures="\n".join(
+            figure.to_html(full_html=False, include_plotlyjs=False) for figure in report["figures"].values()
+        ),
+    )
+
+
+class ReportGenerator:
+    """Генерация отчётов только за изменившиеся месяцы и годы, в которые они входят
+
+    Версии месяцев из базы сравниваются с сохранёнными в manifest.json. Каждый отчёт пишется как JSON
+    (агрегаты и спецификации графиков для дашборда) и HTML, который открывается без сервера и сети.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, settings: ReportSettings):
+        self.db = db_manager
+        self.settings = settings
+        self.directory = Path(settings.directory)
+
+    def _read_json(self, name: str, default):
+        try:
+            return json.loads((self.directory / name).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return default
+
+    def _load_rows(self, start_date: str, end_date: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+        rows = pd.DataFrame(
+            [row[:3] for row in self.db.get_project_rows_updated_after(start_date, end_date)],
+            columns=["date", "project_name", "total_seconds"],
+        )
+        monthly = pd.DataFrame(
+            [row[:3] for row in self.db.get_monthly_project_totals(start_date[:7], end_date[:7])],
+            columns=["month", "project_name", "total_seconds"],
+        )
+        return rows, monthly
+
+    def _write_report(self, report: dict) -> dict:
+        period = report["period"]
+        _write_atomic(self.directory / f"{period}.html", render_html(report))
+        document = {
+            **report,
+            "generated_at": datetime.now(UTC).isoformat(),
+            "figures": {name: figure.to_plotly_json() for name, figure in report["figures"].items()},
+        }
+        _write_atomic(self.directory / f"{period}.json", pio.json.to_json_plotly(document))
+        return {
+            "period": period,
+            "kind": report["kind"],
+            "total_seconds": report["summary"]["total_seconds"],
+            "generated_at": document["generated_at"],
+        }
+
+    def generate(self, force: bool = False) -> list[str]:
+        """Перегенерация отчётов за изменившиеся периоды; возвращает их список"""
+
+        versions = self.db.get_month_versions()
+        manifest = self._read_json(MANIFEST_FILE, {"months": {}})
+        index = {entry["period"]: entry for entry in self._read_json(INDEX_FILE, [])}
+
+        changed = sorted(
+            month for month, version in versions.items() if force or manifest["months"].get(month) != version
+        )
+        removed = sorted(set(manifest["months"]) - set(versions))
+        if not changed and not removed:
+            logger.info("Reports are up to date")
+            return []
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not (self.directory / PLOTLY_JS_FILE).exists():
+            _write_atomic(self.directory / PLOTLY_JS_FILE, get_plotlyjs())
+
+        # Месяцы без данных и годы, в которых не осталось месяцев, удаляются вместе с отчётами
+        empty_years = {month[:4] for month in removed} - {month[:4] for month in versions}
+        for period in [*removed, *sorted(empty_years)]:
+            index.pop(period, None)
+            for suffix in (".html", ".json"):
+                (self.directory / f"{period}{suffix}").unlink(missing_ok=True)
+
+        top_projects = self.settings.top_projects
+        generated = []
+        for month in changed:
+            year, month_number = map(int, month.split("-"))
+            rows, monthly = self._load_rows(f"{month}-01", f"{month}-{calendar.monthrange(year, month_number)[1]:02d}")
+            index[month] = self._write_report(build_month_report(month, rows, monthly, top_projects))
+            generated.append(month)
+
+        for year in sorted({month[:4] for month in changed + removed} - empty_years):
+            rows, monthly = self._load_rows(f"{year}-01-01", f"{year}-12-31")
+            index[year] = self._write_report(build_year_report(year, rows, monthly, top_projects))
+            generated.append(year)
+
+        # Указатели обновляются последними: при сбое на полпути отчёты будут перегенерированы в следующий раз
+        _write_atomic(
+            self.directory / INDEX_FILE, json.dumps(sorted(index.values(), key=lambda entry: entry["period"]))
+        )
+        _write_atomic(self.directory / MANIFEST_FILE, json.dumps({"months": versions}))
+        logger.info(f"Generated {len(generated)} reports: {', '.join(generated)}")
+        return generated
+
+
+def read_index(directory: str) -> list[dict]:
+    """Список готовых отчётов для дашборда"""
+
+    try:
+        return json.loads((Path(directory) / INDEX_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return []
+
+
+def read_report(directory: str, period: str) -> dict:
+    return json.loads((Path(directory) / f"{period}.json").read_text(encoding="utf-8"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate static yearly and monthly reports")
+    parser.add_argument("--force", action="store_true", help="Regenerate all reports")
+    args = parser.parse_args()
+
+    config = load_config()
+    configure_logging(config.logging)
+    ReportGenerator(DatabaseManager(), config.reports).generate(force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Пересборка производных таблиц из архива сырых ответов без обращения к WakaTime API
+
+Запуск: python -m wakatime_tracker.reprocess [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--workers N]
+"""
+
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from wakatime_tracker.config import load_config
+from wakatime_tracker.database.engine import dispose_engines
+from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.database.raw_archive import RawArchive
+from wakatime_tracker.logger import configure_logging
+from wakatime_tracker.wakatime_client import WakaTimeClient
+
+logger = logging.getLogger(__name__)
+
+_archive: RawArchive | None = None
+
+
+def _init_worker() -> None:
+    """Пулы соединений, унаследованные от родителя при fork, не переиспользуются
+
+    Очередь логирования родителя в воркере никто не разбирает, поэтому воркер пишет логи синхронно.
+    """
+
+    global _archive
+    config = load_config()
+    configure_logging(config.logging.model_copy(update={"async_logging": False}))
+    dispose_engines()
+    _archive = RawArchive(DatabaseManager(), config.archive)
+
+
+def reprocess_record(record_id: int, dates: list[str]) -> list[str]:
+    """Разбор одного ответа и запись принадлежащих ему дат; возвращает записанные даты
+
+    Воркер пишет только project_summaries: каталог и статистика пересчитываются один раз в конце,
+    поэтому параллельные воркеры не конкурируют за блокировку running_stats и строк каталога.
+    """
+
+    summaries = WakaTimeClient.parse_summaries(_archive.load(record_id))
+    owned = set(dates)
+    by_date: dict[str, list[dict]] = {}
+    for project in WakaTimeClient.extract_project_data(summaries or {}):
+        if project["date"] in owned:
+            by_date.setdefault(project["date"], []).append(project)
+
+    _archive.db.save_project_summaries(by_date)
+    return sorted(by_date)
+
+
+def reprocess(start_date: str | None, end_date: str | None, workers: int) -> tuple[list[str], dict[int, str]]:
+    """Пересборка дат из архива; возвращает записанные даты и ошибки по id ответов"""
+
+    config = load_config()
+    db = DatabaseManager()
+    plan = RawArchive(db, config.archive).plan(start_date, end_date)
+    logger.info(f"Reprocessing {sum(map(len, plan.values()))} days from {len(plan)} archived responses")
+
+    dispose_engines()
+    saved: list[str] = []
+    failed: dict[int, str] = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = {executor.submit(reprocess_record, record_id, dates): record_id for record_id, dates in plan.items()}
+        for future in as_completed(futures):
+            record_id = futures[future]
+            try:
+                saved.extend(future.result())
+            except Exception as e:
+                # Остальные ответы дописываются; неудачные можно повторить отдельным запуском по их датам
+                logger.error(f"Failed to reprocess archived response {record_id} ({', '.join(plan[record_id])}): {e}")
+                failed[record_id] = str(e)
+
+    # Дневные итоги, каталог и статистика пересчитываются один раз по всем записанным датам
+    if saved:
+        DatabaseManager().rebuild_derived_tables(sorted(set(saved)))
+    logger.info(f"Reprocessed {len(saved)} days, {len(failed)} archived responses failed")
+    return saved, failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild derived tables from archived raw API responses")
+    parser.add_argument("--start", help="First date to rebuild, YYYY-MM-DD")
+    parser.add_argument("--end", help="Last date to rebuild, YYYY-MM-DD")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    configure_logging(load_config().logging)
+    _, failed = reprocess(args.start, args.end, args.workers)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Время по проектам из собственных heartbeat вместо total_seconds из WakaTime API
+
+Запуск: python -m wakatime_tracker.sessionize --start YYYY-MM-DD --end YYYY-MM-DD [--write]
+"""
+
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from wakatime_tracker.config import load_config
+from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.logger import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def sessionize(dates, projects, times: np.ndarray, timeout: float) -> pd.DataFrame:
+    """Длительность и число сессий по (date, project) за один проход по массивам
+
+    Heartbeat должны быть упорядочены по дню, проекту и времени. Промежуток до следующего heartbeat того же
+    дня и проекта засчитывается, если не длиннее timeout; более длинная пауза начинает новую сессию.
+    """
+
+    dates, projects = np.asarray(dates), np.asarray(projects)
+    times = np.asarray(times, dtype=np.float64)
+    if times.size == 0:
+        return pd.DataFrame({"date": [], "project_name": [], "total_seconds": [], "sessions": []})
+
+    # Начало группы — смена дня или проекта (соседние элементы, хэширование строк не нужно);
+    # номер группы получается накопленной суммой границ
+    boundary = np.ones(times.size, dtype=bool)
+    boundary[1:] = (dates[1:] != dates[:-1]) | (projects[1:] != projects[:-1])
+    groups = np.cumsum(boundary) - 1
+
+    # Промежуток i -> i+1 засчитывается, если i+1 в той же группе и пауза не длиннее timeout
+    gaps = np.diff(times, append=times[-1])
+    counted = np.zeros(times.size, dtype=bool)
+    counted[:-1] = ~boundary[1:] & (gaps[:-1] <= timeout)
+
+    seconds = np.bincount(groups, weights=np.where(counted, gaps, 0.0))
+    session_starts = np.ones(times.size, dtype=bool)
+    session_starts[1:] = ~counted[:-1]
+    sessions = np.bincount(groups, weights=session_starts)
+
+    first = np.flatnonzero(boundary)
+    return pd.DataFrame(
+        {
+            "date": dates[first],
+            "project_name": projects[first],
+            "total_seconds": seconds,
+            "sessions": sessions.astype(np.int64),
+        }
+    )
+
+
+def format_digital(seconds: float) -> str:
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"{hours}:{minutes:02d}"
+
+
+def format_text(seconds: float) -> str:
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    if hours:
+        return f"{hours} hr{'s' if hours != 1 else ''} {minutes} min{'s' if minutes != 1 else ''}"
+    return f"{minutes} min{'s' if minutes != 1 else ''}"
+
+
+def to_project_records(durations: pd.DataFrame) -> list[dict]:
+    """Записи в формате extract_project_data для save_projects: с процентом от дня и текстовым временем"""
+
+    day_totals = durations.groupby("date")["total_seconds"].transform("sum").to_numpy()
+    percents = np.divide(
+        durations["total_seconds"].to_numpy() * 100, day_totals, out=np.zeros(len(durations)), where=day_totals > 0
+    )
+    return [
+        {
+            "date": date,
+            "name": name,
+            "total_seconds": float(seconds),
+            "digital": format_digital(seconds),
+            "text": format_text(seconds),
+            "percent": round(float(percent), 2),
+        }
+        for date, name, seconds, percent in zip(
+            durations["date"], durations["project_name"], durations["total_seconds"], percents
+        )
+    ]
+
+
+def sessionize_range(db: DatabaseManager, start_date: str, end_date: str, timeout: float) -> list[dict]:
+    rows = db.get_heartbeat_rows(start_date, end_date)
+    if not rows:
+        return []
+    dates, projects, times = zip(*rows)
+    return to_project_records(sessionize(dates, projects, np.fromiter(times, dtype=np.float64), timeout))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compute project durations from ingested heartbeats")
+    parser.add_argument("--start", required=True)
+    parser.add_argument("--end", required=True)
+    parser.add_argument("--write", action="store_true", help="Save results into project_summaries")
+    args = parser.parse_args()
+
+    config = load_config()
+    configure_logging(config.logging)
+
+    db = DatabaseManager()
+    records = sessionize_range(db, args.start, args.end, config.ingest.session_timeout)
+
+    by_date: dict[str, list[dict]] = {}
+    for record in records:
+        by_date.setdefault(record["date"], []).append(record)
+    for date, projects in sorted(by_date.items()):
+        if args.write:
+            db.save_projects(date, projects)
+        logger.info(f"{date}: " + ", ".join(f"{project['name']} {project['text']}" for project in projects))
+
+    logger.info(f"Sessionized {len(records)} project days for {args.start}..{args.end}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Снимок и восстановление таблиц трекера через PostgreSQL COPY
+
+Экспорт: python -m wakatime_tracker.snapshot export --output snapshots/2025-10-20
+Восстановление: python -m wakatime_tracker.snapshot restore --input snapshots/2025-10-20 --mode merge
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, UTC
+
+from sqlalchemy import Table
+
+from wakatime_tracker.config import load_config
+from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.database.models import Base, DailyTotal, Project, ProjectSummary, RunningStats
+from wakatime_tracker.logger import configure_logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+COPY_OPTIONS = "FORMAT csv, HEADER true"
+# Производные таблицы: при merge не загружаются, а пересчитываются по объединённым данным
+DERIVED_TABLES = {DailyTotal.__tablename__, Project.__tablename__, RunningStats.__tablename__}
+UPDATED_AT = "updated_at"
+# Метка времени в UTC без часового пояса, как у записей приложения
+MERGED_AT = "timezone('utc', now())"
+# Даты не позже конца последнего сжатого года (см. compacted_through)
+COMPACTED_FILTER = (
+    " WHERE date > (SELECT COALESCE(substr(MAX(month), 1, 4), '0000') || '-12-31' FROM project_monthly_summaries)"
+)
+
+
+def snapshot_tables() -> list[Table]:
+    """Все таблицы моделей в порядке зависимостей, новые модели попадают в снимок автоматически"""
+
+    return list(Base.metadata.sorted_tables)
+
+
+def column_list(columns: list[str]) -> str:
+    return ", ".join(f'"{column}"' for column in columns)
+
+
+def conflict_columns(table: Table) -> list[str]:
+    """Естественный ключ таблицы для merge: первый уникальный индекс, иначе первичный ключ"""
+
+    for index in sorted(table.indexes, key=lambda idx: idx.name):
+        if index.unique:
+            return [column.name for column in index.columns]
+    return [column.name for column in table.primary_key.columns]
+
+
+def surrogate_key(table: Table) -> str | None:
+    """Автоинкрементный первичный ключ, если он не совпадает с естественным ключом"""
+
+    primary_key = list(table.primary_key.columns)
+    if len(primary_key) == 1 and primary_key[0].autoincrement is True:
+        return primary_key[0].name
+    return None
+
+
+class SnapshotManager:
+    def __init__(self, db_manager: DatabaseManager, compress_level: int = 6):
+        self.db = db_manager
+        self.compress_level = compress_level
+
+        if self.db.engine.dialect.name != "postgresql":
+            raise RuntimeError("Snapshots use COPY and require the PostgreSQL backend")
+
+    def _alembic_revision(self, cursor) -> str | None:
+        cursor.execute("SELECT version_num FROM alembic_version")
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def export(self, output_dir: str) -> dict:
+        """Потоковая выгрузка всех таблиц в сжатые CSV файлы"""
+
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = {"created_at": datetime.now(UTC).isoformat(), "tables": {}}
+
+        connection = self.db.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            # Один снимок данных для всех таблиц
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            manifest["alembic_revision"] = self._alembic_revision(cursor)
+
+            for table in snapshot_tables():
+                columns = [column.name for column in table.columns]
+                file_name = f"{table.name}.csv.gz"
+
+                # COPY из секционированной таблицы возможен только через подзапрос
+                sql = f"COPY (SELECT {column_list(columns)} FROM {table.name}) TO STDOUT WITH ({COPY_OPTIONS})"
+                with gzip.open(os.path.join(output_dir, file_name), "wb", compresslevel=self.compress_level) as f:
+                    cursor.copy_expert(sql, f)
+
+                manifest["tables"][table.name] = {"file": file_name, "columns": columns, "rows": cursor.rowcount}
+                logger.info(f"Exported {cursor.rowcount} rows from {table.name}")
+
+            connection.rollback()
+        finally:
+            connection.close()
+
+        with open(os.path.join(output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        return manifest
+
+    def restore(self, input_dir: str, mode: str = "merge") -> dict:
+        """Загрузка снимка: replace очищает таблицы, merge делает upsert через временную таблицу
+
+        Возвращает число загруженных строк по таблицам (для merge — вставленных или обновлённых).
+        """
+
+        with open(os.path.join(input_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        restored = {}
+        connection = self.db.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+
+            revision = self._alembic_revision(cursor)
+            if revision != manifest.get("alembic_revision"):
+                logger.warning(f"Snapshot revision {manifest.get('alembic_revision')} differs from database {revision}")
+
+            tables = [table for table in snapshot_tables() if table.name in manifest["tables"]]
+            if mode == "merge":
+                tables = [table for table in tables if table.name not in DERIVED_TABLES]
+            if mode == "replace":
+                cursor.execute(f"TRUNCATE {', '.join(table.name for table in tables)} RESTART IDENTITY CASCADE")
+
+            for table in tables:
+                entry = manifest["tables"][table.name]
+                path = os.path.join(input_dir, entry["file"])
+                if mode == "replace":
+                    restored[table.name] = self._copy_into(cursor, table.name, entry["columns"], path)
+                    self._reset_sequence(cursor, table)
+                else:
+                    restored[table.name] = self._merge(cursor, table, entry["columns"], path)
+                logger.info(f"Restored {restored[table.name]} rows into {table.name} ({mode})")
+
+            # Всё восстановление — одна транзакция
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        if mode == "merge":
+            # Итоги по дням, каталог и статистика снимка не совпадают с объединёнными записями проектов
+            self.db.rebuild_derived_tables()
+            logger.info(f"Rebuilt derived tables after merge: {', '.join(sorted(DERIVED_TABLES))}")
+
+        return restored
+
+    @staticmethod
+    def _copy_into(cursor, table_name: str, columns: list[str], path: str) -> int:
+        with gzip.open(path, "rb") as f:
+            cursor.copy_expert(f"COPY {table_name} ({column_list(columns)}) FROM STDIN WITH ({COPY_OPTIONS})", f)
+        return cursor.rowcount
+
+    def _merge(self, cursor, table: Table, columns: list[str], path: str) -> int:
+        staging = f"staging_{table.name}"
+        cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP")
+        self._copy_into(cursor, staging, columns, path)
+
+        keys = conflict_columns(table)
+        # Суррогатный id берётся из последовательности базы, чтобы не пересечься с существующими строками
+        surrogate = surrogate_key(table)
+        insert_columns = [column for column in columns if column != surrogate or surrogate in keys]
+        update_columns = [column for column in insert_columns if column not in keys + ["created_at", UPDATED_AT]]
+        # updated_at — момент слияния, а не снимка: иначе изменения не увидят get_data_version и дельта-синхронизация
+        selected = [
+            f"{MERGED_AT} AS {UPDATED_AT}" if column == UPDATED_AT else f'"{column}"' for column in insert_columns
+        ]
+
+        assignments = [f'"{column}" = EXCLUDED."{column}"' for column in update_columns]
+        if assignments and UPDATED_AT in insert_columns:
+            assignments.append(f"{UPDATED_AT} = {MERGED_AT}")
+        on_conflict = f"DO UPDATE SET {', '.join(assignments)}" if assignments else "DO NOTHING"
+
+        # Строки сжатых лет не возвращаются в project_summaries: их дни уже учтены в помесячных агрегатах
+        where = COMPACTED_FILTER if table.name == ProjectSummary.__tablename__ else ""
+
+        cursor.execute(
+            f"INSERT INTO {table.name} ({column_list(insert_columns)}) "
+            f"SELECT {', '.join(selected)} FROM {staging}{where} "
+            f"ON CONFLICT ({column_list(keys)}) {on_conflict}"
+        )
+        return cursor.rowcount
+
+    @staticmethod
+    def _reset_sequence(cursor, table: Table) -> None:
+        surrogate = surrogate_key(table)
+        if surrogate is None:
+            return
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', '{surrogate}'), "
+            f"COALESCE(MAX({surrogate}), 0) + 1, false) FROM {table.name}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snapshot and restore tracker tables with PostgreSQL COPY")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export all tables to a snapshot directory")
+    export_parser.add_argument("--output", required=True)
+    export_parser.add_argument("--compress-level", type=int, default=6)
+
+    restore_parser = subparsers.add_parser("restore", help="Restore tables from a snapshot directory")
+    restore_parser.add_argument("--input", required=True)
+    restore_parser.add_argument("--mode", choices=["merge", "replace"], default="merge")
+
+    args = parser.parse_args()
+
+    config = load_config()
+    configure_logging(config.logging)
+
+    if args.command == "export":
+        manager = SnapshotManager(DatabaseManager(), compress_level=args.compress_level)
+        manifest = manager.export(args.output)
+        logger.info(f"Snapshot written to {args.output}: {len(manifest['tables'])} tables")
+    else:
+        manager = SnapshotManager(DatabaseManager())
+        restored = manager.restore(args.input, args.mode)
+        logger.info(f"Snapshot restored from {args.input}: {len(restored)} tables")
+
+
+if __name__ == "__main__":
+    main()
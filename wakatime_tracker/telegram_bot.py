@@ -0,0 +1,182 @@
+import html
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import requests
+
+from wakatime_tracker.config import TelegramSettings
+from wakatime_tracker.database.manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+TOP_DAYS = 30
+RETRY_DELAY = 5.0
+NO_DATA_REPLY = "No data collected yet"
+HELP_REPLY = "\n".join(
+    [
+        "/today — latest collected day",
+        "/week — last 7 days",
+        "/month — current month",
+        f"/top — top projects for the last {TOP_DAYS} days",
+    ]
+)
+
+
+def format_duration(seconds: float) -> str:
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+def format_projects(totals: dict[str, float], limit: int) -> list[str]:
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [f"{html.escape(name)}: {format_duration(seconds)}" for name, seconds in ranked]
+
+
+def render_period(title: str, rows: list[tuple], limit: int) -> str:
+    """Итог за период, среднее по активным дням и основные проекты"""
+
+    totals: dict[str, float] = defaultdict(float)
+    days: dict[str, float] = defaultdict(float)
+    for date, project_name, seconds in rows:
+        totals[project_name] += seconds
+        days[date] += seconds
+
+    if not days:
+        return f"<b>{title}</b>\n\nNo activity"
+    total = sum(days.values())
+    lines = [
+        f"<b>{title}</b>",
+        f"Total: {format_duration(total)}, {len(days)} active days, avg {format_duration(total / len(days))}",
+        "",
+        *format_projects(totals, limit),
+    ]
+    return "\n".join(lines)
+
+
+def build_replies(rows: list[tuple], last_date: str, top_projects: int) -> dict[str, str]:
+    """Готовые ответы на команды по записям (date, project_name, total_seconds) до last_date включительно"""
+
+    last = datetime.strptime(last_date, "%Y-%m-%d")
+    week_start = (last - timedelta(days=6)).strftime("%Y-%m-%d")
+    month_start = last.replace(day=1).strftime("%Y-%m-%d")
+    top_start = (last - timedelta(days=TOP_DAYS - 1)).strftime("%Y-%m-%d")
+
+    def since(start: str) -> list[tuple]:
+        return [row for row in rows if row[0] >= start]
+
+    return {
+        "/today": render_period(last_date, since(last_date), top_projects),
+        "/week": render_period(f"{week_start} — {last_date}", since(week_start), top_projects),
+        "/month": render_period(f"{last:%B %Y}", since(month_start), top_projects),
+        "/top": render_period(f"Top projects, {top_start} — {last_date}", since(top_start), top_projects),
+        "/help": HELP_REPLY,
+        "/start": HELP_REPLY,
+    }
+
+
+class BotReplyCache:
+    """Ответы бота, пересчитываемые после сбора; обработка команды — чтение словаря без запросов к базе"""
+
+    def __init__(self, db_manager: DatabaseManager, settings: TelegramSettings):
+        self.db = db_manager
+        self.settings = settings
+        self._replies: dict[str, str] = {}
+        self._version: str | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        # Пересчёт только при изменении данных; ответы заменяются целиком одной ссылкой
+        with self._lock:
+            version = self.db.get_data_version()
+            if version == self._version:
+                return
+
+            last_date = self.db.get_date_range()["last_date"]
+            if last_date is None:
+                replies = {"/help": HELP_REPLY, "/start": HELP_REPLY}
+            else:
+                last = datetime.strptime(last_date, "%Y-%m-%d")
+                start = min(last.replace(day=1), last - timedelta(days=TOP_DAYS - 1)).strftime("%Y-%m-%d")
+                rows = [row[:3] for row in self.db.get_project_rows_updated_after(start, last_date)]
+                replies = build_replies(rows, last_date, self.settings.top_projects)
+
+            self._replies = replies
+            self._version = version
+        logger.info(f"Telegram bot replies refreshed for data version {version}")
+
+    def get(self, command: str) -> str | None:
+        replies = self._replies
+        if command in replies:
+            return replies[command]
+        return NO_DATA_REPLY if command in ("/today", "/week", "/month", "/top") else None
+
+
+class TelegramBot:
+    """Long polling команд в фоновом потоке; отвечает только в настроенный чат"""
+
+    def __init__(self, settings: TelegramSettings, cache: BotReplyCache):
+        self.settings = settings
+        self.cache = cache
+        self.base_url = f"https://api.telegram.org/bot{settings.bot_token}"
+        # Одно соединение с keep-alive на опрос и ответы
+        self.http = requests.Session()
+        self._offset: int | None = None
+
+    def handle(self, message: dict) -> str | None:
+        if str(message.get("chat", {}).get("id")) != str(self.settings.chat_id):
+            return None
+        text = message.get("text") or ""
+        if not text.startswith("/"):
+            return None
+        # В группах команда приходит как /today@bot_name
+        command = text.split()[0].split("@")[0].lower()
+        return self.cache.get(command)
+
+    def poll_once(self) -> None:
+        response = self.http.get(
+            f"{self.base_url}/getUpdates",
+            params={"offset": self._offset, "timeout": self.settings.poll_timeout, "allowed_updates": '["message"]'},
+            timeout=self.settings.poll_timeout + 10,
+        )
+        response.raise_for_status()
+        for update in response.json()["result"]:
+            self._offset = update["update_id"] + 1
+            message = update.get("message")
+            reply = self.handle(message) if message else None
+            if reply is not None:
+                self.send(message["chat"]["id"], reply)
+
+    def send(self, chat_id: int, text: str) -> None:
+        try:
+            response = self.http.post(
+                f"{self.base_url}/sendMessage",
+                json={"chat_id": chat_id, "text": text, "parse_mode": "HTML"},
+                timeout=10,
+            )
+            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Failed to send Telegram reply: {e}")
+
+    def run(self) -> None:
+        while True:
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Telegram polling failed, retrying in {RETRY_DELAY:.0f}s: {e}")
+                time.sleep(RETRY_DELAY)
+
+
+def start_telegram_bot(db: DatabaseManager, settings: TelegramSettings) -> BotReplyCache:
+    """Запуск бота рядом со сборщиком; возвращает кэш ответов для обновления после сбора"""
+
+    cache = BotReplyCache(db, settings)
+    try:
+        cache.refresh()
+    except Exception as e:
+        # До следующего сбора бот отвечает, что данных нет
+        logger.error(f"Failed to build Telegram bot replies: {e}")
+    threading.Thread(target=TelegramBot(settings, cache).run, name="telegram-bot", daemon=True).start()
+    return cache
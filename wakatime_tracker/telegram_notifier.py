@@ -43,3 +43,21 @@ class TelegramNotifier:
             message += f"\n\n{details}"
 
         return self.send_message(message)
+
+    @staticmethod
+    def format_running_stats(stats: dict) -> str:
+        """Краткая сводка накопительной статистики для сообщения"""
+
+        def hours(seconds: float) -> str:
+            return f"{seconds / 3600:.1f}h"
+
+        goal_mark = "✅" if stats["last_day_goal_met"] else "❌"
+        lines = [
+            f"Last day ({stats['last_date']}): {hours(stats['last_day_seconds'])} {goal_mark}",
+            f"Goal: {hours(stats['goal_seconds'])}/day, met on {stats['goal_days']} of {stats['active_days']} days",
+            f"7-day avg: {hours(stats['rolling_7_avg_seconds'])}, 30-day avg: {hours(stats['rolling_30_avg_seconds'])}",
+            f"Streak: {stats['current_streak']} days (longest {stats['longest_streak']})",
+        ]
+        if stats["best_day_date"]:
+            lines.append(f"Best day: {stats['best_day_date']} ({hours(stats['best_day_seconds'])})")
+        return "\n".join(lines)
@@ -1,5 +1,8 @@
 import requests
 import logging
+
+import orjson
+
 from wakatime_tracker.config import load_config
 
 logger = logging.getLogger(__name__)
@@ -11,20 +14,29 @@ class WakaTimeClient:
         self.base_url = self.config.base_url
         self.headers = {"Authorization": f"Basic {self.config.api_key}"}
 
-    def get_summaries(self, start_date: str, end_date: str) -> dict | None:
-        """Получение сводки за период"""
+    def fetch_summaries(self, start_date: str, end_date: str, user_id: str | None = None) -> bytes:
+        """Сырое тело ответа со сводкой за период"""
 
-        url = f"{self.base_url}/users/{self.config.user_id}/summaries"
+        url = f"{self.base_url}/users/{user_id or self.config.user_id}/summaries"
         params = {"start": start_date, "end": end_date}
 
         try:
             response = requests.get(url, headers=self.headers, params=params, timeout=30)
             response.raise_for_status()
-            return response.json()
+            return response.content
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching WakaTime data: {e}")
             raise
 
+    @staticmethod
+    def parse_summaries(raw: bytes) -> dict | None:
+        return orjson.loads(raw)
+
+    def get_summaries(self, start_date: str, end_date: str, user_id: str | None = None) -> dict | None:
+        """Получение сводки за период"""
+
+        return self.parse_summaries(self.fetch_summaries(start_date, end_date, user_id))
+
     @staticmethod
     def extract_project_data(summaries_data: dict) -> list[dict]:
         """Извлечение данных по проектам из ответа API"""
@@ -1,7 +1,9 @@
 import logging
 from datetime import datetime, timedelta
 
+from wakatime_tracker.config import load_config
 from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.database.raw_archive import RawArchive
 from wakatime_tracker.wakatime_client import WakaTimeClient
 from wakatime_tracker.telegram_notifier import TelegramNotifier
 import time
@@ -10,10 +12,22 @@ logger = logging.getLogger(__name__)
 
 
 class WakaTimeService:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db_manager: DatabaseManager, archive: RawArchive | None = None):
+        self.db = db_manager
         self.wakatime_client = WakaTimeClient()
         self.telegram_notifier = TelegramNotifier()
+        self.archive = archive or RawArchive(db_manager, load_config().archive)
+
+    def _fetch_summaries(self, start_date: str, end_date: str, user_id: str | None = None) -> dict | None:
+        """Запрос к API с сохранением сырого ответа в архив до разбора"""
+
+        raw = self.wakatime_client.fetch_summaries(start_date, end_date, user_id)
+        try:
+            self.archive.store(user_id or self.wakatime_client.config.user_id, start_date, end_date, raw)
+        except Exception as e:
+            # Сбой архива не должен останавливать сбор
+            logger.error(f"Failed to archive raw response for {start_date}..{end_date}: {e}")
+        return self.wakatime_client.parse_summaries(raw)
 
     def collect_data_for_date(self, date: str) -> bool:
         """Сбор данных за конкретную дату"""
@@ -22,7 +36,7 @@ class WakaTimeService:
             logger.info(f"Collecting data for date: {date}")
 
             # Получаем данные из WakaTime
-            summaries = self.wakatime_client.get_summaries(date, date)
+            summaries = self._fetch_summaries(date, date)
             if not summaries or "data" not in summaries:
                 logger.warning(f"No data found for date {date}")
                 return False
@@ -30,13 +44,13 @@ class WakaTimeService:
             # Извлекаем данные проектов
             project_data = self.wakatime_client.extract_project_data(summaries)
 
-            # Сохраняем в базу
-            for project in project_data:
-                self.db.save_project_data(date, project)
+            # Сохраняем в базу одной транзакцией вместе с дневным итогом и статистикой
+            self.db.save_projects(date, project_data)
 
             success_msg = f"Collected data for {date}: {len(project_data)} projects"
             logger.info(success_msg)
-            self.telegram_notifier.send_success("Data collection completed", success_msg)
+            stats_msg = self.telegram_notifier.format_running_stats(self.db.get_running_stats())
+            self.telegram_notifier.send_success("Data collection completed", f"{success_msg}\n\n{stats_msg}")
 
             return True
 
@@ -46,6 +60,24 @@ class WakaTimeService:
             self.telegram_notifier.send_error(error_msg, f"Date: {date}")
             return False
 
+    def collect_range(self, start_date: str, end_date: str, user_id: str | None = None) -> int:
+        """Сбор диапазона одним запросом к API с сохранением по дням; ошибки пробрасываются вызывающему"""
+
+        summaries = self._fetch_summaries(start_date, end_date, user_id)
+        if not summaries or "data" not in summaries:
+            logger.warning(f"No data found for {start_date}..{end_date}")
+            return 0
+
+        by_date: dict[str, list[dict]] = {}
+        for project in self.wakatime_client.extract_project_data(summaries):
+            by_date.setdefault(project["date"], []).append(project)
+
+        for date, projects in sorted(by_date.items()):
+            self.db.save_projects(date, projects)
+
+        logger.info(f"Collected data for {start_date}..{end_date}: {len(by_date)} days")
+        return len(by_date)
+
     def collect_historical_data(self, start_date: str, end_date: str):
         """Сбор данных за период"""
 
@@ -0,0 +1,118 @@
+"""Воркер очереди сбора и команды управления очередью
+
+Воркер: python -m wakatime_tracker.worker run
+Backfill: python -m wakatime_tracker.worker enqueue --start 2024-01-01 --end 2024-12-31
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+
+from wakatime_tracker.config import load_config, QueueSettings
+from wakatime_tracker.database.instrumentation import track_operation
+from wakatime_tracker.database.manager import DatabaseManager
+from wakatime_tracker.database.task_queue import TaskQueue
+from wakatime_tracker.logger import configure_logging
+from wakatime_tracker.telegram_notifier import TelegramNotifier
+from wakatime_tracker.wakatime_service import WakaTimeService
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionWorker:
+    """Процесс, забирающий задачи сбора из очереди; воркеров может быть сколько угодно на любых узлах"""
+
+    def __init__(
+        self,
+        service: WakaTimeService,
+        queue: TaskQueue,
+        notifier: TelegramNotifier,
+        settings: QueueSettings,
+        user_id: str,
+    ):
+        self.service = service
+        self.queue = queue
+        self.notifier = notifier
+        self.settings = settings
+        self.user_id = user_id
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = threading.Event()
+
+    def stop(self, *_) -> None:
+        logger.info(f"Worker {self.worker_id} stopping")
+        self._stopping.set()
+
+    def run_once(self) -> bool:
+        """Обработка одной задачи; False, если свободных задач нет"""
+
+        tasks = self.queue.claim(self.worker_id, self.user_id)
+        if not tasks:
+            return False
+
+        task = tasks[0]
+        logger.info(f"Worker {self.worker_id} claimed task {task['id']}: {task['start_date']}..{task['end_date']}")
+        try:
+            with track_operation("collection_task"):
+                self.service.collect_range(task["start_date"], task["end_date"], task["user_id"])
+        except Exception as e:
+            status = self.queue.fail(task, self.worker_id, str(e))
+            logger.error(f"Collection task {task['id']} failed (attempt {task['attempts']}), now {status}: {e}")
+            if status == "dead":
+                self.notifier.send_error(
+                    f"Collection task {task['id']} moved to dead letters after {task['attempts']} attempts: {e}",
+                    f"Range: {task['start_date']}..{task['end_date']}",
+                )
+            return True
+
+        self.queue.complete(task["id"], self.worker_id)
+        return True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info(f"Worker {self.worker_id} started for user {self.user_id}")
+
+        while not self._stopping.is_set():
+            if not self.run_once():
+                self._stopping.wait(self.settings.poll_interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Collection task queue worker")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("run", help="Process collection tasks until stopped")
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Enqueue a date range for collection")
+    enqueue_parser.add_argument("--start", required=True)
+    enqueue_parser.add_argument("--end", required=True)
+    enqueue_parser.add_argument("--reset", action="store_true", help="Re-run chunks that are already done or dead")
+
+    subparsers.add_parser("requeue-dead", help="Return dead tasks to the queue")
+    subparsers.add_parser("stats", help="Show task counts by status")
+
+    args = parser.parse_args()
+
+    config = load_config()
+    configure_logging(config.logging)
+
+    db = DatabaseManager()
+    queue = TaskQueue(db, config.queue)
+    user_id = config.wakatime.user_id
+
+    if args.command == "run":
+        worker = CollectionWorker(WakaTimeService(db), queue, TelegramNotifier(), config.queue, user_id)
+        worker.run()
+    elif args.command == "enqueue":
+        queue.enqueue(user_id, args.start, args.end, reset=args.reset)
+    elif args.command == "requeue-dead":
+        logger.info(f"Requeued {queue.requeue_dead(user_id)} dead tasks")
+    else:
+        logger.info("Collection task stats", extra={"stats": queue.get_stats()})
+
+
+if __name__ == "__main__":
+    main()